@@ -0,0 +1,158 @@
+# scripts/benchmarks/bench_concorrencia.py
+"""
+Mede concorrência e latência de cauda do backend sob carga mista: dispositivos
+postando leituras (POST /leituras/) enquanto o dashboard faz consultas pesadas
+(GET /locais/{cd_area}/leituras com limite alto).
+
+Sobe o uvicorn em um processo separado, contra um banco SQLite temporário.
+Para comparar "antes x depois", aponte --src para outra cópia do código, por exemplo:
+
+    git worktree add /tmp/fs-antes <commit-anterior>
+    python scripts/benchmarks/bench_concorrencia.py --src /tmp/fs-antes/src
+    python scripts/benchmarks/bench_concorrencia.py
+"""
+
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def percentil(valores, p):
+    if not valores:
+        return float("nan")
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * len(ordenados))) - 1))
+    return ordenados[idx]
+
+
+def aguardar_servidor(url, timeout=20.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            requests.get(f"{url}/docs", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError("Backend não respondeu a tempo.")
+
+
+def semear(url, db_path, sensores, historico):
+    requests.post(f"{url}/locais/", json={"nm_local": "Bench", "tp_vulnerabilidade": "Alta"}).raise_for_status()
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.executemany(
+        "INSERT INTO SENSOR (tp_sensor, nm_modelo, cd_area) VALUES (?, ?, 1)",
+        [("Nível Água", f"HC-SR04-{i}") for i in range(sensores)]
+    )
+    conn.commit()
+    conn.close()
+    inicio = datetime(2025, 1, 1)
+    for cd_sensor in range(1, sensores + 1):
+        lote = [
+            {
+                "cd_sensor": cd_sensor,
+                "dt_leitura": (inicio + timedelta(seconds=6 * i)).isoformat(),
+                "vl_valor": (i % 100) / 10.0
+            }
+            for i in range(historico)
+        ]
+        for i in range(0, len(lote), 5000):
+            requests.post(f"{url}/leituras/batch", json=lote[i:i + 5000]).raise_for_status()
+
+
+def trabalhador(sessao, metodo, url, payload_fn, fim, amostras, erros):
+    while time.time() < fim:
+        t0 = time.perf_counter()
+        try:
+            resp = sessao.request(metodo, url, json=payload_fn() if payload_fn else None, timeout=30)
+            ok = resp.status_code < 500
+        except requests.RequestException:
+            ok = False
+        dt = (time.perf_counter() - t0) * 1000
+        if ok:
+            amostras.append(dt)
+        else:
+            erros.append(dt)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concorrência do backend")
+    parser.add_argument("--src", default=os.path.join(RAIZ, "src"), help="diretório src/ a testar")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--sensores", type=int, default=10)
+    parser.add_argument("--historico", type=int, default=20000, help="leituras por sensor")
+    parser.add_argument("--dispositivos", type=int, default=32, help="threads postando leituras")
+    parser.add_argument("--dashboards", type=int, default=16, help="threads consultando a área")
+    parser.add_argument("--duracao", type=float, default=15.0, help="segundos de carga")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="flood_bench_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    url = f"http://127.0.0.1:{args.porta}"
+    env = dict(os.environ, FLOOD_SENTINEL_DB=db_path)
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--app-dir", args.src,
+         "--port", str(args.porta), "--log-level", "warning"],
+        env=env
+    )
+    try:
+        aguardar_servidor(url)
+        semear(url, db_path, args.sensores, args.historico)
+
+        contador = iter(range(10 ** 9))
+        lock = threading.Lock()
+
+        def nova_leitura():
+            with lock:
+                i = next(contador)
+            return {
+                "cd_sensor": 1 + i % args.sensores,
+                "dt_leitura": datetime.now().isoformat(),
+                "vl_valor": float(i % 100)
+            }
+
+        resultados = {
+            "POST /leituras/": ([], []),
+            "GET /locais/1/leituras": ([], [])
+        }
+        fim = time.time() + args.duracao
+        threads = []
+        for _ in range(args.dispositivos):
+            amostras, erros = resultados["POST /leituras/"]
+            threads.append(threading.Thread(target=trabalhador, args=(
+                requests.Session(), "POST", f"{url}/leituras/", nova_leitura, fim, amostras, erros)))
+        for _ in range(args.dashboards):
+            amostras, erros = resultados["GET /locais/1/leituras"]
+            threads.append(threading.Thread(target=trabalhador, args=(
+                requests.Session(), "GET", f"{url}/locais/1/leituras?limit=2000", None, fim, amostras, erros)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        print(f"src: {args.src}")
+        print(f"{args.dispositivos} dispositivos + {args.dashboards} dashboards por {args.duracao:.0f}s")
+        print(f"{'endpoint':<26}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'erros':>7}")
+        for nome, (amostras, erros) in resultados.items():
+            print(
+                f"{nome:<26}{len(amostras) / args.duracao:>9.1f}"
+                f"{percentil(amostras, 50):>10.1f}{percentil(amostras, 95):>10.1f}"
+                f"{percentil(amostras, 99):>10.1f}{max(amostras, default=float('nan')):>10.1f}"
+                f"{len(erros):>7}"
+            )
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+# scripts/benchmarks/bench_frota.py
+"""
+Teste de carga simulando uma frota de ESP32 e o tráfego do dashboard.
+
+Sobe o uvicorn em um processo separado, contra um banco SQLite temporário semeado
+com --areas LOCAL, --dispositivos-por-area dispositivos por área (cada um com os
+três sensores do sketch: temperatura e umidade do DHT22 e nível do HC-SR04) e
+--historico leituras por sensor. Depois:
+
+- cada dispositivo envia suas três leituras a cada --cadencia segundos (o loop()
+  do sketch leva ~6 s: delay(5000) + delay(1000)), com início espalhado no ciclo;
+- cada dashboard repete, a cada --intervalo-dashboard segundos, as consultas de uma
+  atualização de tela em uma área sorteada.
+
+As requisições seguem a agenda mesmo se o servidor atrasar (carga em malha aberta):
+além da latência de cada requisição, o relatório traz a latência medida a partir do
+horário agendado, que inclui o tempo esperando um cliente livre.
+
+O relatório é JSON (stdout ou --saida), com vazão e p50/p95/p99 por endpoint. Para
+comparar commits, salve um relatório de referência e passe-o em --comparar:
+
+    git worktree add /tmp/fs-antes <commit-anterior>
+    python scripts/benchmarks/bench_frota.py --src /tmp/fs-antes/src --saida antes.json
+    python scripts/benchmarks/bench_frota.py --saida depois.json --comparar antes.json
+"""
+
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Sensores de cada dispositivo: (tp_sensor, nm_modelo, faixa, passo). Os valores fazem
+# um passeio aleatório dentro da faixa, devagar o bastante para não disparar as regras
+# de alerta a cada leitura (ver src/backend/regras_alerta.json)
+SENSORES_DISPOSITIVO = (
+    ("Temperatura", "DHT22", (18.0, 32.0), 0.05),
+    ("Umidade", "DHT22", (40.0, 95.0), 0.2),
+    ("Nível Água", "HC-SR04", (0.1, 0.9), 0.002),
+)
+
+
+class Passeio:
+    """Valores simulados de um sensor (passeio aleatório limitado à faixa)."""
+
+    def __init__(self, faixa, passo, rng):
+        self.minimo, self.maximo = faixa
+        self.passo = passo
+        self.rng = rng
+        self.valor = rng.uniform(self.minimo, self.maximo)
+
+    def proximo(self) -> float:
+        self.valor = min(self.maximo, max(self.minimo, self.valor + self.rng.gauss(0.0, self.passo)))
+        return round(self.valor, 3)
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, max(0, int(round(p / 100.0 * len(ordenados))) - 1))
+    return round(ordenados[idx], 3)
+
+
+def aguardar_servidor(url, timeout=30.0):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            requests.get(f"{url}/docs", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError("Backend não respondeu a tempo.")
+
+
+def commit_atual(src):
+    try:
+        return subprocess.run(
+            ["git", "-C", src, "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ================================
+# Semeadura (no próprio processo, antes de subir o servidor)
+# ================================
+def semear(src, db_path, areas, por_area, historico, cadencia):
+    """
+    Cria o esquema e os dados iniciais com o código de 'src' (init_db + lote do crud,
+    que também preenche os agregados). Retorna, por dispositivo,
+    (cd_area, [cd_sensor, ...], [Passeio, ...]) já no último valor do histórico.
+    """
+    os.environ["FLOOD_SENTINEL_DB"] = db_path
+    sys.path.insert(0, src)
+    from backend import crud, schemas
+    from backend.database import init_db
+
+    init_db()
+    conn = sqlite3.connect(db_path, timeout=30)
+    dispositivos = []
+    for a in range(areas):
+        cd_area = conn.execute(
+            "INSERT INTO LOCAL (nm_local, tp_vulnerabilidade, lat, lon) VALUES (?, ?, ?, ?)",
+            (f"Área {a + 1}", "Alta" if a % 3 == 0 else "Média", -23.5 + a * 0.01, -46.6 - a * 0.01)
+        ).lastrowid
+        for d in range(por_area):
+            sensores = [
+                conn.execute(
+                    "INSERT INTO SENSOR (tp_sensor, nm_modelo, cd_area) VALUES (?, ?, ?)",
+                    (tp_sensor, f"{nm_modelo}-{a + 1}.{d + 1}", cd_area)
+                ).lastrowid
+                for tp_sensor, nm_modelo, _, _ in SENSORES_DISPOSITIVO
+            ]
+            dispositivos.append((cd_area, sensores, [
+                Passeio(faixa, passo, random.Random(cd_sensor))
+                for cd_sensor, (_, _, faixa, passo) in zip(sensores, SENSORES_DISPOSITIVO)
+            ]))
+    conn.commit()
+    conn.close()
+
+    inicio = datetime.now() - timedelta(seconds=cadencia * historico)
+    lote = []
+    for _, sensores, passeios in dispositivos:
+        for cd_sensor, passeio in zip(sensores, passeios):
+            for i in range(historico):
+                lote.append(schemas.LeituraSensorCreate(
+                    cd_sensor=cd_sensor,
+                    dt_leitura=inicio + timedelta(seconds=cadencia * i),
+                    vl_valor=passeio.proximo()
+                ))
+                if len(lote) >= 5000:
+                    crud.criar_leituras_lote(lote)
+                    lote = []
+    if lote:
+        crud.criar_leituras_lote(lote)
+    return dispositivos
+
+
+# ================================
+# Carga
+# ================================
+class Coletor:
+    """Latências por endpoint: (latência, latência desde o horário agendado, status)."""
+
+    def __init__(self):
+        self.amostras = {}
+        self._lock = threading.Lock()
+        self.medindo = False
+
+    def registrar(self, endpoint, latencia_ms, agendada_ms, status):
+        if not self.medindo:
+            return
+        with self._lock:
+            self.amostras.setdefault(endpoint, []).append((latencia_ms, agendada_ms, status))
+
+
+class Cliente:
+    """Uma requests.Session por thread do executor, medindo cada chamada."""
+
+    def __init__(self, url, coletor):
+        self.url = url
+        self.coletor = coletor
+        self._local = threading.local()
+
+    def chamar(self, metodo, endpoint, caminho, agendado, **kwargs):
+        sessao = getattr(self._local, "sessao", None)
+        if sessao is None:
+            sessao = self._local.sessao = requests.Session()
+        t0 = time.perf_counter()
+        try:
+            status = sessao.request(metodo, f"{self.url}{caminho}", timeout=30, **kwargs).status_code
+        except requests.RequestException:
+            status = 0
+        t1 = time.perf_counter()
+        self.coletor.registrar(endpoint, (t1 - t0) * 1000, (t1 - agendado) * 1000, status)
+
+
+def ciclo_dispositivo(cliente, sensores, passeios, modo):
+    def executar(agendado):
+        agora = datetime.now().isoformat()
+        leituras = [
+            {"cd_sensor": cd_sensor, "dt_leitura": agora, "vl_valor": passeio.proximo()}
+            for cd_sensor, passeio in zip(sensores, passeios)
+        ]
+        if modo == "lote":
+            cliente.chamar("POST", "POST /leituras/batch", "/leituras/batch", agendado, json=leituras)
+        else:
+            for leitura in leituras:
+                cliente.chamar("POST", "POST /leituras/", "/leituras/", agendado, json=leitura)
+    return executar
+
+
+def ciclo_dashboard(cliente, areas, rng):
+    def executar(agendado):
+        cd_area = rng.choice(areas)
+        cliente.chamar("GET", "GET /locais/", "/locais/", agendado)
+        cliente.chamar(
+            "GET", "GET /locais/{cd_area}/leituras", f"/locais/{cd_area}/leituras", agendado,
+            params={"limit": 50, "formato": "colunar"}
+        )
+        cliente.chamar(
+            "GET", "GET /alertas/", "/alertas/", agendado,
+            params={"cd_area": cd_area, "limit": 10, "formato": "colunar"}
+        )
+        cliente.chamar(
+            "GET", "GET /locais/{cd_area}/risco", f"/locais/{cd_area}/risco", agendado,
+            params={"bucket": "hour"}
+        )
+    return executar
+
+
+def rodar_agenda(tarefas, duracao, aquecimento, executor, coletor):
+    """
+    tarefas: [(período, função)]. Dispara cada função no executor a cada período, com
+    fase inicial aleatória; as medições começam após o aquecimento.
+    """
+    rng = random.Random(7)
+    inicio = time.perf_counter()
+    agenda = [(inicio + rng.uniform(0, periodo), i, periodo, funcao)
+              for i, (periodo, funcao) in enumerate(tarefas)]
+    heapq.heapify(agenda)
+    fim = inicio + aquecimento + duracao
+    while agenda:
+        horario, i, periodo, funcao = heapq.heappop(agenda)
+        if horario >= fim:
+            break
+        espera = horario - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        coletor.medindo = time.perf_counter() >= inicio + aquecimento
+        executor.submit(funcao, horario)
+        heapq.heappush(agenda, (horario + periodo, i, periodo, funcao))
+    time.sleep(max(0.0, fim - time.perf_counter()))
+    coletor.medindo = False
+
+
+# ================================
+# Relatório
+# ================================
+def resumir(coletor, duracao):
+    endpoints = {}
+    for endpoint, amostras in sorted(coletor.amostras.items()):
+        ok = [a for a in amostras if 200 <= a[2] < 400]
+        por_status = {}
+        for _, _, status in amostras:
+            por_status[str(status)] = por_status.get(str(status), 0) + 1
+        latencias = [a[0] for a in ok]
+        agendadas = [a[1] for a in ok]
+        endpoints[endpoint] = {
+            "requisicoes": len(amostras),
+            "erros": len(amostras) - len(ok),
+            "por_status": por_status,
+            "req_s": round(len(ok) / duracao, 2),
+            "p50_ms": percentil(latencias, 50),
+            "p95_ms": percentil(latencias, 95),
+            "p99_ms": percentil(latencias, 99),
+            "max_ms": round(max(latencias), 3) if latencias else None,
+            "agendada_p50_ms": percentil(agendadas, 50),
+            "agendada_p99_ms": percentil(agendadas, 99),
+        }
+    return endpoints
+
+
+def comparar(atual, referencia):
+    """Tabela (stderr) com a variação de vazão e de p95/p99 em relação à referência."""
+    print(f"\n{'endpoint':<34}{'req/s':>16}{'p95 ms':>20}{'p99 ms':>20}", file=sys.stderr)
+    for endpoint, dados in atual["endpoints"].items():
+        base = referencia.get("endpoints", {}).get(endpoint)
+        if not base:
+            continue
+        colunas = []
+        for campo in ("req_s", "p95_ms", "p99_ms"):
+            antes, depois = base.get(campo), dados.get(campo)
+            if antes and depois:
+                colunas.append(f"{antes:.1f}->{depois:.1f} ({(depois / antes - 1) * 100:+.0f}%)")
+            else:
+                colunas.append("-")
+        print(f"{endpoint:<34}{colunas[0]:>16}{colunas[1]:>20}{colunas[2]:>20}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga: frota de ESP32 + dashboards")
+    parser.add_argument("--src", default=os.path.join(RAIZ, "src"), help="diretório src/ a testar")
+    parser.add_argument("--porta", type=int, default=8767)
+    parser.add_argument("--areas", type=int, default=10)
+    parser.add_argument("--dispositivos-por-area", type=int, default=5)
+    parser.add_argument("--historico", type=int, default=2000, help="leituras por sensor antes do teste")
+    parser.add_argument("--cadencia", type=float, default=6.0, help="segundos entre envios de um dispositivo")
+    parser.add_argument("--modo", choices=("unitario", "lote"), default="unitario",
+                        help="unitario: um POST /leituras/ por sensor; lote: um POST /leituras/batch por ciclo")
+    parser.add_argument("--dashboards", type=int, default=4)
+    parser.add_argument("--intervalo-dashboard", type=float, default=5.0)
+    parser.add_argument("--conexoes", type=int, default=64, help="threads/conexões HTTP do gerador de carga")
+    parser.add_argument("--duracao", type=float, default=30.0, help="segundos medidos")
+    parser.add_argument("--aquecimento", type=float, default=5.0, help="segundos descartados no início")
+    parser.add_argument("--saida", help="arquivo para o relatório JSON (padrão: stdout)")
+    parser.add_argument("--comparar", help="relatório JSON de referência")
+    args = parser.parse_args()
+
+    src = os.path.abspath(args.src)
+    tmpdir = tempfile.mkdtemp(prefix="flood_frota_")
+    db_path = os.path.join(tmpdir, "bench.db")
+    url = f"http://127.0.0.1:{args.porta}"
+
+    t0 = time.perf_counter()
+    dispositivos = semear(src, db_path, args.areas, args.dispositivos_por_area, args.historico, args.cadencia)
+    semeadura_s = time.perf_counter() - t0
+
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--app-dir", src,
+         "--port", str(args.porta), "--log-level", "warning"],
+        env=dict(os.environ, FLOOD_SENTINEL_DB=db_path)
+    )
+    try:
+        aguardar_servidor(url)
+        coletor = Coletor()
+        cliente = Cliente(url, coletor)
+        rng = random.Random(1)
+        areas = sorted({cd_area for cd_area, _, _ in dispositivos})
+        tarefas = [(args.cadencia, ciclo_dispositivo(cliente, sensores, passeios, args.modo))
+                   for _, sensores, passeios in dispositivos]
+        tarefas += [(args.intervalo_dashboard, ciclo_dashboard(cliente, areas, random.Random(rng.random())))
+                    for _ in range(args.dashboards)]
+        with ThreadPoolExecutor(max_workers=args.conexoes) as executor:
+            rodar_agenda(tarefas, args.duracao, args.aquecimento, executor, coletor)
+
+        try:
+            ingestao = requests.get(f"{url}/ingestao/metricas", timeout=5)
+            ingestao = ingestao.json() if ingestao.ok else None
+        except requests.RequestException:
+            ingestao = None
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    relatorio = {
+        "meta": {
+            "src": src,
+            "commit": commit_atual(src),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "parametros": {k: v for k, v in vars(args).items() if k not in ("saida", "comparar")},
+            "leituras_semeadas": len(dispositivos) * len(SENSORES_DISPOSITIVO) * args.historico,
+            "semeadura_s": round(semeadura_s, 2),
+        },
+        "endpoints": resumir(coletor, args.duracao),
+        "ingestao": ingestao,
+    }
+    texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(relatorio, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
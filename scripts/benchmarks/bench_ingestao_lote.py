@@ -0,0 +1,76 @@
+# scripts/benchmarks/bench_ingestao_lote.py
+"""
+Compara a vazão de ingestão de leituras entre o caminho unitário
+(crud.criar_leitura, um commit por linha) e o caminho em lote
+(crud.criar_leituras_lote, um commit por lote).
+
+Roda contra um banco SQLite temporário, nunca contra src/backend/flood_sentinel.db.
+
+Uso:
+    python scripts/benchmarks/bench_ingestao_lote.py --linhas 2000 --lote 1000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+
+def gerar_leituras(schemas, n: int, cd_sensor: int):
+    inicio = datetime(2025, 1, 1)
+    return [
+        schemas.LeituraSensorCreate(
+            cd_sensor=cd_sensor,
+            dt_leitura=inicio + timedelta(seconds=6 * i),
+            vl_valor=float(i % 100) / 10.0
+        )
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=2000, help="leituras por cenário")
+    parser.add_argument("--lote", type=int, default=1000, help="tamanho de cada lote")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="flood_bench_")
+    os.environ["FLOOD_SENTINEL_DB"] = os.path.join(tmpdir, "bench.db")
+
+    from backend import crud, schemas
+    from backend.database import get_connection, init_db
+
+    init_db()
+    conn = get_connection()
+    conn.execute("INSERT INTO LOCAL (nm_local, tp_vulnerabilidade) VALUES ('Bench', 'Alta')")
+    conn.execute("INSERT INTO SENSOR (tp_sensor, nm_modelo, cd_area) VALUES ('Nível Água', 'HC-SR04', 1)")
+    conn.commit()
+    conn.close()
+
+    leituras = gerar_leituras(schemas, args.linhas, cd_sensor=1)
+
+    t0 = time.perf_counter()
+    for leitura in leituras:
+        crud.criar_leitura(leitura)
+    t_unitario = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i in range(0, len(leituras), args.lote):
+        crud.criar_leituras_lote(leituras[i:i + args.lote])
+    t_lote = time.perf_counter() - t0
+
+    vazao_unitario = args.linhas / t_unitario
+    vazao_lote = args.linhas / t_lote
+    print(f"Banco temporário: {os.environ['FLOOD_SENTINEL_DB']}")
+    print(f"Unitário : {args.linhas} linhas em {t_unitario:.3f}s -> {vazao_unitario:,.0f} linhas/s")
+    print(f"Lote({args.lote}): {args.linhas} linhas em {t_lote:.3f}s -> {vazao_lote:,.0f} linhas/s")
+    print(f"Ganho    : {vazao_lote / vazao_unitario:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
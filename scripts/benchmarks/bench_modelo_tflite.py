@@ -0,0 +1,92 @@
+# scripts/benchmarks/bench_modelo_tflite.py
+"""
+Mede a vazão (linhas/s) da inferência em NumPy do flood_model
+(backend.modelo_tflite) para diferentes tamanhos de lote, nos modos híbrido
+(igual ao TFLite) e float32 (pesos desquantizados).
+
+Se um interpretador TFLite estiver instalado (ai-edge-litert ou tflite-runtime),
+também compara as saídas com ele. Ele não é dependência do projeto.
+
+Uso:
+    python scripts/benchmarks/bench_modelo_tflite.py --linhas 1000000 --lotes 1 64 1024 16384 65536
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+
+def interpretador_tflite():
+    for modulo in ("ai_edge_litert.interpreter", "tflite_runtime.interpreter"):
+        try:
+            return __import__(modulo, fromlist=["Interpreter"]).Interpreter
+        except ImportError:
+            continue
+    return None
+
+
+def comparar_com_tflite(dados: bytes, modelo, x: np.ndarray):
+    Interpreter = interpretador_tflite()
+    if Interpreter is None:
+        print("TFLite não instalado: comparação de saídas ignorada.")
+        return
+    with tempfile.NamedTemporaryFile(suffix=".tflite", delete=False) as f:
+        f.write(dados)
+    interpretador = Interpreter(model_path=f.name)
+    interpretador.resize_tensor_input(interpretador.get_input_details()[0]["index"], list(x.shape))
+    interpretador.allocate_tensors()
+    interpretador.set_tensor(interpretador.get_input_details()[0]["index"], x)
+    interpretador.invoke()
+    referencia = interpretador.get_tensor(interpretador.get_output_details()[0]["index"])
+    os.unlink(f.name)
+    diferenca = np.abs(modelo.prever(x) - referencia)
+    print(
+        f"vs TFLite ({len(x)} linhas): diferença máx {diferenca.max():.2e}, "
+        f"linhas > 1e-5: {(diferenca > 1e-5).sum()}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inferência do flood_model em NumPy")
+    parser.add_argument("--linhas", type=int, default=1_000_000, help="linhas por medição")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 16, 256, 4096, 65536])
+    parser.add_argument("--modelo", default=None, help=".tflite ou .h (padrão: flood_model.h)")
+    args = parser.parse_args()
+
+    from backend.modelo_tflite import MODELO_PATH, ModeloTFLite, ler_header_c
+
+    caminho = args.modelo or MODELO_PATH
+    modelos = {
+        "híbrido": ModeloTFLite.de_arquivo(caminho),
+        "float32": ModeloTFLite.de_arquivo(caminho, hibrido=False),
+    }
+    n_entradas = modelos["híbrido"].n_entradas
+    x = np.random.default_rng(0).standard_normal((args.linhas, n_entradas)).astype(np.float32)
+
+    print(f"Modelo: {caminho} ({n_entradas} entradas)")
+    print(f"{'lote':>8}" + "".join(f"{nome + ' linhas/s':>22}" for nome in modelos))
+    for lote in args.lotes:
+        # Lotes pequenos: mede só uma parte das linhas para não demorar
+        n = min(args.linhas, max(lote * 200, 20_000))
+        colunas = []
+        for modelo in modelos.values():
+            modelo.prever(x[:lote], lote=lote)  # aquecimento
+            t0 = time.perf_counter()
+            for i in range(0, n, lote):
+                modelo.prever(x[i:i + lote], lote=lote)
+            colunas.append(n / (time.perf_counter() - t0))
+        print(f"{lote:>8}" + "".join(f"{v:>22,.0f}" for v in colunas))
+
+    dados = ler_header_c(caminho) if caminho.endswith(".h") else open(caminho, "rb").read()
+    comparar_com_tflite(dados, modelos["híbrido"], x[:100_000])
+
+
+if __name__ == "__main__":
+    main()
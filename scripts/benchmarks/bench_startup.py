@@ -0,0 +1,81 @@
+# scripts/benchmarks/bench_startup.py
+"""
+Mede o custo de "cold start" de um worker do backend: tempo para importar
+backend.app e criar a aplicação, e memória residente (RSS máximo) do processo.
+Também confere que módulos pesados não entram no grafo de importação.
+
+Cada amostra roda em um processo Python novo (sem cache de módulos em memória).
+Sai com código 1 se algum limite for ultrapassado, para uso em CI:
+
+    python scripts/benchmarks/bench_startup.py --max-import-ms 1500 --max-rss-mib 120
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Módulos que não devem ser carregados pelo backend
+PROIBIDOS = ("pandas", "numpy", "sqlalchemy", "dash", "plotly")
+
+_SONDA = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import backend.app
+t1 = time.perf_counter()
+rss_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "rss_mib": rss_kib / 1024,
+    "carregados": sorted(m for m in %r if m in sys.modules),
+}))
+"""
+
+
+def medir(src: str) -> dict:
+    saida = subprocess.run(
+        [sys.executable, "-c", _SONDA % (PROIBIDOS,)],
+        cwd=src, capture_output=True, text=True, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de startup do backend")
+    parser.add_argument("--src", default=os.path.join(RAIZ, "src"), help="diretório src/ a testar")
+    parser.add_argument("--amostras", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None, help="limite da mediana")
+    parser.add_argument("--max-rss-mib", type=float, default=None, help="limite da mediana")
+    args = parser.parse_args()
+
+    amostras = [medir(args.src) for _ in range(args.amostras)]
+    import_ms = statistics.median(a["import_ms"] for a in amostras)
+    rss_mib = statistics.median(a["rss_mib"] for a in amostras)
+    carregados = sorted({m for a in amostras for m in a["carregados"]})
+
+    print(json.dumps({
+        "src": args.src,
+        "amostras": args.amostras,
+        "import_ms_mediana": round(import_ms, 1),
+        "rss_mib_mediana": round(rss_mib, 1),
+        "modulos_proibidos_carregados": carregados,
+    }, indent=2, ensure_ascii=False))
+
+    falhas = []
+    if carregados:
+        falhas.append(f"módulos pesados importados: {', '.join(carregados)}")
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        falhas.append(f"import {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+    if args.max_rss_mib is not None and rss_mib > args.max_rss_mib:
+        falhas.append(f"RSS {rss_mib:.1f} MiB > {args.max_rss_mib:.1f} MiB")
+    if falhas:
+        print("REGRESSÃO: " + "; ".join(falhas), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,215 @@
 # src/backend/app.py
 
-from fastapi import FastAPI, HTTPException, Query
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from typing import List, Optional
+from datetime import datetime
+from email.utils import parsedate_to_datetime
 from . import crud, schemas
+from .exportacao import FORMATOS_EXPORT, gerar_export
+from .cache_leituras import cache_leituras
+from .cache_referencia import Instantaneo, cache_referencia
+from .eventos import EVENTO_KEEPALIVE, KEEPALIVE_S, barramento
+from . import ingestao, metricas
+from .ingestao import FilaCheia, IngestaoIndisponivel, fila_ingestao
+from .particoes import LoteExcedeMeses, MesArquivado
+from .retencao import tarefa_retencao
+from .database import (
+    BUCKETS_AGREGADO,
+    executar_consulta,
+    executar_gravacao,
+    encerrar_executores,
+    fechar_pool,
+    init_db
+)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Cria/migra o esquema uma vez, antes de aceitar requisições
+    reconstruidos = init_db()
+    if reconstruidos:
+        print(f"Agregados reconstruídos após gravação interrompida: {', '.join(map(str, reconstruidos))}")
+    # Últimas leituras de cada sensor em memória (ver cache_leituras)
+    cache_leituras.carregar()
+    if ingestao.ATIVA:
+        fila_ingestao.iniciar()
+    # Arquivamento em Parquet dos meses frios (só com FLOOD_SENTINEL_MESES_QUENTES > 0)
+    tarefa_retencao.iniciar()
+    yield
+    # Fora do event loop: a thread de retenção pode estar terminando um row group
+    await asyncio.to_thread(tarefa_retencao.parar)
+    # Grava o que ficou na fila de ingestão antes de fechar as conexões; o join roda
+    # fora do event loop, que ainda entrega as respostas do último group commit
+    await asyncio.to_thread(fila_ingestao.parar)
+    # Termina as operações pendentes e fecha as conexões SQLite mantidas pelo pool
+    encerrar_executores()
+    fechar_pool()
+
 
 app = FastAPI(
     title="Flood Sentinel API (SQLite)",
     description="API para receber leituras, gerenciar alertas, locais e sensores.",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
+# Latência/status por rota e requisições em andamento (GET /metrics)
+app.add_middleware(metricas.MiddlewareMetricas)
+
+
+def _coletar_metricas_processo():
+    """Estado da fila de ingestão e do barramento SSE, lido na hora da exportação."""
+    estado = fila_ingestao.metricas()
+    familias = []
+    for nome, tipo, ajuda, valor in (
+        ("ingestao_profundidade", metricas.Medidor, "Itens aguardando gravação na fila de ingestão.",
+         estado["profundidade"]),
+        ("ingestao_capacidade", metricas.Medidor, "Capacidade da fila de ingestão.", estado["capacidade"]),
+        ("ingestao_itens_gravados_total", metricas.Contador, "Itens gravados pela fila de ingestão.",
+         estado["itens_gravados"]),
+        ("ingestao_itens_com_erro_total", metricas.Contador, "Itens da fila de ingestão que falharam.",
+         estado["itens_com_erro"]),
+        ("ingestao_itens_rejeitados_total", metricas.Contador, "Itens recusados com a fila cheia (429).",
+         estado["itens_rejeitados"]),
+        ("ingestao_lotes_gravados_total", metricas.Contador, "Commits feitos pela fila de ingestão.",
+         estado["lotes_gravados"]),
+        ("eventos_assinantes", metricas.Medidor, "Streams SSE (GET /eventos) abertos.",
+         barramento.total_assinantes),
+    ):
+        familia = tipo(nome, ajuda)
+        familia.inc((), valor)
+        familias.append(familia)
+    return familias
+
+
+metricas.registro.adicionar_coletor(_coletar_metricas_processo)
+
+# Quantidade máxima de leituras aceitas em um único POST /leituras/batch
+MAX_LOTE_LEITURAS = 10000
+
+# Quantidade máxima de pares (temperatura, umidade) em um único POST /risco/batch: o
+# corpo inteiro passa pela validação do pydantic antes de chegar ao endpoint
+MAX_LOTE_RISCO = 100_000
+
+# ================================
+# Paginação por cursor (before / after)
+# ================================
+def _ler_cursores(before: Optional[str], after: Optional[str]):
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use apenas um dos cursores: before ou after.")
+    try:
+        antes = crud.decodificar_cursor(before) if before is not None else None
+        depois = crud.decodificar_cursor(after) if after is not None else None
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return antes, depois
+
+
+def _definir_proximo_cursor(request: Request, response: Response, cursor_ultimo: str,
+                            quantidade: int, limit: int, sentido_depois: bool) -> None:
+    """
+    Publica o cursor da próxima página em X-Next-Cursor e Link (rel="next").
+    - before/sem cursor: só há próxima página se esta veio cheia;
+    - after: o cursor aponta para o item mais novo recebido (para continuar acompanhando).
+    """
+    if not sentido_depois and quantidade < limit:
+        return
+    parametro = "after" if sentido_depois else "before"
+    proxima = request.url.remove_query_params(["before", "after"]).include_query_params(
+        **{parametro: cursor_ultimo}
+    )
+    response.headers["X-Next-Cursor"] = cursor_ultimo
+    response.headers["Link"] = f'<{proxima}>; rel="next"'
+
+# ================================
+# Formato colunar (opcional) das séries temporais
+# ================================
+# Selecionado por ?formato=colunar ou pelo cabeçalho Accept. O corpo é
+# {coluna: [valores]} e as datas vêm como epoch inteiro em microssegundos (UTC).
+MEDIA_COLUNAR = "application/vnd.floodsentinel.columnar+json"
+
+
+def _quer_colunar(request: Request, formato: Optional[str]) -> bool:
+    if formato is not None:
+        if formato not in ("colunar", "linhas"):
+            raise HTTPException(status_code=400, detail="formato inválido: use colunar ou linhas.")
+        return formato == "colunar"
+    return MEDIA_COLUNAR in request.headers.get("accept", "")
+
+
+def _resposta_colunar(colunas: dict) -> JSONResponse:
+    return JSONResponse(content=colunas, media_type=MEDIA_COLUNAR)
+
+# ================================
+# Cadastro (locais e sensores): ETag, Last-Modified e 304
+# ================================
+async def _cadastro(obter, *args) -> Instantaneo:
+    """Instantâneo do cache_referencia; só vai ao executor quando precisa ler o banco."""
+    instantaneo = obter(*args, so_memoria=True)
+    if instantaneo is None:
+        instantaneo = await executar_consulta(obter, *args)
+    return instantaneo
+
+
+def _nao_modificado(request: Request, instantaneo: Instantaneo) -> bool:
+    """If-None-Match tem precedência; If-Modified-Since vale só sem ele (RFC 9110)."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [etag.strip().removeprefix("W/") for etag in if_none_match.split(",")]
+        return "*" in etags or instantaneo.etag in etags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        desde = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return instantaneo.dt_modificacao // 1_000_000 <= desde
+
+
+def _resposta_cadastro(request: Request, instantaneo: Instantaneo, vazio: str) -> Response:
+    if not instantaneo.itens:
+        raise HTTPException(status_code=404, detail=vazio)
+    # no-cache: o cliente pode guardar, mas revalida sempre (com resposta 304 barata)
+    headers = {
+        "ETag": instantaneo.etag,
+        "Last-Modified": instantaneo.last_modified,
+        "Cache-Control": "no-cache",
+    }
+    if _nao_modificado(request, instantaneo):
+        return Response(status_code=304, headers=headers)
+    return Response(content=instantaneo.corpo, media_type="application/json", headers=headers)
+
+# ================================
+# Fila de ingestão (group commit) e backpressure
+# ================================
+async def _gravar_na_fila(gravar, dados, descricao: str):
+    """
+    Envia o item à fila de ingestão e aguarda o commit do lote. Fila cheia → 429 e
+    gravador parado → 503, ambos com Retry-After para os dispositivos reenviarem;
+    leitura de um mês já arquivado → 409.
+    """
+    try:
+        return await gravar(dados)
+    except FilaCheia as fc:
+        raise HTTPException(status_code=429, detail=str(fc), headers={"Retry-After": "1"})
+    except IngestaoIndisponivel as ii:
+        raise HTTPException(status_code=503, detail=str(ii), headers={"Retry-After": "5"})
+    except MesArquivado as ma:
+        raise HTTPException(status_code=409, detail=str(ma))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao inserir {descricao}: {e}")
+
 # ================================
 # ENDPOINT: CRIAR LOCAL
 # ================================
 @app.post("/locais/", response_model=schemas.LocalResponse)
-def endpoint_criar_local(local: schemas.LocalCreate):
+async def endpoint_criar_local(local: schemas.LocalCreate):
     try:
-        novo = crud.criar_local(local)
+        novo = await executar_gravacao(crud.criar_local, local)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao criar local: {e}")
     return novo
@@ -25,9 +218,9 @@ def endpoint_criar_local(local: schemas.LocalCreate):
 # ENDPOINT: ATUALIZAR LOCAL
 # ================================
 @app.put("/locais/{cd_area}", response_model=schemas.LocalResponse)
-def endpoint_atualizar_local(cd_area: int, local: schemas.LocalUpdate):
+async def endpoint_atualizar_local(cd_area: int, local: schemas.LocalUpdate):
     try:
-        atualizado = crud.atualizar_local(cd_area, local)
+        atualizado = await executar_gravacao(crud.atualizar_local, cd_area, local)
     except ValueError as ve:
         raise HTTPException(status_code=404, detail=str(ve))
     except Exception as e:
@@ -37,61 +230,221 @@ def endpoint_atualizar_local(cd_area: int, local: schemas.LocalUpdate):
 # ================================
 # ENDPOINT: LISTAR LOCAIS
 # ================================
+def _ler_bbox(texto: str):
+    """'min_lon,min_lat,max_lon,max_lat' (ordem do GeoJSON) -> tupla de floats."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in texto.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox inválido: use min_lon,min_lat,max_lon,max_lat.")
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(
+            status_code=400,
+            detail="bbox inválido: longitudes entre -180 e 180, latitudes entre -90 e 90, mínimos <= máximos."
+        )
+    return min_lon, min_lat, max_lon, max_lat
+
+
 @app.get("/locais/", response_model=List[schemas.LocalResponse])
-def endpoint_listar_locais():
+async def endpoint_listar_locais(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    limit: int = Query(10_000, ge=1, le=100_000, description="Máximo de áreas com bbox"),
+):
+    """
+    Sem bbox: todas as áreas (cache em memória, com ETag/304). Com bbox: só as áreas
+    dentro do retângulo, pelo índice espacial (lista vazia se não houver nenhuma).
+    """
+    if bbox is not None:
+        caixa = _ler_bbox(bbox)
+        try:
+            return await executar_consulta(crud.listar_locais_bbox, *caixa, limit)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erro ao buscar locais: {e}")
     try:
-        locais = crud.listar_locais()
+        locais = await _cadastro(cache_referencia.locais)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar locais: {e}")
-    if not locais:
-        raise HTTPException(status_code=404, detail="Nenhum local cadastrado.")
-    return locais
+    return _resposta_cadastro(request, locais, "Nenhum local cadastrado.")
+
+# ================================
+# ENDPOINT: LOCAIS MAIS PRÓXIMOS DE UM PONTO
+# ================================
+@app.get("/locais/proximos", response_model=List[schemas.LocalProximoResponse])
+async def endpoint_listar_locais_proximos(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    k: int = Query(10, ge=1, le=1000),
+    raio_km: Optional[float] = Query(None, gt=0, description="Distância máxima (opcional)"),
+):
+    """As k áreas mais próximas do ponto, da mais perto para a mais longe, com dist_km."""
+    try:
+        return await executar_consulta(crud.listar_locais_proximos, lat, lon, k, raio_km)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar locais próximos: {e}")
 
 
 # ================================
 # ENDPOINT: LISTAR SENSORES POR LOCAL
 # ================================
 @app.get("/sensores/{cd_area}", response_model=List[schemas.SensorResponse])
-def endpoint_listar_sensores(cd_area: int):
+async def endpoint_listar_sensores(request: Request, cd_area: int):
     try:
-        sensores = crud.listar_sensores_por_local(cd_area)
+        sensores = await _cadastro(cache_referencia.sensores, cd_area)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar sensores: {e}")
-    if not sensores:
-        raise HTTPException(status_code=404, detail="Nenhum sensor encontrado para esta área.")
-    return sensores
+    return _resposta_cadastro(request, sensores, "Nenhum sensor encontrado para esta área.")
+
+# ================================
+# ENDPOINT: LISTAR LEITURAS RECENTES DE UMA ÁREA
+# ================================
+@app.get("/locais/{cd_area}/leituras", response_model=List[schemas.LeituraAreaResponse])
+async def endpoint_listar_leituras_area(
+    cd_area: int,
+    request: Request,
+    limit: int = Query(50, ge=1, le=10000, description="Máximo de leituras por sensor"),
+    desde: Optional[datetime] = Query(None, description="Início da janela de tempo (opcional)"),
+    ate: Optional[datetime] = Query(None, description="Fim da janela de tempo (opcional)"),
+    formato: Optional[str] = Query(None, description="'colunar' para o formato compacto (opcional)")
+):
+    """
+    Leituras mais recentes de todos os sensores da área (com nm_modelo), em uma única
+    consulta. Substitui a sequência /sensores/{cd_area} + /leituras/{cd_sensor} por sensor.
+    """
+    colunar = _quer_colunar(request, formato)
+    funcao = crud.listar_leituras_por_area_colunar if colunar else crud.listar_leituras_por_area
+    try:
+        leituras = await executar_consulta(funcao, cd_area, limit, desde, ate)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar leituras da área: {e}")
+    if not (leituras["cd_leitura"] if colunar else leituras):
+        raise HTTPException(status_code=404, detail="Nenhuma leitura encontrada para esta área.")
+    return _resposta_colunar(leituras) if colunar else leituras
 
 # ================================
 # ENDPOINT: CRIAR LEITURA
 # ================================
 @app.post("/leituras/", response_model=schemas.LeituraSensorResponse)
-def endpoint_criar_leitura(leitura: schemas.LeituraSensorCreate):
+async def endpoint_criar_leitura(leitura: schemas.LeituraSensorCreate):
+    if ingestao.ATIVA:
+        return await _gravar_na_fila(fila_ingestao.gravar_leitura, leitura, "leitura")
     try:
-        nova = crud.criar_leitura(leitura)
+        nova = await executar_gravacao(crud.criar_leitura, leitura)
+    except MesArquivado as ma:
+        raise HTTPException(status_code=409, detail=str(ma))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao inserir leitura: {e}")
     return nova
 
+# ================================
+# ENDPOINT: CRIAR LEITURAS EM LOTE
+# ================================
+@app.post("/leituras/batch", response_model=schemas.LeituraLoteResponse)
+async def endpoint_criar_leituras_lote(leituras: List[schemas.LeituraSensorCreate]):
+    """
+    Recebe uma lista de leituras e grava todas em uma única transação.
+    Devolve, para cada item (na mesma ordem), o cd_leitura gerado ou o erro (por
+    exemplo, mês já arquivado). Leituras de mais meses do que cabem em uma
+    transação → 413, sem gravar nada.
+    """
+    if not leituras:
+        raise HTTPException(status_code=400, detail="Lote de leituras vazio.")
+    if len(leituras) > MAX_LOTE_LEITURAS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote excede o limite de {MAX_LOTE_LEITURAS} leituras."
+        )
+    try:
+        resultado = await executar_gravacao(crud.criar_leituras_lote, leituras)
+    except LoteExcedeMeses as lm:
+        raise HTTPException(status_code=413, detail=str(lm))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao inserir lote de leituras: {e}")
+    return resultado
+
+# ================================
+# ENDPOINT: LEITURAS AGREGADAS POR INTERVALO
+# ================================
+@app.get("/leituras/{cd_sensor}/agregado", response_model=List[schemas.LeituraAgregadaResponse])
+async def endpoint_listar_leituras_agregadas(
+    cd_sensor: int,
+    bucket: str = Query("hour", description="Intervalo de agregação: minute, hour ou day"),
+    desde: Optional[datetime] = Query(None, alias="from", description="Início da janela (opcional)"),
+    ate: Optional[datetime] = Query(None, alias="to", description="Fim da janela (opcional)"),
+    limit: int = Query(10000, ge=1, le=100000, description="Máximo de intervalos retornados")
+):
+    """
+    Min/max/média/contagem/último valor do sensor por minuto, hora ou dia, lidos das
+    tabelas de agregados (não toca as leituras brutas).
+    """
+    if bucket not in BUCKETS_AGREGADO:
+        raise HTTPException(
+            status_code=400,
+            detail=f"bucket inválido: use {', '.join(BUCKETS_AGREGADO)}."
+        )
+    try:
+        agregados = await executar_consulta(
+            crud.listar_leituras_agregadas, cd_sensor, bucket, desde, ate, limit
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar leituras agregadas: {e}")
+    if not agregados:
+        raise HTTPException(status_code=404, detail="Nenhuma leitura agregada encontrada para este sensor.")
+    return agregados
+
 # ================================
 # ENDPOINT: LISTAR LEITURAS POR SENSOR
 # ================================
 @app.get("/leituras/{cd_sensor}", response_model=List[schemas.LeituraSensorResponse])
-def endpoint_listar_leituras(cd_sensor: int, limit: int = 100):
+async def endpoint_listar_leituras(
+    cd_sensor: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=10000, description="Quantidade máxima de leituras retornadas"),
+    before: Optional[str] = Query(None, description="Cursor: leituras anteriores a esta posição"),
+    after: Optional[str] = Query(None, description="Cursor: leituras posteriores a esta posição"),
+    formato: Optional[str] = Query(None, description="'colunar' para o formato compacto (opcional)")
+):
+    """
+    Leituras do sensor, mais recentes primeiro. O cabeçalho X-Next-Cursor (e Link
+    rel="next") traz o cursor da próxima página; com 'after', a lista vem em ordem
+    cronológica e o cursor aponta para a leitura mais nova recebida.
+    """
+    antes, depois = _ler_cursores(before, after)
+    colunar = _quer_colunar(request, formato)
+    funcao = crud.listar_leituras_por_sensor_colunar if colunar else crud.listar_leituras_por_sensor
     try:
-        leituras = crud.listar_leituras_por_sensor(cd_sensor, limit)
+        leituras = await executar_consulta(funcao, cd_sensor, limit, antes, depois)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar leituras: {e}")
+
+    if colunar:
+        if not leituras["cd_leitura"]:
+            raise HTTPException(status_code=404, detail="Nenhuma leitura encontrada para este sensor.")
+        resposta = _resposta_colunar(leituras)
+        cursor = f"{leituras['dt_leitura'][-1]}:{leituras['cd_leitura'][-1]}"
+        _definir_proximo_cursor(
+            request, resposta, cursor, len(leituras["cd_leitura"]), limit, depois is not None
+        )
+        return resposta
+
     if not leituras:
         raise HTTPException(status_code=404, detail="Nenhuma leitura encontrada para este sensor.")
+    ultima = leituras[-1]
+    _definir_proximo_cursor(
+        request, response, crud.codificar_cursor(ultima.dt_leitura, ultima.cd_leitura),
+        len(leituras), limit, depois is not None
+    )
     return leituras
 
 # ================================
 # ENDPOINT: CRIAR ALERTA
 # ================================
 @app.post("/alertas/", response_model=schemas.AlertaResponse)
-def endpoint_criar_alerta(alerta: schemas.AlertaCreate):
+async def endpoint_criar_alerta(alerta: schemas.AlertaCreate):
+    if ingestao.ATIVA:
+        return await _gravar_na_fila(fila_ingestao.gravar_alerta, alerta, "alerta")
     try:
-        novo = crud.criar_alerta(alerta)
+        novo = await executar_gravacao(crud.criar_alerta, alerta)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao inserir alerta: {e}")
     return novo
@@ -100,26 +453,207 @@ def endpoint_criar_alerta(alerta: schemas.AlertaCreate):
 # ENDPOINT: LISTAR ALERTAS
 # ================================
 @app.get("/alertas/", response_model=List[schemas.AlertaResponse])
-def endpoint_listar_alertas(
+async def endpoint_listar_alertas(
+    request: Request,
+    response: Response,
     limit: int = Query(100, ge=1, description="Quantidade máxima de alertas retornados"),
     cd_area: Optional[int] = Query(
         None,
         description="Filtrar apenas alertas desta área (opcional)"
-    )
+    ),
+    before: Optional[str] = Query(None, description="Cursor: alertas anteriores a esta posição"),
+    after: Optional[str] = Query(None, description="Cursor: alertas posteriores a esta posição"),
+    formato: Optional[str] = Query(None, description="'colunar' para o formato compacto (opcional)")
 ):
     """
     Retorna os alertas mais recentes. Se 'cd_area' for informado, devolve apenas os alertas
     daquela área, até o número limite especificado.
+    Paginação por cursor igual à de /leituras/{cd_sensor} (before/after + X-Next-Cursor).
     """
+    antes, depois = _ler_cursores(before, after)
+    colunar = _quer_colunar(request, formato)
     try:
-        if cd_area is not None:
-            alertas = crud.listar_alertas_por_area(cd_area=cd_area, limit=limit)
+        if colunar:
+            alertas = await executar_consulta(
+                crud.listar_alertas_colunar, cd_area, limit, antes=antes, depois=depois
+            )
+        elif cd_area is not None:
+            alertas = await executar_consulta(
+                crud.listar_alertas_por_area, cd_area=cd_area, limit=limit, antes=antes, depois=depois
+            )
         else:
-            alertas = crud.listar_alertas(limit=limit)
+            alertas = await executar_consulta(crud.listar_alertas, limit=limit, antes=antes, depois=depois)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar alertas: {e}")
 
+    if colunar:
+        if not alertas["cd_alerta"]:
+            raise HTTPException(status_code=404, detail="Nenhum alerta encontrado.")
+        resposta = _resposta_colunar(alertas)
+        cursor = f"{alertas['dt_alerta'][-1]}:{alertas['cd_alerta'][-1]}"
+        _definir_proximo_cursor(
+            request, resposta, cursor, len(alertas["cd_alerta"]), limit, depois is not None
+        )
+        return resposta
+
     if not alertas:
         raise HTTPException(status_code=404, detail="Nenhum alerta encontrado.")
 
+    ultimo = alertas[-1]
+    _definir_proximo_cursor(
+        request, response, crud.codificar_cursor(ultimo.dt_alerta, ultimo.cd_alerta),
+        len(alertas), limit, depois is not None
+    )
     return alertas
+
+# ================================
+# ENDPOINT: MÉTRICAS DA FILA DE INGESTÃO
+# ================================
+@app.get("/ingestao/metricas")
+async def endpoint_metricas_ingestao():
+    """
+    Profundidade da fila, itens gravados/rejeitados (429), tamanho médio dos lotes e
+    latência dos commits e da espera na fila (p50/p95, em ms, dos últimos lotes).
+    """
+    return fila_ingestao.metricas()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def endpoint_metrics():
+    """
+    Métricas no formato texto do Prometheus: latência e status por rota, requisições em
+    andamento, tempo de cada função do crud (SQL x restante), tempo e linhas por comando
+    SQL, fila de ingestão e streams SSE abertos.
+    """
+    return PlainTextResponse(metricas.registro.exportar(), media_type="text/plain; version=0.0.4")
+
+# ================================
+# ENDPOINT: EVENTOS EM TEMPO REAL (Server-Sent Events)
+# ================================
+@app.get("/eventos")
+async def endpoint_eventos(
+    cd_area: Optional[int] = Query(None, description="Receber apenas eventos desta área (opcional)")
+):
+    """
+    Stream text/event-stream com as leituras e alertas gravados a partir da conexão.
+    Eventos:
+    - conectado: primeiro evento; o cliente carrega o estado atual pela API e passa a
+      aplicar os eventos seguintes (que podem repetir itens já carregados);
+    - leituras: colunar, mesmas colunas de GET /locais/{cd_area}/leituras?formato=colunar;
+    - alertas: colunar, mesmas colunas de GET /alertas/?formato=colunar;
+    - reiniciar: o cliente ficou para trás e perdeu eventos; deve recarregar o estado.
+    """
+    fila = barramento.assinar(cd_area)
+
+    async def gerar():
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(fila.get(), timeout=KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield EVENTO_KEEPALIVE
+        finally:
+            barramento.cancelar(cd_area, fila)
+
+    return StreamingResponse(
+        gerar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# ================================
+# ENDPOINTS: RISCO (porte de run_model_simulado)
+# ================================
+# backend.risco depende de NumPy; é importado apenas aqui para não pesar o startup.
+
+@app.post("/risco/batch", response_model=schemas.RiscoLoteResponse)
+async def endpoint_risco_lote(lote: schemas.RiscoLoteRequest):
+    """
+    Pontua pares (temperatura, umidade) em formato colunar: as listas 'temperatura'
+    e 'umidade' devem ter o mesmo tamanho; 'risco' vem na mesma ordem.
+    """
+    if len(lote.temperatura) != len(lote.umidade):
+        raise HTTPException(status_code=400, detail="temperatura e umidade devem ter o mesmo tamanho.")
+    if len(lote.temperatura) > MAX_LOTE_RISCO:
+        raise HTTPException(status_code=413, detail=f"Lote excede o limite de {MAX_LOTE_RISCO} pares.")
+    from . import risco
+    try:
+        valores = await executar_consulta(risco.calcular_risco_lote, lote.temperatura, lote.umidade)
+    except ValueError as ve:
+        raise HTTPException(status_code=422, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular risco: {e}")
+    return JSONResponse(content={"risco": valores})
+
+
+@app.get("/locais/{cd_area}/risco")
+async def endpoint_serie_risco_area(
+    cd_area: int,
+    bucket: str = Query("hour", description="Intervalo: minute, hour ou day"),
+    desde: Optional[datetime] = Query(None, alias="from", description="Início da janela (opcional)"),
+    ate: Optional[datetime] = Query(None, alias="to", description="Fim da janela (opcional)"),
+    limit: int = Query(10000, ge=1, le=100000, description="Máximo de intervalos retornados")
+):
+    """
+    Série de risco da área (média dos sensores de temperatura e umidade por intervalo),
+    sempre no formato colunar: {dt_bucket, vl_temperatura, vl_umidade, vl_risco}.
+    """
+    if bucket not in BUCKETS_AGREGADO:
+        raise HTTPException(
+            status_code=400,
+            detail=f"bucket inválido: use {', '.join(BUCKETS_AGREGADO)}."
+        )
+    from . import risco
+    try:
+        serie = await executar_consulta(risco.serie_risco_area, cd_area, bucket, desde, ate, limit)
+    except ValueError as ve:
+        raise HTTPException(status_code=404, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular série de risco: {e}")
+    if not serie["dt_bucket"]:
+        raise HTTPException(status_code=404, detail="Nenhuma leitura de temperatura e umidade para esta área.")
+    return _resposta_colunar(serie)
+
+# ================================
+# ENDPOINTS: EXPORTAÇÃO (CSV / NDJSON)
+# ================================
+def _resposta_export(nome: str, formato: str, colunas, lotes) -> StreamingResponse:
+    if formato not in FORMATOS_EXPORT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"formato inválido: use {', '.join(FORMATOS_EXPORT)}."
+        )
+    return StreamingResponse(
+        gerar_export(formato, colunas, lotes),
+        media_type=FORMATOS_EXPORT[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome}.{formato}"'}
+    )
+
+
+@app.get("/exportar/leituras")
+async def endpoint_exportar_leituras(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    cd_sensor: Optional[int] = Query(None, description="Filtrar por sensor (opcional)"),
+    cd_area: Optional[int] = Query(None, description="Filtrar por área (opcional)"),
+    desde: Optional[datetime] = Query(None, alias="from", description="Início da janela (opcional)"),
+    ate: Optional[datetime] = Query(None, alias="to", description="Fim da janela (opcional)")
+):
+    """
+    Exporta leituras em streaming, lidas direto do cursor do SQLite em lotes, sem
+    montar a lista inteira em memória. Ordem: sensor, data.
+    """
+    lotes = crud.iterar_leituras_export(cd_sensor, cd_area, desde, ate)
+    return _resposta_export("leituras", formato, crud.COLUNAS_EXPORT_LEITURAS, lotes)
+
+
+@app.get("/exportar/alertas")
+async def endpoint_exportar_alertas(
+    formato: str = Query("csv", description="csv ou ndjson"),
+    cd_area: Optional[int] = Query(None, description="Filtrar por área (opcional)"),
+    desde: Optional[datetime] = Query(None, alias="from", description="Início da janela (opcional)"),
+    ate: Optional[datetime] = Query(None, alias="to", description="Fim da janela (opcional)")
+):
+    """
+    Exporta alertas em streaming (ordem cronológica), sem montar a lista em memória.
+    """
+    lotes = crud.iterar_alertas_export(cd_area, desde, ate)
+    return _resposta_export("alertas", formato, crud.COLUNAS_EXPORT_ALERTAS, lotes)
@@ -0,0 +1,233 @@
+# src/backend/cache_leituras.py
+
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import particoes
+from .database import conexao
+
+# Leituras mantidas em memória por sensor (0 desliga o cache)
+CAPACIDADE = int(os.environ.get("FLOOD_SENTINEL_CACHE_LEITURAS", "256"))
+
+# (cd_leitura, cd_sensor, dt_leitura em epoch µs, vl_valor): mesma ordem das colunas
+# de LEITURA_SENSOR usada nas consultas do crud
+Linha = Tuple[int, int, int, float]
+Cursor = Tuple[int, int]
+
+
+class BufferSensor:
+    """
+    Buffer circular das leituras mais recentes de um sensor, em três arrays de tamanho
+    fixo (cd_leitura, dt_leitura, vl_valor), ordenado por (dt_leitura, cd_leitura).
+
+    'completo' indica que o buffer contém todas as leituras do sensor no banco (ainda
+    não transbordou); nesse caso ele responde qualquer consulta sem ir ao SQLite.
+    """
+
+    __slots__ = ("cd_sensor", "capacidade", "ids", "dts", "valores", "inicio", "tamanho", "completo")
+
+    def __init__(self, cd_sensor: int, capacidade: int, completo: bool):
+        self.cd_sensor = cd_sensor
+        self.capacidade = capacidade
+        self.ids = array("q", bytes(8 * capacidade))
+        self.dts = array("q", bytes(8 * capacidade))
+        self.valores = array("d", bytes(8 * capacidade))
+        self.inicio = 0      # posição da leitura mais antiga
+        self.tamanho = 0
+        self.completo = completo
+
+    def _pos(self, i: int) -> int:
+        """Posição física da i-ésima leitura, da mais antiga (0) para a mais nova."""
+        return (self.inicio + i) % self.capacidade
+
+    def _chave(self, i: int) -> Cursor:
+        p = self._pos(i)
+        return self.dts[p], self.ids[p]
+
+    def adicionar(self, cd_leitura: int, dt: int, valor: float) -> None:
+        if self.tamanho and (dt, cd_leitura) < self._chave(self.tamanho - 1):
+            self._inserir_fora_de_ordem(cd_leitura, dt, valor)
+            return
+        if self.tamanho < self.capacidade:
+            p = self._pos(self.tamanho)
+            self.tamanho += 1
+        else:
+            # Sobrescreve a mais antiga
+            p = self.inicio
+            self.inicio = (self.inicio + 1) % self.capacidade
+            self.completo = False
+        self.ids[p], self.dts[p], self.valores[p] = cd_leitura, dt, valor
+
+    def _inserir_fora_de_ordem(self, cd_leitura: int, dt: int, valor: float) -> None:
+        """Leitura mais antiga que a última do buffer (carga retroativa): caso raro, O(N)."""
+        linhas = [(*self._chave(i), self.valores[self._pos(i)]) for i in range(self.tamanho)]
+        chave = (dt, cd_leitura)
+        if self.tamanho == self.capacidade and chave < linhas[0][:2]:
+            # Mais antiga que tudo o que cabe: não entra, e o buffer deixa de ter o histórico todo
+            self.completo = False
+            return
+        linhas.insert(bisect_left(linhas, chave), (dt, cd_leitura, valor))
+        if len(linhas) > self.capacidade:
+            linhas.pop(0)
+            self.completo = False
+        self.inicio = 0
+        self.tamanho = len(linhas)
+        for p, (dt_i, id_i, valor_i) in enumerate(linhas):
+            self.ids[p], self.dts[p], self.valores[p] = id_i, dt_i, valor_i
+
+    def descartar_periodo(self, dt_inicio: int, dt_fim: int) -> None:
+        """Remove as leituras com dt_inicio <= dt < dt_fim (mês arquivado): caso raro, O(N)."""
+        linhas = [(*self._chave(i), self.valores[self._pos(i)]) for i in range(self.tamanho)]
+        manter = [linha for linha in linhas if not dt_inicio <= linha[0] < dt_fim]
+        if len(manter) == len(linhas):
+            return
+        self.inicio = 0
+        self.tamanho = len(manter)
+        for p, (dt_i, id_i, valor_i) in enumerate(manter):
+            self.ids[p], self.dts[p], self.valores[p] = id_i, dt_i, valor_i
+
+    def _linha(self, i: int) -> Linha:
+        p = self._pos(i)
+        return self.ids[p], self.cd_sensor, self.dts[p], self.valores[p]
+
+    def _primeira_maior(self, chave: Cursor) -> int:
+        """Índice lógico da primeira leitura com (dt, id) > chave (busca binária)."""
+        baixo, alto = 0, self.tamanho
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            if self._chave(meio) <= chave:
+                baixo = meio + 1
+            else:
+                alto = meio
+        return baixo
+
+    def consultar(self, limit: int, antes: Optional[Cursor], depois: Optional[Cursor]) -> Optional[List[Linha]]:
+        """
+        Mesma semântica de crud._buscar_leituras_por_sensor. Retorna None quando a
+        resposta pode depender de leituras que não estão mais no buffer.
+        """
+        if depois is not None:
+            # Tudo o que vem depois do cursor está no buffer se o cursor não for anterior
+            # à leitura mais antiga guardada
+            if not self.completo and (self.tamanho == 0 or depois < self._chave(0)):
+                return None
+            i = self._primeira_maior(depois)
+            return [self._linha(j) for j in range(i, min(self.tamanho, i + limit))]
+
+        fim = self.tamanho if antes is None else self._primeira_maior((antes[0], antes[1] - 1))
+        inicio = max(0, fim - limit)
+        if fim - inicio < limit and not self.completo:
+            return None
+        return [self._linha(j) for j in range(fim - 1, inicio - 1, -1)]
+
+
+class CacheLeituras:
+    """
+    Últimas CAPACIDADE leituras de cada sensor em memória, preenchidas no startup
+    (carregar) e atualizadas após cada commit de leituras (registrar).
+
+    Vale para um único processo escrevendo no banco: leituras gravadas por outro
+    processo não aparecem aqui. Antes de carregar(), consultar() sempre devolve None.
+    """
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._buffers: Dict[int, BufferSensor] = {}
+        self._carregado = False
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return self.capacidade > 0 and self._carregado
+
+    def carregar(self) -> None:
+        """
+        Lê as últimas leituras de cada sensor (uma busca no índice por sensor e
+        partição, da partição mais nova para a mais antiga, até encher o buffer).
+        """
+        if self.capacidade <= 0:
+            return
+        with conexao() as conn:
+            cursor = conn.cursor()
+            sensores = [row[0] for row in cursor.execute("SELECT cd_sensor FROM SENSOR").fetchall()]
+            recentes = {cd_sensor: [] for cd_sensor in sensores}
+            for tabela in particoes.tabelas(conn):
+                faltando = [s for s, linhas in recentes.items() if len(linhas) <= self.capacidade]
+                if not faltando:
+                    break
+                for cd_sensor in faltando:
+                    cursor.execute(
+                        f"""
+                        SELECT cd_leitura, dt_leitura, vl_valor
+                          FROM {tabela}
+                         WHERE cd_sensor = ?
+                         ORDER BY dt_leitura DESC, cd_leitura DESC
+                         LIMIT ?
+                        """,
+                        (cd_sensor, self.capacidade + 1 - len(recentes[cd_sensor]))
+                    )
+                    recentes[cd_sensor].extend(cursor.fetchall())
+        buffers = {}
+        for cd_sensor, linhas in recentes.items():
+            buffer = BufferSensor(cd_sensor, self.capacidade, completo=len(linhas) <= self.capacidade)
+            for cd_leitura, dt, valor in reversed(linhas[:self.capacidade]):
+                buffer.adicionar(cd_leitura, dt, valor)
+            buffers[cd_sensor] = buffer
+        with self._lock:
+            self._buffers = buffers
+            self._carregado = True
+
+    def registrar(self, linhas: Iterable[Linha]) -> None:
+        """Inclui leituras já commitadas: (cd_leitura, cd_sensor, dt_epoch, vl_valor)."""
+        if not self.ativo:
+            return
+        with self._lock:
+            for cd_leitura, cd_sensor, dt, valor in linhas:
+                buffer = self._buffers.get(cd_sensor)
+                # Sensor criado depois da carga: o banco pode ter leituras dele que não
+                # passaram por aqui, então fica sem buffer (consultas vão ao SQLite)
+                if buffer is not None:
+                    buffer.adicionar(cd_leitura, dt, valor)
+
+    def descartar_periodo(self, dt_inicio: int, dt_fim: int) -> None:
+        """
+        Chamado depois que um mês sai do SQLite (retencao.arquivar_particao): as listagens
+        do banco não mostram mais essas leituras, e o cache também não deve mostrar.
+        'completo' continua valendo: o buffer segue com tudo o que o banco lista.
+        """
+        with self._lock:
+            for buffer in self._buffers.values():
+                buffer.descartar_periodo(dt_inicio, dt_fim)
+
+    def remover_sensores(self, sensores: Iterable[int]) -> None:
+        """Sensores apagados: as leituras deles saíram das partições (particoes.expurgar_removidos)."""
+        with self._lock:
+            for cd_sensor in sensores:
+                self._buffers.pop(cd_sensor, None)
+
+    def consultar(
+        self,
+        cd_sensor: int,
+        limit: int,
+        antes: Optional[Cursor] = None,
+        depois: Optional[Cursor] = None
+    ) -> Optional[List[Linha]]:
+        """Linhas como as do banco, ou None se for preciso consultar o SQLite."""
+        if not self.ativo:
+            return None
+        with self._lock:
+            buffer = self._buffers.get(cd_sensor)
+            if buffer is None:
+                return None
+            return buffer.consultar(limit, antes, depois)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._buffers = {}
+            self._carregado = False
+
+
+cache_leituras = CacheLeituras(CAPACIDADE)
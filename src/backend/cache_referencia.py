@@ -0,0 +1,136 @@
+# src/backend/cache_referencia.py
+#
+# Cadastro de áreas (LOCAL) e sensores (SENSOR) em memória, versionado. Quase nunca
+# muda, mas é pedido a cada atualização do dashboard: aqui cada tabela vira um
+# instantâneo com os modelos pydantic, o JSON já serializado de cada resposta e a
+# versão usada no ETag/Last-Modified (GET /locais/ e GET /sensores/{cd_area}).
+#
+# criar_local/atualizar_local invalidam o instantâneo na hora. Alterações feitas fora
+# da API (sensores são cadastrados por script) incrementam VERSAO_CADASTRO via trigger
+# e são percebidas na revalidação, feita no máximo a cada REVALIDAR_S segundos.
+
+import json
+import os
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .database import conexao
+from .schemas import LocalResponse, SensorResponse
+
+# Intervalo máximo (s) entre as conferências da versão no banco; 0 confere sempre
+REVALIDAR_S = float(os.environ.get("FLOOD_SENTINEL_CACHE_CADASTRO_S", "5"))
+
+
+class Instantaneo(NamedTuple):
+    """Uma resposta de cadastro pronta: modelos, corpo JSON e validadores HTTP."""
+    itens: tuple
+    corpo: bytes
+    etag: str
+    last_modified: str
+    dt_modificacao: int   # epoch em microssegundos
+
+
+def _instantaneo(modelos: list, linhas: List[dict], versao: Tuple[int, int], chave: str) -> Instantaneo:
+    nr_versao, dt_modificacao = versao
+    return Instantaneo(
+        itens=tuple(modelos),
+        corpo=json.dumps(linhas, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+        # O instante entra no ETag para não repetir valores se o banco for recriado
+        etag=f'"{chave}-{nr_versao}-{dt_modificacao:x}"',
+        last_modified=formatdate(dt_modificacao / 1_000_000, usegmt=True),
+        dt_modificacao=dt_modificacao
+    )
+
+
+class _Tabela:
+    """Estado do cache de uma tabela de cadastro."""
+
+    __slots__ = ("versao", "dados", "conferido_em")
+
+    def __init__(self):
+        self.versao: Optional[Tuple[int, int]] = None
+        self.dados = None
+        self.conferido_em = 0.0
+
+
+class CacheReferencia:
+    def __init__(self, revalidar_s: float):
+        self.revalidar_s = revalidar_s
+        self._tabelas = {"LOCAL": _Tabela(), "SENSOR": _Tabela()}
+        self._lock = threading.Lock()
+
+    # ---------- carga ----------
+
+    @staticmethod
+    def _versao(cursor, tabela: str) -> Tuple[int, int]:
+        row = cursor.execute(
+            "SELECT nr_versao, dt_modificacao FROM VERSAO_CADASTRO WHERE nm_tabela = ?", (tabela,)
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else (0, 0)
+
+    @staticmethod
+    def _carregar_locais(cursor, versao) -> Instantaneo:
+        cursor.execute("SELECT cd_area, nm_local, tp_vulnerabilidade, lat, lon FROM LOCAL")
+        linhas = [dict(row) for row in cursor.fetchall()]
+        return _instantaneo([LocalResponse(**linha) for linha in linhas], linhas, versao, "locais")
+
+    @staticmethod
+    def _carregar_sensores(cursor, versao) -> Dict[int, Instantaneo]:
+        cursor.execute("SELECT cd_sensor, tp_sensor, nm_modelo, cd_area FROM SENSOR ORDER BY cd_area, cd_sensor")
+        por_area: Dict[int, List[dict]] = {}
+        for row in cursor.fetchall():
+            por_area.setdefault(row["cd_area"], []).append(dict(row))
+        return {
+            cd_area: _instantaneo(
+                [SensorResponse(**linha) for linha in linhas], linhas, versao, f"sensores-{cd_area}"
+            )
+            for cd_area, linhas in por_area.items()
+        }
+
+    def _obter(self, tabela: str, so_memoria: bool):
+        """
+        Dados da tabela; recarrega se foram invalidados ou se a versão no banco mudou.
+        Com 'so_memoria', devolve None em vez de ir ao banco (chamada no event loop).
+        """
+        estado = self._tabelas[tabela]
+        if estado.dados is not None and time.monotonic() - estado.conferido_em < self.revalidar_s:
+            return estado.dados
+        if so_memoria:
+            return None
+        with self._lock:
+            with conexao() as conn:
+                cursor = conn.cursor()
+                versao = self._versao(cursor, tabela)
+                if estado.dados is None or versao != estado.versao:
+                    carregar = self._carregar_locais if tabela == "LOCAL" else self._carregar_sensores
+                    estado.dados = carregar(cursor, versao)
+                    estado.versao = versao
+            estado.conferido_em = time.monotonic()
+            return estado.dados
+
+    # ---------- consulta ----------
+
+    def locais(self, so_memoria: bool = False) -> Optional[Instantaneo]:
+        return self._obter("LOCAL", so_memoria)
+
+    def sensores(self, cd_area: int, so_memoria: bool = False) -> Optional[Instantaneo]:
+        """Sensores da área (área sem sensores: instantâneo vazio com a versão atual)."""
+        por_area = self._obter("SENSOR", so_memoria)
+        if por_area is None:
+            return None
+        instantaneo = por_area.get(cd_area)
+        if instantaneo is None:
+            versao = self._tabelas["SENSOR"].versao or (0, 0)
+            instantaneo = _instantaneo([], [], versao, f"sensores-{cd_area}")
+        return instantaneo
+
+    def invalidar(self, tabela: str) -> None:
+        """Chamado após o commit de alterações feitas pela própria API."""
+        # O lock espera uma carga em andamento, que pode ter lido o estado anterior
+        with self._lock:
+            self._tabelas[tabela].dados = None
+
+
+cache_referencia = CacheReferencia(REVALIDAR_S)
@@ -1,97 +1,661 @@
 # src/backend/crud.py
 
-from typing import List
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from datetime import datetime
+import math
 import sqlite3
-import pandas as pd
-from sqlalchemy.orm import Session
-from .database import get_connection
+from .database import conexao, para_epoch, de_epoch, BUCKETS_AGREGADO
+from . import particoes, regras, retencao
+from .metricas import medir_crud
+from .cache_leituras import cache_leituras
+from .cache_referencia import cache_referencia
+from .eventos import barramento
 from .schemas import (
     LeituraSensorCreate,
     LeituraSensorResponse,
+    LeituraLoteItemResultado,
+    LeituraLoteResponse,
+    LeituraAreaResponse,
+    LeituraAgregadaResponse,
     AlertaCreate,
     AlertaResponse,
     LocalCreate,
     LocalUpdate,
     LocalResponse,
+    LocalProximoResponse,
     SensorResponse
 )
 
+# Limites usados quando a janela de tempo não é informada
+_DT_MIN = -(2 ** 62)
+_DT_MAX = 2 ** 62
+
 # ================================
-# FUNÇÃO: CRIAR LEITURA
+# PAGINAÇÃO POR CURSOR (keyset)
 # ================================
-def criar_leitura(leitura: LeituraSensorCreate) -> LeituraSensorResponse:
-    conn = get_connection()
-    cursor = conn.cursor()
+# Cursor = posição (data, id) de uma linha, serializada como "<dt_epoch>:<id>".
+# 'antes' pagina para o passado (mais recentes primeiro); 'depois' busca o que
+# chegou após o cursor (ordem cronológica). Em ambos os casos a consulta é uma
+# busca de intervalo no índice (..., dt, id), com custo igual em qualquer página.
+Cursor = Tuple[int, int]
+
+
+def codificar_cursor(dt: datetime, id_: int) -> str:
+    return f"{para_epoch(dt)}:{id_}"
+
+
+def decodificar_cursor(texto: str) -> Cursor:
     try:
+        dt, id_ = texto.split(":")
+        return int(dt), int(id_)
+    except ValueError:
+        raise ValueError(f"Cursor inválido: {texto!r}") from None
+
+
+def _clausula_cursor(col_dt: str, col_id: str, antes: Optional[Cursor], depois: Optional[Cursor]):
+    """Devolve (condição SQL, parâmetros, ORDER BY) para a página pedida."""
+    if depois is not None:
+        return f"({col_dt}, {col_id}) > (?, ?)", list(depois), f"{col_dt} ASC, {col_id} ASC"
+    if antes is not None:
+        return f"({col_dt}, {col_id}) < (?, ?)", list(antes), f"{col_dt} DESC, {col_id} DESC"
+    return "1 = 1", [], f"{col_dt} DESC, {col_id} DESC"
+
+# ================================
+# FORMATO COLUNAR
+# ================================
+# Alternativa compacta às listas de objetos: um dicionário {coluna: [valores]},
+# montado direto das linhas do cursor, sem criar modelos pydantic. As colunas dt_*
+# ficam como epoch inteiro em microssegundos (UTC), exatamente como gravadas.
+COLUNAS_LEITURA = ("cd_leitura", "cd_sensor", "dt_leitura", "vl_valor")
+COLUNAS_LEITURA_AREA = ("cd_leitura", "cd_sensor", "nm_modelo", "dt_leitura", "vl_valor")
+COLUNAS_ALERTA = (
+    "cd_alerta", "dt_alerta", "tp_nivel", "tp_origem", "ds_obs",
+    "cd_area", "cd_usuario", "nm_local", "nm_usuario"
+)
+
+# Colunas de COLUNAS_ALERTA na consulta (ALERTA a JOIN LOCAL l); o 1º parâmetro é o nm_usuario
+_COLUNAS_SELECT_ALERTA = """a.cd_alerta, a.dt_alerta, a.tp_nivel, a.tp_origem, a.ds_obs,
+                   a.cd_area, a.cd_usuario, l.nm_local, ? AS nm_usuario"""
+
+
+def _colunas(nomes, linhas: List[sqlite3.Row]) -> dict:
+    if not linhas:
+        return {nome: [] for nome in nomes}
+    return {nome: list(valores) for nome, valores in zip(nomes, zip(*linhas))}
+
+# ================================
+# AGREGADOS (minuto / hora / dia)
+# ================================
+def _atualizar_agregados(cursor: sqlite3.Cursor, leituras) -> None:
+    """
+    Incorpora as leituras recém-inseridas (tuplas cd_sensor, dt_epoch, vl_valor) em
+    LEITURA_AGREGADO, na mesma transação do INSERT. O lote é pré-agregado em memória,
+    então cada intervalo tocado custa um único upsert.
+    """
+    parciais = {}
+    for cd_sensor, dt, valor in leituras:
+        for tp_bucket, tamanho in BUCKETS_AGREGADO.items():
+            chave = (tp_bucket, cd_sensor, dt - dt % tamanho)
+            p = parciais.get(chave)
+            if p is None:
+                parciais[chave] = [valor, valor, valor, 1, dt, valor]
+                continue
+            if valor < p[0]:
+                p[0] = valor
+            if valor > p[1]:
+                p[1] = valor
+            p[2] += valor
+            p[3] += 1
+            if dt >= p[4]:
+                p[4], p[5] = dt, valor
+    if not parciais:
+        return
+    cursor.executemany(
+        """
+        INSERT INTO LEITURA_AGREGADO
+               (tp_bucket, cd_sensor, dt_bucket, vl_min, vl_max, vl_soma,
+                qt_leituras, dt_ultimo, vl_ultimo)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (tp_bucket, cd_sensor, dt_bucket) DO UPDATE SET
+               vl_min      = MIN(vl_min, excluded.vl_min),
+               vl_max      = MAX(vl_max, excluded.vl_max),
+               vl_soma     = vl_soma + excluded.vl_soma,
+               qt_leituras = qt_leituras + excluded.qt_leituras,
+               vl_ultimo   = CASE WHEN excluded.dt_ultimo >= dt_ultimo
+                                  THEN excluded.vl_ultimo ELSE vl_ultimo END,
+               dt_ultimo   = MAX(dt_ultimo, excluded.dt_ultimo)
+        """,
+        [chave + tuple(p) for chave, p in parciais.items()]
+    )
+
+# ================================
+# ALERTAS AUTOMÁTICOS (motor de regras)
+# ================================
+def _gerar_alertas_automaticos(cursor: sqlite3.Cursor, leituras, anteriores: dict) -> List[int]:
+    """
+    Avalia as leituras recém-gravadas (cd_sensor, dt_epoch, valor) no motor de regras
+    e insere os alertas disparados na mesma transação. Retorna os cd_alerta criados.
+    """
+    ids = []
+    for alerta in regras.motor().avaliar(cursor, leituras, anteriores):
         cursor.execute(
             """
-            INSERT INTO LEITURA_SENSOR (cd_sensor, dt_leitura, vl_valor)
-            VALUES (?, ?, ?)
+            INSERT INTO ALERTA (dt_alerta, tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario)
+            VALUES (?, ?, ?, ?, ?, ?)
             """,
-            (
-                leitura.cd_sensor,
-                leitura.dt_leitura.isoformat(sep=" "),
-                leitura.vl_valor
-            )
+            alerta
         )
-        conn.commit()
-        novo_id = cursor.lastrowid
+        ids.append(cursor.lastrowid)
+    return ids
+
+
+@contextmanager
+def _regras_ate_commit():
+    """
+    Envolve avaliação das regras e commit: se algo falhar antes do commit terminar,
+    o estado do motor volta ao de antes (a transação será desfeita por conexao()).
+    """
+    anteriores = {}
+    try:
+        yield anteriores
+    except BaseException:
+        regras.motor().restaurar(anteriores)
+        raise
+
+# ================================
+# EVENTOS EM TEMPO REAL (ver eventos.barramento)
+# ================================
+def _publicar_alertas(cursor: sqlite3.Cursor, ids: List[int]) -> None:
+    """Publica os alertas já commitados, com as mesmas colunas de GET /alertas/."""
+    if not ids or not barramento.ativo:
+        return
+    marcadores = ", ".join("?" for _ in ids)
+    cursor.execute(
+        f"""
+        SELECT {_COLUNAS_SELECT_ALERTA}
+          FROM ALERTA a
+          JOIN LOCAL l ON a.cd_area = l.cd_area
+         WHERE a.cd_alerta IN ({marcadores})
+         ORDER BY a.dt_alerta, a.cd_alerta
+        """,
+        ("UsuárioFixo", *ids)
+    )
+    barramento.publicar_alertas(_colunas(COLUNAS_ALERTA, cursor.fetchall()))
+
+# ================================
+# FUNÇÃO: CRIAR LEITURA
+# ================================
+@medir_crud
+def criar_leitura(leitura: LeituraSensorCreate) -> LeituraSensorResponse:
+    with conexao() as conn:
+        cursor = conn.cursor()
+        (novo_id,), novas = _inserir_leituras(cursor, [leitura])
+        if isinstance(novo_id, sqlite3.Error):
+            raise novo_id
+        with _regras_ate_commit() as anteriores:
+            alertas = _derivados_leituras(cursor, novas, anteriores)
+            conn.commit()
+        _apos_commit_leituras(cursor, novas, alertas)
         return LeituraSensorResponse(
             cd_leitura=novo_id,
             cd_sensor=leitura.cd_sensor,
             dt_leitura=leitura.dt_leitura,
             vl_valor=leitura.vl_valor
         )
-    finally:
-        conn.close()
+
+# ================================
+# FUNÇÃO: CRIAR LEITURAS EM LOTE
+# ================================
+def _expurgar_sensores_removidos(conn: sqlite3.Connection) -> None:
+    """
+    Leituras de sensores apagados (pela API ou fora dela) saem das partições e do
+    cache antes de gravar ou listar leituras por sensor. Fora de transação.
+    """
+    removidos = particoes.expurgar_removidos(conn)
+    if removidos:
+        cache_leituras.remover_sensores(removidos)
+
+
+def _inserir_leituras(cursor: sqlite3.Cursor, leituras: List[LeituraSensorCreate], parcial: bool = True):
+    """
+    INSERT de cada leitura na partição do seu mês (ver particoes), abrindo a transação
+    corrente. Uma falha em um item não descarta os demais: o SQLite desfaz apenas o
+    INSERT que falhou. Retorna, por item, o cd_leitura ou o sqlite3.Error, e as linhas
+    gravadas (cd_leitura, cd_sensor, dt, valor). Com parcial=False, um lote com meses
+    demais para uma transação levanta particoes.LoteExcedeMeses antes de gravar.
+    """
+    linhas = [(leitura.cd_sensor, para_epoch(leitura.dt_leitura), leitura.vl_valor) for leitura in leituras]
+    # ATTACH das partições só é possível antes do primeiro comando da transação
+    _expurgar_sensores_removidos(cursor.connection)
+    destinos = particoes.preparar_gravacao(cursor.connection, linhas, parcial)
+    if any(isinstance(destino, str) for destino in destinos):
+        proximo_id, destinos = particoes.abrir_gravacao(cursor, destinos)
+    resultados = []
+    novas = []
+    for linha, destino in zip(linhas, destinos):
+        if not isinstance(destino, str):
+            resultados.append(destino)
+            continue
+        cd_leitura = proximo_id
+        proximo_id += 1
+        try:
+            cursor.execute(
+                f"""
+                INSERT INTO {destino} (cd_leitura, cd_sensor, dt_leitura, vl_valor)
+                VALUES (?, ?, ?, ?)
+                """,
+                (cd_leitura, *linha)
+            )
+        except sqlite3.Error as e:
+            resultados.append(e)
+            continue
+        resultados.append(cd_leitura)
+        novas.append((cd_leitura, *linha))
+    return resultados, novas
+
+
+def _derivados_leituras(cursor: sqlite3.Cursor, novas, anteriores: dict) -> List[int]:
+    """
+    Agregados e alertas automáticos das leituras gravadas, na mesma transação. Ficam
+    no banco principal e as leituras na partição: o commit é atômico em cada banco,
+    mas não entre os dois (ver database._reconciliar_particoes).
+    """
+    gravadas = [linha[1:] for linha in novas]
+    _atualizar_agregados(cursor, gravadas)
+    return _gerar_alertas_automaticos(cursor, gravadas, anteriores)
+
+
+def _apos_commit_leituras(cursor: sqlite3.Cursor, novas, alertas: List[int]) -> None:
+    cache_leituras.registrar(novas)
+    barramento.publicar_leituras(cursor, novas)
+    _publicar_alertas(cursor, alertas)
+
+
+@medir_crud
+def criar_leituras_lote(leituras: List[LeituraSensorCreate]) -> LeituraLoteResponse:
+    """
+    Insere todas as leituras do lote em uma única transação (um único commit, atômico
+    em cada banco envolvido - ver _derivados_leituras). Uma falha em um item não
+    descarta os demais: o SQLite desfaz apenas o INSERT que falhou, e o erro é
+    devolvido na posição correspondente. Um lote com meses demais para uma transação
+    levanta particoes.LoteExcedeMeses sem gravar nada.
+    """
+    with conexao() as conn:
+        cursor = conn.cursor()
+        ids, novas = _inserir_leituras(cursor, leituras, parcial=False)
+        with _regras_ate_commit() as anteriores:
+            alertas = _derivados_leituras(cursor, novas, anteriores)
+            conn.commit()
+        _apos_commit_leituras(cursor, novas, alertas)
+        resultados = [
+            LeituraLoteItemResultado(indice=indice, erro=str(id_))
+            if isinstance(id_, sqlite3.Error)
+            else LeituraLoteItemResultado(indice=indice, cd_leitura=id_)
+            for indice, id_ in enumerate(ids)
+        ]
+        inseridas = len(novas)
+        return LeituraLoteResponse(
+            inseridas=inseridas,
+            rejeitadas=len(leituras) - inseridas,
+            resultados=resultados
+        )
+
+# ================================
+# FUNÇÃO: GRAVAR LOTE DA FILA DE INGESTÃO (ver ingestao.py)
+# ================================
+@medir_crud
+def gravar_lote_ingestao(leituras: List[LeituraSensorCreate], alertas: List[AlertaCreate]):
+    """
+    Grava leituras e alertas acumulados pela fila de ingestão em uma única transação
+    (group commit). Retorna (respostas das leituras, respostas dos alertas), na ordem
+    recebida; um item rejeitado pelo SQLite aparece como o sqlite3.Error correspondente.
+    """
+    with conexao() as conn:
+        cursor = conn.cursor()
+        ids_leituras, novas = _inserir_leituras(cursor, leituras)
+        with _regras_ate_commit() as anteriores:
+            automaticos = _derivados_leituras(cursor, novas, anteriores)
+            ids_alertas = []
+            for alerta in alertas:
+                try:
+                    cursor.execute(
+                        """
+                        INSERT INTO ALERTA (dt_alerta, tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            para_epoch(alerta.dt_alerta),
+                            alerta.tp_nivel,
+                            alerta.tp_origem,
+                            alerta.ds_obs,
+                            alerta.cd_area,
+                            alerta.cd_usuario
+                        )
+                    )
+                except sqlite3.Error as e:
+                    ids_alertas.append(e)
+                    continue
+                ids_alertas.append(cursor.lastrowid)
+            conn.commit()
+
+        manuais = [id_ for id_ in ids_alertas if not isinstance(id_, sqlite3.Error)]
+        _apos_commit_leituras(cursor, novas, automaticos + manuais)
+        locais = {}
+        if manuais:
+            areas = sorted({alerta.cd_area for alerta in alertas})
+            cursor.execute(
+                f"SELECT cd_area, nm_local FROM LOCAL WHERE cd_area IN ({', '.join('?' for _ in areas)})",
+                areas
+            )
+            locais = dict(cursor.fetchall())
+
+    respostas_leituras = [
+        id_ if isinstance(id_, sqlite3.Error) else LeituraSensorResponse(
+            cd_leitura=id_,
+            cd_sensor=leitura.cd_sensor,
+            dt_leitura=leitura.dt_leitura,
+            vl_valor=leitura.vl_valor
+        )
+        for id_, leitura in zip(ids_leituras, leituras)
+    ]
+    respostas_alertas = [
+        id_ if isinstance(id_, sqlite3.Error) else AlertaResponse(
+            cd_alerta=id_,
+            dt_alerta=alerta.dt_alerta,
+            tp_nivel=alerta.tp_nivel,
+            tp_origem=alerta.tp_origem,
+            ds_obs=alerta.ds_obs,
+            cd_area=alerta.cd_area,
+            cd_usuario=alerta.cd_usuario,
+            nm_local=locais[alerta.cd_area],
+            nm_usuario="UsuárioFixo"
+        )
+        for id_, alerta in zip(ids_alertas, alertas)
+    ]
+    return respostas_leituras, respostas_alertas
 
 # ================================
 # FUNÇÃO: LISTAR LEITURAS POR SENSOR
 # ================================
-def listar_leituras_por_sensor(cd_sensor: int, limit: int = 100) -> list[LeituraSensorResponse]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+def _buscar_leituras_por_sensor(
+    cd_sensor: int,
+    limit: int,
+    antes: Optional[Cursor],
+    depois: Optional[Cursor]
+):
+    """
+    Linhas (cd_leitura, cd_sensor, dt_leitura, vl_valor) da página pedida. Responde da
+    memória (cache_leituras) quando as últimas leituras do sensor bastam; senão, do banco,
+    percorrendo as partições a partir do cursor até completar a página.
+    """
+    with conexao() as conn:
+        _expurgar_sensores_removidos(conn)
+        linhas = cache_leituras.consultar(cd_sensor, limit, antes, depois)
+        if linhas is not None:
+            return linhas
+        condicao, params, ordem = _clausula_cursor("dt_leitura", "cd_leitura", antes, depois)
+        dt_min = depois[0] if depois is not None else _DT_MIN
+        dt_max = antes[0] if antes is not None else _DT_MAX
+        linhas = []
+        cursor = conn.cursor()
+        for tabela in particoes.tabelas(conn, dt_min, dt_max, decrescente=depois is None):
+            cursor.execute(
+                f"""
+                SELECT cd_leitura, cd_sensor, dt_leitura, vl_valor
+                  FROM {tabela}
+                 WHERE cd_sensor = ?
+                   AND {condicao}
+                 ORDER BY {ordem}
+                 LIMIT ?
+                """,
+                (cd_sensor, *params, limit - len(linhas))
+            )
+            linhas.extend(cursor.fetchall())
+            if len(linhas) >= limit:
+                break
+    return linhas
+
+
+@medir_crud
+def listar_leituras_por_sensor(
+    cd_sensor: int,
+    limit: int = 100,
+    antes: Optional[Cursor] = None,
+    depois: Optional[Cursor] = None
+) -> list[LeituraSensorResponse]:
+    """
+    Retorna as 'limit' leituras mais recentes do sensor, da mais nova para a mais antiga.
+    Com 'antes', continua a partir do cursor em direção ao passado; com 'depois',
+    devolve as leituras posteriores ao cursor em ordem cronológica.
+    """
+    return [
+        LeituraSensorResponse(
+            cd_leitura=int(cd_leitura),
+            cd_sensor=int(cd_sensor_),
+            dt_leitura=de_epoch(dt),
+            vl_valor=float(valor)
+        )
+        for cd_leitura, cd_sensor_, dt, valor in _buscar_leituras_por_sensor(cd_sensor, limit, antes, depois)
+    ]
+
+
+@medir_crud
+def listar_leituras_por_sensor_colunar(
+    cd_sensor: int,
+    limit: int = 100,
+    antes: Optional[Cursor] = None,
+    depois: Optional[Cursor] = None
+) -> dict:
+    """
+    Mesmo resultado de listar_leituras_por_sensor em formato colunar (ver _colunas),
+    montado direto das linhas do cursor.
+    """
+    return _colunas(
+        COLUNAS_LEITURA, _buscar_leituras_por_sensor(cd_sensor, limit, antes, depois)
+    )
+
+# ================================
+# FUNÇÃO: LISTAR LEITURAS AGREGADAS
+# ================================
+@medir_crud
+def listar_leituras_agregadas(
+    cd_sensor: int,
+    tp_bucket: str,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    limit: int = 10000
+) -> List[LeituraAgregadaResponse]:
+    """
+    Retorna os agregados (min/max/média/contagem/último) do sensor por intervalo
+    'tp_bucket' ('minute', 'hour' ou 'day'), em ordem cronológica. Lê apenas
+    LEITURA_AGREGADO, nunca a tabela de leituras brutas.
+    """
+    tamanho = BUCKETS_AGREGADO[tp_bucket]
+    dt_desde = para_epoch(desde) if desde is not None else _DT_MIN
+    dt_desde -= dt_desde % tamanho  # inclui o intervalo que contém 'desde'
+    dt_ate = para_epoch(ate) if ate is not None else _DT_MAX
+    with conexao() as conn:
+        cursor = conn.cursor()
         cursor.execute(
             """
-            SELECT cd_leitura, cd_sensor, dt_leitura, vl_valor
-              FROM LEITURA_SENSOR
-             WHERE cd_sensor = ?
-             ORDER BY datetime(dt_leitura) ASC
+            SELECT dt_bucket, vl_min, vl_max, vl_soma, qt_leituras, vl_ultimo
+              FROM LEITURA_AGREGADO
+             WHERE tp_bucket = ?
+               AND cd_sensor = ?
+               AND dt_bucket BETWEEN ? AND ?
+             ORDER BY dt_bucket
              LIMIT ?
             """,
-            (cd_sensor, limit)
+            (tp_bucket, cd_sensor, dt_desde, dt_ate, limit)
         )
-        linhas = cursor.fetchall()
-        resultado = []
-        for row in linhas:
-            dt = row["dt_leitura"]
-            resultado.append(
-                LeituraSensorResponse(
-                    cd_leitura=int(row["cd_leitura"]),
-                    cd_sensor=int(row["cd_sensor"]),
-                    dt_leitura=pd.to_datetime(dt) if dt is not None else None,
-                    vl_valor=float(row["vl_valor"])
+        return [
+            LeituraAgregadaResponse(
+                cd_sensor=cd_sensor,
+                tp_bucket=tp_bucket,
+                dt_bucket=de_epoch(row["dt_bucket"]),
+                vl_min=row["vl_min"],
+                vl_max=row["vl_max"],
+                vl_media=row["vl_soma"] / row["qt_leituras"],
+                qt_leituras=row["qt_leituras"],
+                vl_ultimo=row["vl_ultimo"]
+            )
+            for row in cursor.fetchall()
+        ]
+
+# ================================
+# FUNÇÃO: LISTAR LEITURAS POR ÁREA
+# ================================
+def _leituras_area_em_memoria(cd_area: int, limit_por_sensor: int):
+    """Mesmas linhas de _buscar_leituras_por_area sem janela, lidas do cache_leituras."""
+    with conexao() as conn:
+        sensores = conn.execute(
+            "SELECT cd_sensor, nm_modelo FROM SENSOR WHERE cd_area = ? ORDER BY cd_sensor",
+            (cd_area,)
+        ).fetchall()
+    linhas = []
+    for cd_sensor, nm_modelo in sensores:
+        recentes = cache_leituras.consultar(cd_sensor, limit_por_sensor)
+        if recentes is None:
+            return None
+        linhas.extend(
+            (cd_leitura, cd_sensor, nm_modelo, dt, valor)
+            for cd_leitura, _, dt, valor in recentes
+        )
+    return linhas
+
+
+def _buscar_leituras_por_area(
+    cd_area: int,
+    limit_por_sensor: int,
+    desde: Optional[datetime],
+    ate: Optional[datetime]
+):
+    """
+    Retorna, com uma consulta por partição mensal, as 'limit_por_sensor' leituras mais
+    recentes de cada sensor da área dentro da janela [desde, ate], já com o nm_modelo
+    do sensor. As partições são lidas da mais nova para a mais antiga e a busca para
+    quando todos os sensores estão completos (normalmente só o mês corrente).
+
+    Em cada partição, a data da N-ésima leitura mais recente é obtida direto do índice
+    (cd_sensor, dt_leitura); a busca das leituras fica restrita a esse intervalo, então
+    o custo não depende do tamanho do histórico. Sem janela, usa o cache_leituras
+    quando ele tem leituras suficientes de todos os sensores da área.
+    """
+    if desde is None and ate is None and cache_leituras.ativo:
+        linhas = _leituras_area_em_memoria(cd_area, limit_por_sensor)
+        if linhas is not None:
+            return linhas
+    dt_desde = para_epoch(desde) if desde is not None else _DT_MIN
+    dt_ate = para_epoch(ate) if ate is not None else _DT_MAX
+    por_sensor = {}
+    with conexao() as conn:
+        cursor = conn.cursor()
+        qt_sensores = cursor.execute(
+            "SELECT COUNT(*) FROM SENSOR WHERE cd_area = ?", (cd_area,)
+        ).fetchone()[0]
+        # Partições da mais nova para a mais antiga: cada uma completa os sensores que
+        # ainda não têm 'limit_por_sensor' leituras
+        for tabela in particoes.tabelas(conn, dt_desde, dt_ate):
+            cursor.execute(
+                f"""
+                WITH corte AS (
+                    SELECT s.cd_sensor,
+                           s.nm_modelo,
+                           MAX(
+                               COALESCE(
+                                   (SELECT x.dt_leitura
+                                      FROM {tabela} x
+                                     WHERE x.cd_sensor = s.cd_sensor
+                                       AND x.dt_leitura <= :ate
+                                     ORDER BY x.dt_leitura DESC
+                                     LIMIT 1 OFFSET :limite - 1),
+                                   :desde
+                               ),
+                               :desde
+                           ) AS dt_min
+                      FROM SENSOR s
+                     WHERE s.cd_area = :cd_area
                 )
+                SELECT cd_leitura, cd_sensor, nm_modelo, dt_leitura, vl_valor
+                  FROM (
+                        SELECT l.cd_leitura,
+                               l.cd_sensor,
+                               c.nm_modelo,
+                               l.dt_leitura,
+                               l.vl_valor,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY l.cd_sensor
+                                   ORDER BY l.dt_leitura DESC, l.cd_leitura DESC
+                               ) AS rn
+                          FROM corte c
+                          JOIN {tabela} l
+                            ON l.cd_sensor = c.cd_sensor
+                           AND l.dt_leitura >= c.dt_min
+                           AND l.dt_leitura <= :ate
+                       )
+                 WHERE rn <= :limite
+                 ORDER BY cd_sensor, dt_leitura DESC, cd_leitura DESC
+                """,
+                {"cd_area": cd_area, "limite": limit_por_sensor, "desde": dt_desde, "ate": dt_ate}
             )
-        return resultado
-    finally:
-        conn.close()
+            for linha in cursor.fetchall():
+                serie = por_sensor.setdefault(linha[1], [])
+                if len(serie) < limit_por_sensor:
+                    serie.append(linha)
+            completos = sum(len(serie) >= limit_por_sensor for serie in por_sensor.values())
+            if completos >= qt_sensores:
+                break
+    return [linha for cd_sensor in sorted(por_sensor) for linha in por_sensor[cd_sensor]]
+
+
+@medir_crud
+def listar_leituras_por_area(
+    cd_area: int,
+    limit_por_sensor: int = 50,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> List[LeituraAreaResponse]:
+    """Leituras recentes de todos os sensores da área (ver _buscar_leituras_por_area)."""
+    return [
+        LeituraAreaResponse(
+            cd_leitura=int(cd_leitura),
+            cd_sensor=int(cd_sensor),
+            nm_modelo=nm_modelo,
+            dt_leitura=de_epoch(dt),
+            vl_valor=float(valor)
+        )
+        for cd_leitura, cd_sensor, nm_modelo, dt, valor
+        in _buscar_leituras_por_area(cd_area, limit_por_sensor, desde, ate)
+    ]
+
+
+@medir_crud
+def listar_leituras_por_area_colunar(
+    cd_area: int,
+    limit_por_sensor: int = 50,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> dict:
+    """Mesmo resultado de listar_leituras_por_area em formato colunar."""
+    return _colunas(
+        COLUNAS_LEITURA_AREA, _buscar_leituras_por_area(cd_area, limit_por_sensor, desde, ate)
+    )
 
 # ================================
 # FUNÇÃO: CRIAR ALERTA
 # ================================
+@medir_crud
 def criar_alerta(alerta: AlertaCreate) -> AlertaResponse:
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+    with conexao() as conn:
+        cursor = conn.cursor()
         cursor.execute(
             """
             INSERT INTO ALERTA (dt_alerta, tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario)
             VALUES (?, ?, ?, ?, ?, ?)
             """,
             (
-                alerta.dt_alerta.isoformat(sep=" "),
+                para_epoch(alerta.dt_alerta),
                 alerta.tp_nivel,
                 alerta.tp_origem,
                 alerta.ds_obs,
@@ -101,6 +665,7 @@ def criar_alerta(alerta: AlertaCreate) -> AlertaResponse:
         )
         conn.commit()
         novo_id = cursor.lastrowid
+        _publicar_alertas(cursor, [novo_id])
 
         # Busca o nome do local e define nm_usuario fixo
         cursor.execute(
@@ -127,113 +692,95 @@ def criar_alerta(alerta: AlertaCreate) -> AlertaResponse:
             nm_local=nm_local,
             nm_usuario=nm_usuario
         )
-    finally:
-        conn.close()
 
 # ================================
 # FUNÇÃO: LISTAR ALERTAS
 # ================================
-def listar_alertas(limit: int) -> List[AlertaResponse]:
-    """
-    Retorna até 'limit' alertas mais recentes de todas as áreas.
-    """
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+def _buscar_alertas(
+    cd_area: Optional[int],
+    limit: int,
+    antes: Optional[Cursor],
+    depois: Optional[Cursor]
+) -> List[sqlite3.Row]:
+    condicao, params, ordem = _clausula_cursor("a.dt_alerta", "a.cd_alerta", antes, depois)
+    filtro_area, params_area = ("a.cd_area = ?", [cd_area]) if cd_area is not None else ("1 = 1", [])
+    with conexao() as conn:
+        cursor = conn.cursor()
         cursor.execute(
-            """
-            SELECT a.cd_alerta,
-                   a.dt_alerta,
-                   a.tp_nivel,
-                   a.tp_origem,
-                   a.ds_obs,
-                   a.cd_area,
-                   a.cd_usuario,
-                   l.nm_local,
-                   ? AS nm_usuario
+            f"""
+            SELECT {_COLUNAS_SELECT_ALERTA}
               FROM ALERTA a
               JOIN LOCAL l ON a.cd_area = l.cd_area
-             ORDER BY datetime(a.dt_alerta) DESC
+             WHERE {filtro_area}
+               AND {condicao}
+             ORDER BY {ordem}
              LIMIT ?
             """,
-            ("UsuárioFixo", limit)
+            ("UsuárioFixo", *params_area, *params, limit)
         )
-        linhas = cursor.fetchall()
-        resultado = []
-        for row in linhas:
-            dt = row["dt_alerta"]
-            resultado.append(
-                AlertaResponse(
-                    cd_alerta=int(row["cd_alerta"]),
-                    dt_alerta=pd.to_datetime(dt) if dt is not None else None,
-                    tp_nivel=row["tp_nivel"],
-                    tp_origem=row["tp_origem"],
-                    ds_obs=row["ds_obs"],
-                    cd_area=int(row["cd_area"]),
-                    cd_usuario=int(row["cd_usuario"]),
-                    nm_local=row["nm_local"],
-                    nm_usuario=row["nm_usuario"]
-                )
-            )
-        return resultado
-    finally:
-        conn.close()
+        return cursor.fetchall()
+
+
+def _alertas_response(linhas: List[sqlite3.Row]) -> List[AlertaResponse]:
+    return [
+        AlertaResponse(
+            cd_alerta=int(row["cd_alerta"]),
+            dt_alerta=de_epoch(row["dt_alerta"]),
+            tp_nivel=row["tp_nivel"],
+            tp_origem=row["tp_origem"],
+            ds_obs=row["ds_obs"],
+            cd_area=int(row["cd_area"]),
+            cd_usuario=int(row["cd_usuario"]),
+            nm_local=row["nm_local"],
+            nm_usuario=row["nm_usuario"]
+        )
+        for row in linhas
+    ]
 
 
-def listar_alertas_por_area(cd_area: int, limit: int) -> List[AlertaResponse]:
+@medir_crud
+def listar_alertas(
+    limit: int,
+    antes: Optional[Cursor] = None,
+    depois: Optional[Cursor] = None
+) -> List[AlertaResponse]:
+    """
+    Retorna até 'limit' alertas mais recentes de todas as áreas.
+    'antes'/'depois' seguem a mesma paginação por cursor de listar_leituras_por_sensor.
+    """
+    return _alertas_response(_buscar_alertas(None, limit, antes, depois))
+
+
+@medir_crud
+def listar_alertas_por_area(
+    cd_area: int,
+    limit: int,
+    antes: Optional[Cursor] = None,
+    depois: Optional[Cursor] = None
+) -> List[AlertaResponse]:
     """
     Retorna até 'limit' alertas mais recentes apenas da área 'cd_area'.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            """
-            SELECT a.cd_alerta,
-                   a.dt_alerta,
-                   a.tp_nivel,
-                   a.tp_origem,
-                   a.ds_obs,
-                   a.cd_area,
-                   a.cd_usuario,
-                   l.nm_local,
-                   ? AS nm_usuario
-              FROM ALERTA a
-              JOIN LOCAL l ON a.cd_area = l.cd_area
-             WHERE a.cd_area = ?
-             ORDER BY datetime(a.dt_alerta) DESC
-             LIMIT ?
-            """,
-            ("UsuárioFixo", cd_area, limit)
-        )
-        linhas = cursor.fetchall()
-        resultado = []
-        for row in linhas:
-            dt = row["dt_alerta"]
-            resultado.append(
-                AlertaResponse(
-                    cd_alerta=int(row["cd_alerta"]),
-                    dt_alerta=pd.to_datetime(dt) if dt is not None else None,
-                    tp_nivel=row["tp_nivel"],
-                    tp_origem=row["tp_origem"],
-                    ds_obs=row["ds_obs"],
-                    cd_area=int(row["cd_area"]),
-                    cd_usuario=int(row["cd_usuario"]),
-                    nm_local=row["nm_local"],
-                    nm_usuario=row["nm_usuario"]
-                )
-            )
-        return resultado
-    finally:
-        conn.close()
+    return _alertas_response(_buscar_alertas(cd_area, limit, antes, depois))
+
+
+@medir_crud
+def listar_alertas_colunar(
+    cd_area: Optional[int],
+    limit: int,
+    antes: Optional[Cursor] = None,
+    depois: Optional[Cursor] = None
+) -> dict:
+    """Alertas (de todas as áreas ou de 'cd_area') em formato colunar."""
+    return _colunas(COLUNAS_ALERTA, _buscar_alertas(cd_area, limit, antes, depois))
 
 # ================================
 # FUNÇÃO: CRIAR ÁREA
 # ================================
+@medir_crud
 def criar_local(local: LocalCreate) -> LocalResponse:
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+    with conexao() as conn:
+        cursor = conn.cursor()
         cursor.execute(
             """
             INSERT INTO LOCAL (nm_local, tp_vulnerabilidade, lat, lon)
@@ -247,6 +794,7 @@ def criar_local(local: LocalCreate) -> LocalResponse:
             )
         )
         conn.commit()
+        cache_referencia.invalidar("LOCAL")
         novo_id = cursor.lastrowid
         return LocalResponse(
             cd_area=novo_id,
@@ -255,16 +803,14 @@ def criar_local(local: LocalCreate) -> LocalResponse:
             lat=local.lat,
             lon=local.lon
         )
-    finally:
-        conn.close()
 
 # ================================
 # FUNÇÃO: ATUALIZAR ÁREA
 # ================================
+@medir_crud
 def atualizar_local(cd_area: int, local: LocalUpdate) -> LocalResponse:
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
+    with conexao() as conn:
+        cursor = conn.cursor()
         # Montar dinamicamente SET apenas com campos não nulos
         campos = []
         valores = []
@@ -305,6 +851,7 @@ def atualizar_local(cd_area: int, local: LocalUpdate) -> LocalResponse:
         if cursor.rowcount == 0:
             raise ValueError(f"Área com cd_area={cd_area} não encontrada.")
         conn.commit()
+        cache_referencia.invalidar("LOCAL")
 
         # Busca a área atualizada
         cursor.execute(
@@ -321,55 +868,246 @@ def atualizar_local(cd_area: int, local: LocalUpdate) -> LocalResponse:
             lat=row["lat"],
             lon=row["lon"]
         )
-    finally:
-        conn.close()
 
 # ================================
 # FUNÇÃO: LISTAR LOCAIS
 # ================================
+@medir_crud
 def listar_locais() -> list[LocalResponse]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute("SELECT cd_area, nm_local, tp_vulnerabilidade, lat, lon FROM LOCAL")
-        linhas = cursor.fetchall()
-        resultado = []
-        for row in linhas:
-            resultado.append(
-                LocalResponse(
-                    cd_area=int(row["cd_area"]),
-                    nm_local=row["nm_local"],
-                    tp_vulnerabilidade=row["tp_vulnerabilidade"],
-                    lat=row["lat"],
-                    lon=row["lon"]
-                )
-            )
-        return resultado
-    finally:
-        conn.close()
+    # Cadastro em memória, versionado (ver cache_referencia)
+    return list(cache_referencia.locais().itens)
 
 # ================================
 # FUNÇÃO: LISTAR SENSORES POR LOCAL
 # ================================
+@medir_crud
 def listar_sensores_por_local(cd_area: int) -> list[SensorResponse]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            "SELECT cd_sensor, tp_sensor, nm_modelo, cd_area FROM SENSOR WHERE cd_area = ?",
-            (cd_area,)
+    return list(cache_referencia.sensores(cd_area).itens)
+
+# ================================
+# CONSULTAS ESPACIAIS DE LOCAL (R-tree LOCAL_RTREE)
+# ================================
+RAIO_TERRA_KM = 6371.0088
+# Meia volta na Terra: nenhum ponto fica mais longe que isso
+MEIA_VOLTA_KM = math.pi * RAIO_TERRA_KM
+# Raio da primeira busca de listar_locais_proximos; multiplicado por 4 até achar k áreas
+RAIO_INICIAL_KM = 10.0
+
+_SQL_LOCAIS_NA_CAIXA = """
+    SELECT l.cd_area, l.nm_local, l.tp_vulnerabilidade, l.lat, l.lon
+      FROM LOCAL_RTREE r
+      JOIN LOCAL l ON l.cd_area = r.cd_area
+     WHERE r.max_lat >= ? AND r.min_lat <= ?
+       AND r.max_lon >= ? AND r.min_lon <= ?
+       AND l.lat BETWEEN ? AND ?
+       AND l.lon BETWEEN ? AND ?
+"""
+
+
+def _local_response(row, modelo=LocalResponse, **extra):
+    return modelo(
+        cd_area=row["cd_area"],
+        nm_local=row["nm_local"],
+        tp_vulnerabilidade=row["tp_vulnerabilidade"],
+        lat=row["lat"],
+        lon=row["lon"],
+        **extra
+    )
+
+
+def _distancia_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância de círculo máximo (haversine)."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * RAIO_TERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _caixa_do_circulo(lat: float, lon: float, raio_km: float) -> Tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) que contém todo o círculo de 'raio_km' em
+    volta do ponto. Se o círculo alcança um polo, cobre todas as longitudes.
+    Círculos que cruzam o antimeridiano usam todas as longitudes.
+    """
+    delta = raio_km / RAIO_TERRA_KM
+    phi = math.radians(lat)
+    min_phi, max_phi = phi - delta, phi + delta
+    if min_phi <= -math.pi / 2 or max_phi >= math.pi / 2:
+        return max(-90.0, math.degrees(min_phi)), min(90.0, math.degrees(max_phi)), -180.0, 180.0
+    dlon = math.degrees(math.asin(math.sin(delta) / math.cos(phi)))
+    if lon - dlon < -180.0 or lon + dlon > 180.0:
+        return math.degrees(min_phi), math.degrees(max_phi), -180.0, 180.0
+    return math.degrees(min_phi), math.degrees(max_phi), lon - dlon, lon + dlon
+
+
+def _locais_na_caixa(cursor: sqlite3.Cursor, min_lat: float, max_lat: float,
+                     min_lon: float, max_lon: float, sufixo: str = "", extra: tuple = ()):
+    cursor.execute(
+        _SQL_LOCAIS_NA_CAIXA + sufixo,
+        (min_lat, max_lat, min_lon, max_lon, min_lat, max_lat, min_lon, max_lon, *extra)
+    )
+    return cursor.fetchall()
+
+
+@medir_crud
+def listar_locais_bbox(min_lon: float, min_lat: float, max_lon: float, max_lat: float,
+                       limit: int) -> list[LocalResponse]:
+    """Áreas dentro do retângulo (bordas incluídas), por cd_area; áreas sem lat/lon ficam de fora."""
+    with conexao() as conn:
+        linhas = _locais_na_caixa(
+            conn.cursor(), min_lat, max_lat, min_lon, max_lon, " ORDER BY l.cd_area LIMIT ?", (limit,)
         )
-        linhas = cursor.fetchall()
-        resultado = []
-        for row in linhas:
-            resultado.append(
-                SensorResponse(
-                    cd_sensor=int(row["cd_sensor"]),
-                    tp_sensor=row["tp_sensor"],
-                    nm_modelo=row["nm_modelo"],
-                    cd_area=int(row["cd_area"])
-                )
+        return [_local_response(row) for row in linhas]
+
+
+@medir_crud
+def listar_locais_proximos(lat: float, lon: float, k: int,
+                           raio_km: Optional[float] = None) -> list[LocalProximoResponse]:
+    """
+    As k áreas mais próximas do ponto (opcionalmente só até 'raio_km'), da mais perto
+    para a mais longe. O R-tree não faz busca por vizinhos diretamente: consulta a
+    caixa que contém um círculo em volta do ponto e, se o círculo tiver menos de k
+    áreas, repete com raio 4 vezes maior (ou até a k-ésima área achada nos cantos da
+    caixa). Toda área dentro do círculo está na caixa, então o resultado é exato. O
+    custo depende das áreas por perto, não do total.
+    """
+    limite = MEIA_VOLTA_KM if raio_km is None else min(raio_km, MEIA_VOLTA_KM)
+    raio = min(RAIO_INICIAL_KM, limite)
+    with conexao() as conn:
+        cursor = conn.cursor()
+        while True:
+            candidatos = [
+                (_distancia_km(lat, lon, row["lat"], row["lon"]), row["cd_area"], row)
+                for row in _locais_na_caixa(cursor, *_caixa_do_circulo(lat, lon, raio))
+            ]
+            no_circulo = sorted((c for c in candidatos if c[0] <= raio), key=lambda c: c[:2])
+            if len(no_circulo) >= k or raio >= limite:
+                break
+            if len(candidatos) >= k:
+                # Os cantos da caixa já têm k áreas: o círculo até a k-ésima as contém
+                raio = min(sorted(c[0] for c in candidatos)[k - 1], limite)
+            else:
+                raio = min(raio * 4, limite)
+    return [_local_response(row, LocalProximoResponse, dist_km=dist) for dist, _, row in no_circulo[:k]]
+
+# ================================
+# EXPORTAÇÃO (streaming)
+# ================================
+# Linhas lidas do cursor por vez durante a exportação
+EXPORT_LOTE = 1000
+
+COLUNAS_EXPORT_LEITURAS = ("cd_leitura", "cd_sensor", "cd_area", "dt_leitura", "vl_valor")
+COLUNAS_EXPORT_ALERTAS = (
+    "cd_alerta", "dt_alerta", "tp_nivel", "tp_origem", "ds_obs", "cd_area", "cd_usuario"
+)
+
+
+def _filtros_sql(filtros) -> Tuple[str, list]:
+    clausulas = [sql for sql, valor in filtros if valor is not None]
+    valores = [valor for _, valor in filtros if valor is not None]
+    return (" AND ".join(clausulas) or "1 = 1"), valores
+
+
+def _leituras_da_particao(
+    cursor: sqlite3.Cursor,
+    part: particoes.Particao,
+    cd_sensor: int,
+    dt_min: int,
+    dt_max: int
+) -> Iterator[tuple]:
+    """(cd_leitura, dt_epoch, vl_valor) do sensor na partição, em ordem cronológica."""
+    if part.em_sqlite:
+        try:
+            tabela = particoes.anexar(cursor.connection, part)
+        except particoes.ParticaoIndisponivel:
+            # Arquivada depois da leitura do catálogo: o Parquet já está completo
+            part = part._replace(tp_armazenamento=particoes.PARQUET)
+        else:
+            cursor.execute(
+                f"""
+                SELECT cd_leitura, dt_leitura, vl_valor
+                  FROM {tabela}
+                 WHERE cd_sensor = ?
+                   AND dt_leitura >= ?
+                   AND dt_leitura <= ?
+                 ORDER BY dt_leitura, cd_leitura
+                """,
+                (cd_sensor, dt_min, dt_max)
             )
-        return resultado
-    finally:
-        conn.close()
+            while True:
+                linhas = cursor.fetchmany(EXPORT_LOTE)
+                if not linhas:
+                    return
+                yield from linhas
+    yield from retencao.ler_leituras(part, cd_sensor, dt_min, dt_max, EXPORT_LOTE)
+
+
+@medir_crud
+def iterar_leituras_export(
+    cd_sensor: Optional[int] = None,
+    cd_area: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> Iterator[List[tuple]]:
+    """
+    Percorre as leituras filtradas em lotes de EXPORT_LOTE tuplas (na ordem de
+    COLUNAS_EXPORT_LEITURAS), ordenadas por sensor e data. Para cada sensor, lê as
+    partições do período em ordem cronológica: as em SQLite pelo índice
+    (cd_sensor, dt_leitura) e as já arquivadas direto do Parquet (ver retencao). Não
+    há ordenação em memória e o consumo de memória independe do número de linhas.
+    A conexão volta ao pool quando o gerador termina ou é fechado.
+    """
+    dt_min = para_epoch(desde) if desde is not None else _DT_MIN
+    dt_max = para_epoch(ate) if ate is not None else _DT_MAX
+    where, valores = _filtros_sql([
+        ("cd_sensor = ?", cd_sensor),
+        ("cd_area = ?", cd_area),
+    ])
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT cd_sensor, cd_area FROM SENSOR WHERE {where} ORDER BY cd_sensor", valores)
+        sensores = cursor.fetchall()
+        periodo = particoes.catalogo(conn, dt_min, dt_max, decrescente=False)
+        lote = []
+        for cd_sensor_, cd_area_ in sensores:
+            for part in periodo:
+                for cd_leitura, dt, valor in _leituras_da_particao(cursor, part, cd_sensor_, dt_min, dt_max):
+                    lote.append((cd_leitura, cd_sensor_, cd_area_, de_epoch(dt), valor))
+                    if len(lote) >= EXPORT_LOTE:
+                        yield lote
+                        lote = []
+        if lote:
+            yield lote
+
+
+@medir_crud
+def iterar_alertas_export(
+    cd_area: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None
+) -> Iterator[List[tuple]]:
+    """
+    Percorre os alertas filtrados em ordem cronológica, em lotes de EXPORT_LOTE tuplas
+    (na ordem de COLUNAS_EXPORT_ALERTAS), usando os índices de dt_alerta.
+    """
+    where, valores = _filtros_sql([
+        ("cd_area = ?", cd_area),
+        ("dt_alerta >= ?", para_epoch(desde) if desde is not None else None),
+        ("dt_alerta <= ?", para_epoch(ate) if ate is not None else None),
+    ])
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT cd_alerta, dt_alerta, tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario
+              FROM ALERTA
+             WHERE {where}
+             ORDER BY dt_alerta, cd_alerta
+            """,
+            valores
+        )
+        while True:
+            linhas = cursor.fetchmany(EXPORT_LOTE)
+            if not linhas:
+                break
+            yield [(r[0], de_epoch(r[1]), r[2], r[3], r[4], r[5], r[6]) for r in linhas]
@@ -1,33 +1,374 @@
+import asyncio
+import functools
 import os
+import queue
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import List
 
-# Caminho absoluto para o arquivo .db (SQLite) dentro de src/backend
+from . import metricas
+
+# Caminho absoluto para o arquivo .db (SQLite) dentro de src/backend.
+# Pode ser sobrescrito pela variável de ambiente FLOOD_SENTINEL_DB (ex.: benchmarks
+# rodando contra um banco temporário).
 DB_PATH = os.path.abspath(
-    os.path.join(
+    os.environ.get("FLOOD_SENTINEL_DB")
+    or os.path.join(
         os.path.dirname(__file__),  # <projeto_root>/src/backend
         "flood_sentinel.db"
     )
 )
 
+# Threads dedicadas ao acesso ao banco no caminho assíncrono (ver executar_consulta /
+# executar_gravacao). Gravações têm executor próprio para que rajadas de POSTs dos
+# dispositivos não fiquem na fila atrás de consultas lentas do dashboard.
+DB_LEITORES = int(os.environ.get("FLOOD_SENTINEL_DB_READERS", "8"))
+DB_ESCRITORES = int(os.environ.get("FLOOD_SENTINEL_DB_WRITERS", "2"))
+
+# Ajustes aplicados uma única vez a cada conexão (pooled ou não)
+POOL_TAMANHO = int(os.environ.get("FLOOD_SENTINEL_POOL_SIZE", str(DB_LEITORES + DB_ESCRITORES)))
+POOL_TIMEOUT_S = 10.0                  # espera máxima por uma conexão livre
+BUSY_TIMEOUT_MS = 5000                 # espera por lock antes de "database is locked"
+CACHE_PAGINAS_KIB = 16 * 1024          # page cache de 16 MiB por conexão
+MMAP_BYTES = 256 * 1024 * 1024         # janela de mmap I/O de 256 MiB
+
+
+def _configurar_conexao(conn: sqlite3.Connection) -> None:
+    """
+    Aplica os PRAGMAs de desempenho/integridade. WAL permite leituras do dashboard
+    em paralelo com a escrita dos dispositivos; synchronous=NORMAL é seguro em WAL
+    e evita um fsync por commit.
+    """
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_PAGINAS_KIB}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_BYTES}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
+
+
+def _operacao(sql: str) -> str:
+    """Primeira palavra do comando (SELECT, INSERT, ...), usada como rótulo das métricas."""
+    partes = sql.split(None, 1)
+    return partes[0].upper() if partes else "-"
+
+
+class CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que mede cada execute/executemany e cada fetch (tempo e linhas) e registra
+    em metricas, rotulado com a função do crud em execução na thread.
+    """
+
+    _operacao_atual = "-"
+
+    def execute(self, sql, parametros=()):
+        self._operacao_atual = operacao = _operacao(sql)
+        inicio = perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            metricas.registrar_sql(operacao, perf_counter() - inicio, self.rowcount)
+
+    def executemany(self, sql, sequencia):
+        self._operacao_atual = operacao = _operacao(sql)
+        inicio = perf_counter()
+        try:
+            return super().executemany(sql, sequencia)
+        finally:
+            metricas.registrar_sql(operacao, perf_counter() - inicio, self.rowcount)
+
+    def fetchone(self):
+        inicio = perf_counter()
+        linha = super().fetchone()
+        metricas.registrar_sql(self._operacao_atual, perf_counter() - inicio, int(linha is not None), leitura=True)
+        return linha
+
+    def fetchmany(self, size=None):
+        inicio = perf_counter()
+        linhas = super().fetchmany(self.arraysize if size is None else size)
+        metricas.registrar_sql(self._operacao_atual, perf_counter() - inicio, len(linhas), leitura=True)
+        return linhas
+
+    def fetchall(self):
+        inicio = perf_counter()
+        linhas = super().fetchall()
+        metricas.registrar_sql(self._operacao_atual, perf_counter() - inicio, len(linhas), leitura=True)
+        return linhas
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute) são CursorMedido."""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+
 def get_connection():
     """
     Retorna uma conexão do sqlite3 configurada para retornar linhas como sqlite3.Row,
     com parsing automático de datas (ISO strings).
+    Cria sempre uma conexão nova; no caminho das requisições prefira conexao().
     """
     conn = sqlite3.connect(
         DB_PATH,
-        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        factory=ConexaoMedida,
+        uri=True  # ATTACH das partições usa URIs (mode=rw) - ver particoes.py
     )
     conn.row_factory = sqlite3.Row
+    _configurar_conexao(conn)
     return conn
 
-def init_db():
+
+class PoolConexoes:
+    """
+    Pool limitado de conexões SQLite já configuradas. As conexões são criadas sob
+    demanda (nunca antes de um fork de worker) até 'tamanho'; acima disso, quem pede
+    espera até 'timeout' segundos por uma conexão devolvida.
+    """
+
+    def __init__(self, tamanho: int, timeout: float):
+        self._tamanho = tamanho
+        self._timeout = timeout
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+
+    def emprestar(self) -> sqlite3.Connection:
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._criadas < self._tamanho:
+                self._criadas += 1
+                criar = True
+            else:
+                criar = False
+        if criar:
+            try:
+                return get_connection()
+            except Exception:
+                with self._lock:
+                    self._criadas -= 1
+                raise
+        try:
+            return self._livres.get(timeout=self._timeout)
+        except queue.Empty:
+            raise RuntimeError(
+                f"Nenhuma conexão livre no pool após {self._timeout:.0f}s."
+            ) from None
+
+    def devolver(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        self._livres.put(conn)
+
+    def descartar(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._criadas -= 1
+
+    def fechar_todas(self) -> None:
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self.descartar(conn)
+
+
+_pool = PoolConexoes(POOL_TAMANHO, POOL_TIMEOUT_S)
+
+
+@contextmanager
+def conexao():
+    """
+    Empresta uma conexão do pool e a devolve ao final do bloco 'with'.
+    Transações deixadas abertas (por exceção ou falta de commit) são desfeitas
+    antes da devolução.
+    """
+    conn = _pool.emprestar()
+    try:
+        yield conn
+    finally:
+        try:
+            _pool.devolver(conn)
+        except sqlite3.Error:
+            # Conexão em estado inválido (rollback falhou): não volta para o pool
+            _pool.descartar(conn)
+
+
+def fechar_pool():
+    """Fecha as conexões livres do pool (ex.: no shutdown da aplicação)."""
+    _pool.fechar_todas()
+
+
+# ================================
+# Executores para o caminho assíncrono
+# ================================
+_executores = {}
+_executores_lock = threading.Lock()
+
+
+def _executor(tipo: str) -> ThreadPoolExecutor:
+    # Criados sob demanda (após o fork dos workers e a cada ciclo de vida da app)
+    executor = _executores.get(tipo)
+    if executor is None:
+        with _executores_lock:
+            executor = _executores.get(tipo)
+            if executor is None:
+                tamanho = DB_LEITORES if tipo == "consulta" else DB_ESCRITORES
+                executor = ThreadPoolExecutor(max_workers=tamanho, thread_name_prefix=f"db-{tipo}")
+                _executores[tipo] = executor
+    return executor
+
+
+async def executar_consulta(func, *args, **kwargs):
+    """Executa uma função síncrona de leitura do crud sem bloquear o event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor("consulta"), functools.partial(func, *args, **kwargs))
+
+
+async def executar_gravacao(func, *args, **kwargs):
+    """Executa uma função síncrona de escrita do crud no executor de gravações."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor("gravacao"), functools.partial(func, *args, **kwargs))
+
+
+def encerrar_executores():
+    """Aguarda as operações em andamento e encerra os executores do banco."""
+    with _executores_lock:
+        executores = list(_executores.values())
+        _executores.clear()
+    for executor in executores:
+        executor.shutdown(wait=True)
+
+
+# ================================
+# Datas: epoch inteiro (microssegundos, UTC)
+# ================================
+# dt_leitura e dt_alerta são gravados como INTEGER (microssegundos desde 1970-01-01
+# UTC). Datas sem fuso são tratadas como UTC; datas com fuso são convertidas para
+# UTC. A leitura devolve sempre datetime "naive" em UTC.
+_EPOCH = datetime(1970, 1, 1)
+
+
+def para_epoch(dt: datetime) -> int:
+    """Converte um datetime no inteiro gravado nas colunas dt_*."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = dt - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def de_epoch(valor: int) -> datetime:
+    """Converte o inteiro gravado nas colunas dt_* de volta em datetime (UTC, naive)."""
+    return _EPOCH + timedelta(microseconds=valor)
+
+
+def _iso_para_epoch(texto):
+    # Usada apenas na migração de bancos antigos (datas em texto ISO)
+    if texto is None:
+        return None
+    return para_epoch(datetime.fromisoformat(str(texto).strip()))
+
+
+# Versão do esquema gravada em PRAGMA user_version
+#   1: datas como epoch inteiro + índices compostos
+#   2: agregados por intervalo de tempo (LEITURA_AGREGADO)
+#   3: leituras particionadas por mês em bancos anexados (ver particoes.py)
+#   4: versão de LOCAL e SENSOR mantida por triggers (ver cache_referencia.py)
+#   5: índice espacial (R-tree) de LOCAL mantido por triggers
+#   6: sensores removidos registrados para expurgo das partições (SENSOR_REMOVIDO)
+SCHEMA_VERSAO = 6
+
+# Instante atual em epoch µs calculado pelo próprio SQLite (triggers); julianday('now')
+# tem resolução de milissegundos
+AGORA_SQL = "CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER)"
+
+# Tamanho de cada intervalo de agregação, em microssegundos (mesma unidade de dt_*)
+BUCKETS_AGREGADO = {
+    "minute": 60 * 1_000_000,
+    "hour": 3600 * 1_000_000,
+    "day": 86400 * 1_000_000,
+}
+
+
+def _migrar_datas_para_epoch(conn: sqlite3.Connection) -> None:
+    """
+    Migração v0 -> v1: reconstrói LEITURA_SENSOR e ALERTA com dt_* INTEGER,
+    convertendo as strings ISO existentes. Roda em uma única transação.
+    """
+    colunas = {row["name"]: row["type"] for row in conn.execute("PRAGMA table_info(LEITURA_SENSOR)")}
+    if colunas.get("dt_leitura", "").upper() == "INTEGER":
+        return
+
+    conn.create_function("iso_para_epoch", 1, _iso_para_epoch, deterministic=True)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.executescript("""
+        BEGIN;
+
+        CREATE TABLE LEITURA_SENSOR_V1 (
+            cd_leitura INTEGER PRIMARY KEY AUTOINCREMENT,
+            cd_sensor  INTEGER NOT NULL REFERENCES SENSOR(cd_sensor) ON DELETE CASCADE,
+            dt_leitura INTEGER NOT NULL,    -- epoch em microssegundos (UTC)
+            vl_valor   REAL    NOT NULL
+        );
+        INSERT INTO LEITURA_SENSOR_V1 (cd_leitura, cd_sensor, dt_leitura, vl_valor)
+            SELECT cd_leitura, cd_sensor, iso_para_epoch(dt_leitura), vl_valor
+              FROM LEITURA_SENSOR;
+        DROP TABLE LEITURA_SENSOR;
+        ALTER TABLE LEITURA_SENSOR_V1 RENAME TO LEITURA_SENSOR;
+
+        CREATE TABLE ALERTA_V1 (
+            cd_alerta  INTEGER PRIMARY KEY AUTOINCREMENT,
+            dt_alerta  INTEGER NOT NULL,   -- epoch em microssegundos (UTC)
+            tp_nivel   TEXT    NOT NULL,
+            tp_origem  TEXT    NOT NULL,
+            ds_obs     TEXT,
+            cd_area    INTEGER NOT NULL REFERENCES LOCAL(cd_area) ON DELETE CASCADE,
+            cd_usuario INTEGER NOT NULL
+        );
+        INSERT INTO ALERTA_V1 (cd_alerta, dt_alerta, tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario)
+            SELECT cd_alerta, iso_para_epoch(dt_alerta), tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario
+              FROM ALERTA;
+        DROP TABLE ALERTA;
+        ALTER TABLE ALERTA_V1 RENAME TO ALERTA;
+
+        COMMIT;
+        """)
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+
+
+def init_db() -> List[int]:
     """
     Cria as tabelas no SQLite, caso ainda não existam.
     A DDL abaixo reflete a mesma estrutura de colunas que você tinha no Oracle.
+    Retorna os meses (AAAAMM) cujos agregados foram reconstruídos na reconciliação das
+    partições (ver _reconciliar_particoes), para quem chamou informar.
     """
     conn = get_connection()
     cursor = conn.cursor()
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
     cursor.executescript("""
     PRAGMA foreign_keys = ON;
 
@@ -46,16 +387,9 @@ def init_db():
         cd_area   INTEGER NOT NULL REFERENCES LOCAL(cd_area) ON DELETE CASCADE
     );
 
-    CREATE TABLE IF NOT EXISTS LEITURA_SENSOR (
-        cd_leitura INTEGER PRIMARY KEY AUTOINCREMENT,
-        cd_sensor  INTEGER NOT NULL REFERENCES SENSOR(cd_sensor) ON DELETE CASCADE,
-        dt_leitura TEXT    NOT NULL,    -- armazenamos ISO string aqui
-        vl_valor   REAL    NOT NULL
-    );
-
     CREATE TABLE IF NOT EXISTS ALERTA (
         cd_alerta  INTEGER PRIMARY KEY AUTOINCREMENT,
-        dt_alerta  TEXT    NOT NULL,   -- ISO string
+        dt_alerta  INTEGER NOT NULL,   -- epoch em microssegundos (UTC)
         tp_nivel   TEXT    NOT NULL,
         tp_origem  TEXT    NOT NULL,
         ds_obs     TEXT,
@@ -64,7 +398,294 @@ def init_db():
     );
     """)
     conn.commit()
+
+    if versao < 3:
+        # Até a v2 as leituras ficavam no banco principal; as migrações abaixo ainda
+        # trabalham sobre esta tabela antes de ela ser movida para as partições
+        cursor.executescript("""
+        CREATE TABLE IF NOT EXISTS LEITURA_SENSOR (
+            cd_leitura INTEGER PRIMARY KEY AUTOINCREMENT,
+            cd_sensor  INTEGER NOT NULL REFERENCES SENSOR(cd_sensor) ON DELETE CASCADE,
+            dt_leitura INTEGER NOT NULL,    -- epoch em microssegundos (UTC)
+            vl_valor   REAL    NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS IX_LEITURA_SENSOR_DT
+            ON LEITURA_SENSOR (cd_sensor, dt_leitura, cd_leitura, vl_valor);
+        """)
+        conn.commit()
+
+    # Bancos criados antes da v1 guardavam as datas como texto ISO
+    if versao < 1:
+        _migrar_datas_para_epoch(conn)
+
+    # Índices compostos: as listagens "mais recentes primeiro" viram uma varredura
+    # de intervalo no índice, sem etapa de ordenação. O índice de leituras (de
+    # cobertura, inclui vl_valor) fica em cada partição.
+    cursor.executescript(f"""
+    CREATE INDEX IF NOT EXISTS IX_ALERTA_AREA_DT
+        ON ALERTA (cd_area, dt_alerta, cd_alerta);
+
+    CREATE INDEX IF NOT EXISTS IX_ALERTA_DT
+        ON ALERTA (dt_alerta, cd_alerta);
+
+    -- Agregados por minuto/hora/dia de cada sensor, mantidos incrementalmente pelo
+    -- crud a cada inserção. Gráficos de semanas/meses leem só esta tabela.
+    CREATE TABLE IF NOT EXISTS LEITURA_AGREGADO (
+        tp_bucket   TEXT    NOT NULL,   -- 'minute' | 'hour' | 'day'
+        cd_sensor   INTEGER NOT NULL REFERENCES SENSOR(cd_sensor) ON DELETE CASCADE,
+        dt_bucket   INTEGER NOT NULL,   -- início do intervalo (epoch em microssegundos)
+        vl_min      REAL    NOT NULL,
+        vl_max      REAL    NOT NULL,
+        vl_soma     REAL    NOT NULL,
+        qt_leituras INTEGER NOT NULL,
+        dt_ultimo   INTEGER NOT NULL,   -- dt_leitura da leitura mais recente do intervalo
+        vl_ultimo   REAL    NOT NULL,
+        PRIMARY KEY (tp_bucket, cd_sensor, dt_bucket)
+    ) WITHOUT ROWID;
+
+    -- Partições mensais de LEITURA_SENSOR (ver particoes.py)
+    CREATE TABLE IF NOT EXISTS PARTICAO_LEITURA (
+        cd_mes           INTEGER PRIMARY KEY,   -- AAAAMM
+        dt_inicio        INTEGER NOT NULL,      -- epoch em microssegundos (inclusive)
+        dt_fim           INTEGER NOT NULL,      -- epoch em microssegundos (exclusive)
+        tp_armazenamento TEXT    NOT NULL,      -- 'sqlite' | 'arquivando' | 'parquet'
+        qt_leituras      INTEGER                -- preenchido ao arquivar
+    );
+
+    -- Ids únicos entre as partições (cd_leitura)
+    CREATE TABLE IF NOT EXISTS SEQUENCIA (
+        nm_tabela TEXT    PRIMARY KEY,
+        nr_ultimo INTEGER NOT NULL
+    );
+
+    -- Versão de cada tabela de cadastro: os triggers abaixo a incrementam a cada
+    -- alteração, inclusive as feitas fora da API (scripts, sqlite3 na linha de comando)
+    CREATE TABLE IF NOT EXISTS VERSAO_CADASTRO (
+        nm_tabela      TEXT    PRIMARY KEY,
+        nr_versao      INTEGER NOT NULL,
+        dt_modificacao INTEGER NOT NULL   -- epoch em microssegundos (UTC)
+    );
+    INSERT OR IGNORE INTO VERSAO_CADASTRO VALUES ('LOCAL', 0, {AGORA_SQL});
+    INSERT OR IGNORE INTO VERSAO_CADASTRO VALUES ('SENSOR', 0, {AGORA_SQL});
+
+    CREATE TRIGGER IF NOT EXISTS TG_LOCAL_INS_VERSAO AFTER INSERT ON LOCAL
+    BEGIN
+        UPDATE VERSAO_CADASTRO
+           SET nr_versao = nr_versao + 1, dt_modificacao = {AGORA_SQL}
+         WHERE nm_tabela = 'LOCAL';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_LOCAL_UPD_VERSAO AFTER UPDATE ON LOCAL
+    BEGIN
+        UPDATE VERSAO_CADASTRO
+           SET nr_versao = nr_versao + 1, dt_modificacao = {AGORA_SQL}
+         WHERE nm_tabela = 'LOCAL';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_LOCAL_DEL_VERSAO AFTER DELETE ON LOCAL
+    BEGIN
+        UPDATE VERSAO_CADASTRO
+           SET nr_versao = nr_versao + 1, dt_modificacao = {AGORA_SQL}
+         WHERE nm_tabela = 'LOCAL';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_SENSOR_INS_VERSAO AFTER INSERT ON SENSOR
+    BEGIN
+        UPDATE VERSAO_CADASTRO
+           SET nr_versao = nr_versao + 1, dt_modificacao = {AGORA_SQL}
+         WHERE nm_tabela = 'SENSOR';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_SENSOR_UPD_VERSAO AFTER UPDATE ON SENSOR
+    BEGIN
+        UPDATE VERSAO_CADASTRO
+           SET nr_versao = nr_versao + 1, dt_modificacao = {AGORA_SQL}
+         WHERE nm_tabela = 'SENSOR';
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_SENSOR_DEL_VERSAO AFTER DELETE ON SENSOR
+    BEGIN
+        UPDATE VERSAO_CADASTRO
+           SET nr_versao = nr_versao + 1, dt_modificacao = {AGORA_SQL}
+         WHERE nm_tabela = 'SENSOR';
+    END;
+
+    -- Sensores apagados (inclusive em cascata de LOCAL) cujas leituras ainda estão
+    -- nas partições: sem FK entre os bancos, particoes.expurgar_removidos faz o papel
+    -- do antigo ON DELETE CASCADE de LEITURA_SENSOR
+    CREATE TABLE IF NOT EXISTS SENSOR_REMOVIDO (
+        cd_sensor INTEGER PRIMARY KEY
+    );
+
+    CREATE TRIGGER IF NOT EXISTS TG_SENSOR_DEL_REMOVIDO AFTER DELETE ON SENSOR
+    BEGIN
+        INSERT OR IGNORE INTO SENSOR_REMOVIDO VALUES (OLD.cd_sensor);
+    END;
+
+    -- Índice espacial das áreas: caixa degenerada (um ponto) por área com lat/lon.
+    -- O R-tree guarda float32 arredondando a caixa para fora, então as consultas o
+    -- usam como filtro de candidatos e conferem LOCAL.lat/lon exatos.
+    CREATE VIRTUAL TABLE IF NOT EXISTS LOCAL_RTREE USING rtree(
+        cd_area, min_lat, max_lat, min_lon, max_lon
+    );
+
+    CREATE TRIGGER IF NOT EXISTS TG_LOCAL_INS_RTREE AFTER INSERT ON LOCAL
+    WHEN NEW.lat IS NOT NULL AND NEW.lon IS NOT NULL
+    BEGIN
+        INSERT INTO LOCAL_RTREE VALUES (NEW.cd_area, NEW.lat, NEW.lat, NEW.lon, NEW.lon);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_LOCAL_UPD_RTREE AFTER UPDATE OF lat, lon ON LOCAL
+    BEGIN
+        DELETE FROM LOCAL_RTREE WHERE cd_area = OLD.cd_area;
+        INSERT INTO LOCAL_RTREE
+            SELECT NEW.cd_area, NEW.lat, NEW.lat, NEW.lon, NEW.lon
+             WHERE NEW.lat IS NOT NULL AND NEW.lon IS NOT NULL;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS TG_LOCAL_DEL_RTREE AFTER DELETE ON LOCAL
+    BEGIN
+        DELETE FROM LOCAL_RTREE WHERE cd_area = OLD.cd_area;
+    END;
+    """)
+    conn.commit()
+
+    if versao < 2:
+        _recalcular_agregados(conn)
+
+    # Import local: particoes depende deste módulo (DB_PATH, datas)
+    from . import particoes
+
+    if versao < 3:
+        particoes.migrar_leituras_para_particoes(conn)
+
+    if versao < 5:
+        # Áreas cadastradas antes dos triggers do R-tree
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO LOCAL_RTREE (cd_area, min_lat, max_lat, min_lon, max_lon)
+                SELECT cd_area, lat, lat, lon, lon FROM LOCAL
+                 WHERE lat IS NOT NULL AND lon IS NOT NULL
+            """
+        )
+        conn.commit()
+
+    if versao < 6:
+        # Sensores apagados entre a v3 e o trigger de SENSOR_REMOVIDO
+        particoes.registrar_orfaos(conn)
+
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSAO}")
+    conn.commit()
+    # Remoções feitas com a API parada, depois gravações interrompidas entre os dois commits
+    particoes.expurgar_removidos(conn)
+    reconstruidos = _reconciliar_particoes(conn)
     conn.close()
+    return reconstruidos
+
+def _recalcular_agregados(
+    conn: sqlite3.Connection,
+    tabela: str = "LEITURA_SENSOR",
+    dt_inicio: int = -(2 ** 62),
+    dt_fim: int = 2 ** 62
+) -> None:
+    """
+    Reconstrói LEITURA_AGREGADO no intervalo [dt_inicio, dt_fim) a partir das leituras
+    de 'tabela'. Usado na migração v2 (todo o histórico) e na reconciliação das
+    partições (um mês, que contém seus intervalos inteiros); fora disso os agregados
+    são mantidos a cada inserção.
+    """
+    conn.execute("BEGIN")
+    try:
+        conn.execute(
+            "DELETE FROM LEITURA_AGREGADO WHERE dt_bucket >= ? AND dt_bucket < ?",
+            (dt_inicio, dt_fim)
+        )
+        for tp_bucket, tamanho in BUCKETS_AGREGADO.items():
+            conn.execute(
+                """
+                INSERT INTO LEITURA_AGREGADO
+                       (tp_bucket, cd_sensor, dt_bucket, vl_min, vl_max, vl_soma,
+                        qt_leituras, dt_ultimo, vl_ultimo)
+                SELECT g.tp_bucket, g.cd_sensor, g.dt_bucket, g.vl_min, g.vl_max, g.vl_soma,
+                       g.qt_leituras, g.dt_ultimo,
+                       (SELECT x.vl_valor
+                          FROM {tabela} x
+                         WHERE x.cd_sensor = g.cd_sensor
+                           AND x.dt_leitura = g.dt_ultimo
+                         ORDER BY x.cd_leitura DESC
+                         LIMIT 1)
+                  FROM (
+                        SELECT ? AS tp_bucket,
+                               cd_sensor,
+                               (dt_leitura / ?) * ? AS dt_bucket,
+                               MIN(vl_valor) AS vl_min,
+                               MAX(vl_valor) AS vl_max,
+                               SUM(vl_valor) AS vl_soma,
+                               COUNT(*) AS qt_leituras,
+                               MAX(dt_leitura) AS dt_ultimo
+                          FROM {tabela}
+                         WHERE dt_leitura >= ? AND dt_leitura < ?
+                           AND cd_sensor IN (SELECT cd_sensor FROM main.SENSOR)
+                         GROUP BY cd_sensor, dt_leitura / ?
+                       ) g
+                """.format(tabela=tabela),
+                (tp_bucket, tamanho, tamanho, dt_inicio, dt_fim, tamanho)
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
 
-# Garante que, ao importar este módulo, as tabelas existam
-init_db()
+
+def _reconciliar_particoes(conn: sqlite3.Connection) -> List[int]:
+    """
+    Uma gravação de leituras faz um único commit sobre dois bancos: a partição do mês
+    (leituras) e o principal (SEQUENCIA, LEITURA_AGREGADO, ALERTA). Em modo WAL o
+    SQLite garante a atomicidade de cada banco, mas não do conjunto: uma queda no meio
+    do commit pode deixar só um dos lados gravado. Chamada no startup, refaz o que pode
+    ser derivado das partições em SQLite:
+      - SEQUENCIA avança até o maior cd_leitura gravado (senão ids seriam reusados);
+      - os agregados de um mês cuja contagem diverge das leituras são reconstruídos.
+    Alertas automáticos de um lote interrompido não são refeitos (nem desfeitos).
+    Retorna os meses reconstruídos.
+    """
+    from .particoes import anexar, catalogo, ParticaoIndisponivel
+
+    reconstruidos = []
+    for part in catalogo(conn):
+        if not part.em_sqlite:
+            continue
+        try:
+            tabela = anexar(conn, part)
+        except ParticaoIndisponivel:
+            continue
+        qt_leituras, ultimo = conn.execute(f"SELECT COUNT(*), MAX(cd_leitura) FROM {tabela}").fetchone()
+        qt_agregado = conn.execute(
+            """
+            SELECT COALESCE(SUM(qt_leituras), 0) FROM LEITURA_AGREGADO
+             WHERE tp_bucket = 'day' AND dt_bucket >= ? AND dt_bucket < ?
+            """,
+            (part.dt_inicio, part.dt_fim)
+        ).fetchone()[0]
+        if ultimo is not None:
+            conn.execute(
+                "UPDATE SEQUENCIA SET nr_ultimo = MAX(nr_ultimo, ?) WHERE nm_tabela = 'LEITURA_SENSOR'",
+                (ultimo,)
+            )
+            conn.commit()
+        if qt_leituras != qt_agregado:
+            _recalcular_agregados(conn, tabela, part.dt_inicio, part.dt_fim)
+            reconstruidos.append(part.cd_mes)
+    return reconstruidos
+
+
+# O esquema não é mais criado/migrado na importação: a aplicação chama init_db() no
+# startup (lifespan em app.py). Para migrar um banco sem subir a API:
+#   cd src && python -m backend.database
+if __name__ == "__main__":
+    reconstruidos = init_db()
+    print(
+        f"Esquema v{SCHEMA_VERSAO} aplicado em {DB_PATH}"
+        + (f" (agregados reconstruídos: {', '.join(map(str, reconstruidos))})" if reconstruidos else "")
+    )
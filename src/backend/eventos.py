@@ -0,0 +1,146 @@
+# src/backend/eventos.py
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Eventos pendentes por assinante; um cliente lento que enche a fila perde os eventos
+# e recebe 'reiniciar' (deve recarregar os dados pela API REST)
+MAX_FILA_EVENTOS = int(os.environ.get("FLOOD_SENTINEL_EVENTOS_FILA", "1000"))
+
+# Intervalo do comentário de keep-alive no stream (proxies derrubam conexões ociosas)
+KEEPALIVE_S = 15.0
+
+# Mesmas colunas (e ordem) dos formatos colunares da API (crud.COLUNAS_LEITURA_AREA
+# e crud.COLUNAS_ALERTA)
+_COLUNAS_LEITURA = ("cd_leitura", "cd_sensor", "nm_modelo", "dt_leitura", "vl_valor")
+
+
+def formatar_evento(tipo: str, dados: dict) -> bytes:
+    """Um evento no formato text/event-stream (Server-Sent Events)."""
+    return f"event: {tipo}\ndata: {json.dumps(dados, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+EVENTO_CONECTADO = formatar_evento("conectado", {})
+EVENTO_REINICIAR = formatar_evento("reiniciar", {})
+EVENTO_KEEPALIVE = b": keep-alive\n\n"
+
+
+class Barramento:
+    """
+    Publish/subscribe em memória das leituras e alertas gravados, por área.
+
+    publicar_*() é chamado pelo crud logo após o commit, na thread do executor de
+    gravação; a entrega às filas (asyncio.Queue) de cada assinante acontece no event
+    loop. Sem assinantes, publicar não faz nada além de um teste.
+    Cada evento é serializado uma única vez e compartilhado entre os assinantes.
+    Vale para o processo da API: gravações de outro processo não são publicadas.
+    """
+
+    def __init__(self, max_fila: int):
+        self.max_fila = max_fila
+        # cd_area -> filas; a chave None recebe todas as áreas
+        self._assinantes: Dict[Optional[int], Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # cd_sensor -> (cd_area, nm_modelo), na versão de SENSOR em VERSAO_CADASTRO
+        self._sensores: Dict[int, Tuple[int, Optional[str]]] = {}
+        self._versao_sensores: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self._assinantes)
+
+    @property
+    def total_assinantes(self) -> int:
+        return sum(len(filas) for filas in tuple(self._assinantes.values()))
+
+    # ---------- assinantes (event loop) ----------
+
+    def assinar(self, cd_area: Optional[int]) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        fila = asyncio.Queue(maxsize=self.max_fila)
+        self._assinantes[cd_area].add(fila)
+        fila.put_nowait(EVENTO_CONECTADO)
+        return fila
+
+    def cancelar(self, cd_area: Optional[int], fila: asyncio.Queue) -> None:
+        filas = self._assinantes.get(cd_area)
+        if filas is not None:
+            filas.discard(fila)
+            if not filas:
+                del self._assinantes[cd_area]
+
+    def _entregar(self, cd_area: int, evento: bytes) -> None:
+        for chave in (cd_area, None):
+            for fila in tuple(self._assinantes.get(chave, ())):
+                try:
+                    fila.put_nowait(evento)
+                except asyncio.QueueFull:
+                    while not fila.empty():
+                        fila.get_nowait()
+                    fila.put_nowait(EVENTO_REINICIAR)
+
+    # ---------- publicação (threads de gravação) ----------
+
+    def _publicar(self, tipo: str, por_area: Dict[int, dict]) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        for cd_area, colunas in por_area.items():
+            evento = formatar_evento(tipo, colunas)
+            try:
+                loop.call_soon_threadsafe(self._entregar, cd_area, evento)
+            except RuntimeError:
+                # Loop já encerrado (shutdown)
+                return
+
+    def publicar_leituras(self, cursor: sqlite3.Cursor, linhas: Iterable[Tuple[int, int, int, float]]) -> None:
+        """Leituras já commitadas (cd_leitura, cd_sensor, dt_epoch, vl_valor), agrupadas por área."""
+        if not self.ativo:
+            return
+        linhas = list(linhas)
+        with self._lock:
+            # Recarrega a cada alteração de SENSOR (um sensor pode mudar de área),
+            # inclusive as feitas fora da API
+            cursor.execute("SELECT nr_versao FROM VERSAO_CADASTRO WHERE nm_tabela = 'SENSOR'")
+            versao = cursor.fetchone()[0]
+            if versao != self._versao_sensores:
+                cursor.execute("SELECT cd_sensor, cd_area, nm_modelo FROM SENSOR")
+                self._sensores = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+                self._versao_sensores = versao
+            sensores = self._sensores
+        por_area: Dict[int, dict] = {}
+        for cd_leitura, cd_sensor, dt, valor in linhas:
+            sensor = sensores.get(cd_sensor)
+            if sensor is None:
+                continue
+            cd_area, nm_modelo = sensor
+            colunas = por_area.get(cd_area)
+            if colunas is None:
+                colunas = por_area[cd_area] = {nome: [] for nome in _COLUNAS_LEITURA}
+            colunas["cd_leitura"].append(cd_leitura)
+            colunas["cd_sensor"].append(cd_sensor)
+            colunas["nm_modelo"].append(nm_modelo)
+            colunas["dt_leitura"].append(dt)
+            colunas["vl_valor"].append(valor)
+        self._publicar("leituras", por_area)
+
+    def publicar_alertas(self, colunas: dict) -> None:
+        """Alertas já commitados no formato colunar de crud.COLUNAS_ALERTA."""
+        if not self.ativo or not colunas["cd_alerta"]:
+            return
+        indices_por_area: Dict[int, list] = defaultdict(list)
+        for i, cd_area in enumerate(colunas["cd_area"]):
+            indices_por_area[cd_area].append(i)
+        self._publicar("alertas", {
+            cd_area: {nome: [valores[i] for i in indices] for nome, valores in colunas.items()}
+            for cd_area, indices in indices_por_area.items()
+        })
+
+
+barramento = Barramento(MAX_FILA_EVENTOS)
@@ -0,0 +1,46 @@
+# src/backend/exportacao.py
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, List, Sequence
+
+FORMATOS_EXPORT = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _valor_json(valor):
+    return valor.isoformat() if isinstance(valor, datetime) else valor
+
+
+def gerar_csv(colunas: Sequence[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    """Converte lotes de tuplas em pedaços de CSV (com cabeçalho), um pedaço por lote."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(colunas)
+    yield buffer.getvalue()
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            [_valor_json(v) for v in linha] for linha in lote
+        )
+        yield buffer.getvalue()
+
+
+def gerar_ndjson(colunas: Sequence[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    """Converte lotes de tuplas em pedaços de NDJSON (um objeto JSON por linha)."""
+    for lote in lotes:
+        yield "".join(
+            json.dumps(dict(zip(colunas, map(_valor_json, linha))), ensure_ascii=False) + "\n"
+            for linha in lote
+        )
+
+
+def gerar_export(formato: str, colunas: Sequence[str], lotes: Iterable[List[tuple]]) -> Iterator[str]:
+    if formato == "csv":
+        return gerar_csv(colunas, lotes)
+    return gerar_ndjson(colunas, lotes)
@@ -0,0 +1,254 @@
+# src/backend/ingestao.py
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from . import crud
+from .particoes import LoteExcedeMeses
+from .schemas import AlertaCreate, LeituraSensorCreate
+
+# 0 desliga a fila: POST /leituras/ e /alertas/ gravam direto (um commit por requisição)
+ATIVA = os.environ.get("FLOOD_SENTINEL_INGESTAO", "1") != "0"
+# Itens aguardando gravação; acima disso a API responde 429
+CAPACIDADE_FILA = int(os.environ.get("FLOOD_SENTINEL_INGESTAO_FILA", "10000"))
+# Cada commit leva até MAX_LOTE itens. Com JANELA_MS = 0 o gravador leva o que chegou
+# enquanto o commit anterior rodava (os lotes crescem sozinhos sob rajada, sem atrasar
+# requisições isoladas); JANELA_MS > 0 espera mais itens antes de gravar, o que só
+# compensa quando o commit é caro (ex.: synchronous = FULL)
+MAX_LOTE = int(os.environ.get("FLOOD_SENTINEL_INGESTAO_LOTE", "500"))
+JANELA_MS = float(os.environ.get("FLOOD_SENTINEL_INGESTAO_JANELA_MS", "0"))
+
+# Commits considerados nas estatísticas de latência
+_AMOSTRAS_METRICAS = 1024
+
+_PARAR = object()
+
+
+class FilaCheia(Exception):
+    """A fila de ingestão está no limite: o cliente deve tentar de novo mais tarde."""
+
+
+class IngestaoIndisponivel(Exception):
+    """O gravador não está rodando (startup não concluído ou encerramento em curso)."""
+
+
+class _Pedido:
+    __slots__ = ("tipo", "dados", "futuro", "loop", "entrada")
+
+    def __init__(self, tipo: str, dados, futuro: asyncio.Future, loop: asyncio.AbstractEventLoop):
+        self.tipo = tipo
+        self.dados = dados
+        self.futuro = futuro
+        self.loop = loop
+        self.entrada = time.perf_counter()
+
+
+def _resolver(futuro: asyncio.Future, resultado) -> None:
+    if futuro.cancelled():
+        return
+    if isinstance(resultado, BaseException):
+        futuro.set_exception(resultado)
+    else:
+        futuro.set_result(resultado)
+
+
+def _percentil(valores, p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+class FilaIngestao:
+    """
+    Fila limitada de leituras e alertas com um único gravador (thread) que faz group
+    commit: junta o que está na fila (até 'max_lote' itens, esperando até 'janela_ms')
+    e grava tudo em uma transação (crud.gravar_lote_ingestao).
+
+    A requisição só é respondida depois do commit do lote em que entrou, então o
+    "recebido" continua significando "gravado" e o cd_* gerado volta na resposta;
+    o ganho vem de dividir um commit entre todas as requisições da janela.
+    Com a fila cheia, gravar_leitura/gravar_alerta lançam FilaCheia sem bloquear
+    (a API responde 429).
+    """
+
+    def __init__(self, capacidade: int, max_lote: int, janela_ms: float):
+        self.capacidade = capacidade
+        self.max_lote = max_lote
+        self.janela_s = janela_ms / 1000.0
+        self._fila: queue.Queue = queue.Queue(maxsize=capacidade)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # Métricas
+        self.itens_gravados = 0
+        self.itens_com_erro = 0
+        self.itens_rejeitados = 0
+        self.lotes_gravados = 0
+        self._latencias_commit = deque(maxlen=_AMOSTRAS_METRICAS)
+        self._esperas = deque(maxlen=_AMOSTRAS_METRICAS)
+        self._tamanhos_lote = deque(maxlen=_AMOSTRAS_METRICAS)
+
+    @property
+    def ativa(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if not self.ativa:
+                self._thread = threading.Thread(target=self._executar, name="ingestao-gravador", daemon=True)
+                self._thread.start()
+
+    def parar(self) -> None:
+        """Grava o que já está na fila e encerra o gravador."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._fila.put(_PARAR)
+            thread.join()
+            self._thread = None
+        self._falhar_pendentes()
+
+    def _falhar_pendentes(self) -> None:
+        """Responde com IngestaoIndisponivel os pedidos que ficaram na fila sem gravador."""
+        while True:
+            try:
+                pedido = self._fila.get_nowait()
+            except queue.Empty:
+                return
+            if pedido is _PARAR:
+                continue
+            try:
+                pedido.loop.call_soon_threadsafe(
+                    _resolver, pedido.futuro, IngestaoIndisponivel("Gravador de ingestão parado.")
+                )
+            except RuntimeError:
+                pass
+
+    # ---------- lado das requisições (event loop) ----------
+
+    async def _enviar(self, tipo: str, dados):
+        if not self.ativa:
+            raise IngestaoIndisponivel("Gravador de ingestão parado.")
+        loop = asyncio.get_running_loop()
+        pedido = _Pedido(tipo, dados, loop.create_future(), loop)
+        try:
+            self._fila.put_nowait(pedido)
+        except queue.Full:
+            self.itens_rejeitados += 1
+            raise FilaCheia(f"Fila de ingestão cheia ({self.capacidade} itens).") from None
+        # parar() pode ter terminado entre o teste acima e o put: sem gravador, o pedido
+        # nunca seria respondido. Se o gravador ainda estava vivo aqui, a limpeza feita
+        # por parar() depois do join encontra o pedido na fila.
+        if not self.ativa:
+            self._falhar_pendentes()
+        return await pedido.futuro
+
+    async def gravar_leitura(self, leitura: LeituraSensorCreate):
+        return await self._enviar("leitura", leitura)
+
+    async def gravar_alerta(self, alerta: AlertaCreate):
+        return await self._enviar("alerta", alerta)
+
+    # ---------- gravador (thread) ----------
+
+    def _coletar(self, primeiro: _Pedido):
+        """Junta pedidos até max_lote ou até fechar a janela; devolve (lote, parar)."""
+        lote = [primeiro]
+        limite = time.monotonic() + self.janela_s
+        while len(lote) < self.max_lote:
+            restante = limite - time.monotonic()
+            try:
+                pedido = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is _PARAR:
+                return lote, True
+            lote.append(pedido)
+        return lote, False
+
+    def _gravar(self, lote) -> None:
+        leituras = [p for p in lote if p.tipo == "leitura"]
+        alertas = [p for p in lote if p.tipo == "alerta"]
+        inicio = time.perf_counter()
+        try:
+            res_leituras, res_alertas = crud.gravar_lote_ingestao(
+                [p.dados for p in leituras], [p.dados for p in alertas]
+            )
+            resultados = list(zip(leituras, res_leituras)) + list(zip(alertas, res_alertas))
+        except Exception as e:
+            # Falha da transação inteira (ex.: banco travado além do busy_timeout)
+            resultados = [(p, e) for p in lote]
+        fim = time.perf_counter()
+        # Leituras de clientes diferentes podem somar mais meses do que cabem em uma
+        # transação: as dos meses que ficaram de fora vão no commit seguinte
+        adiadas = [p for p, r in resultados if isinstance(r, LoteExcedeMeses)]
+        if adiadas:
+            resultados = [(p, r) for p, r in resultados if not isinstance(r, LoteExcedeMeses)]
+
+        erros = sum(isinstance(r, BaseException) for _, r in resultados)
+        self.itens_com_erro += erros
+        self.itens_gravados += len(resultados) - erros
+        self.lotes_gravados += 1
+        self._latencias_commit.append(fim - inicio)
+        self._esperas.append(fim - min(p.entrada for p in lote))
+        self._tamanhos_lote.append(len(lote))
+
+        for pedido, resultado in resultados:
+            try:
+                pedido.loop.call_soon_threadsafe(_resolver, pedido.futuro, resultado)
+            except RuntimeError:
+                # Event loop encerrado: ninguém espera mais a resposta
+                pass
+        if adiadas:
+            self._gravar(adiadas)
+
+    def _executar(self) -> None:
+        parar = False
+        while not parar:
+            primeiro = self._fila.get()
+            if primeiro is _PARAR:
+                break
+            lote, parar = self._coletar(primeiro)
+            self._gravar(lote)
+        # Itens que chegaram depois do pedido de parada
+        restantes = []
+        while True:
+            try:
+                pedido = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is not _PARAR:
+                restantes.append(pedido)
+        for i in range(0, len(restantes), self.max_lote):
+            self._gravar(restantes[i:i + self.max_lote])
+
+    # ---------- métricas ----------
+
+    def metricas(self) -> dict:
+        latencias = list(self._latencias_commit)
+        esperas = list(self._esperas)
+        tamanhos = list(self._tamanhos_lote)
+        return {
+            "ativa": self.ativa,
+            "profundidade": self._fila.qsize(),
+            "capacidade": self.capacidade,
+            "itens_gravados": self.itens_gravados,
+            "itens_com_erro": self.itens_com_erro,
+            "itens_rejeitados": self.itens_rejeitados,
+            "lotes_gravados": self.lotes_gravados,
+            "lote_medio": sum(tamanhos) / len(tamanhos) if tamanhos else 0.0,
+            "commit_ms_p50": _percentil(latencias, 0.50) * 1000,
+            "commit_ms_p95": _percentil(latencias, 0.95) * 1000,
+            "commit_ms_max": max(latencias, default=0.0) * 1000,
+            "espera_ms_p50": _percentil(esperas, 0.50) * 1000,
+            "espera_ms_p95": _percentil(esperas, 0.95) * 1000,
+        }
+
+
+fila_ingestao = FilaIngestao(CAPACIDADE_FILA, MAX_LOTE, JANELA_MS)
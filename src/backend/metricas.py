@@ -0,0 +1,301 @@
+# src/backend/metricas.py
+#
+# Métricas do backend no formato texto do Prometheus (GET /metrics), sem dependências
+# externas: latência e status por endpoint (middleware ASGI), tempo de cada função do
+# crud (separando SQL do restante: montagem de modelos pydantic, dicionários etc.) e
+# tempo/linhas de cada comando SQL (cursor instrumentado em database.py).
+#
+# Custo por evento: um perf_counter, uma busca binária no histograma e um lock sem
+# disputa, então as métricas ficam sempre ligadas.
+
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+PREFIXO = "flood_sentinel_"
+
+# Limites dos histogramas (segundos)
+BUCKETS_HTTP = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_SQL = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+Rotulos = Tuple[str, ...]
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _formatar_rotulos(nomes: Tuple[str, ...], valores: Rotulos, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(str(valor))}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Familia:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()):
+        self.nome = PREFIXO + nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self._lock = threading.Lock()
+
+    def _cabecalho(self) -> List[str]:
+        return [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+
+
+class Contador(_Familia):
+    """Valor que só cresce (ex.: total de respostas por status)."""
+
+    tipo = "counter"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Tuple[str, ...] = ()):
+        super().__init__(nome, ajuda, rotulos)
+        self._valores: Dict[Rotulos, float] = {}
+
+    def inc(self, rotulos: Rotulos = (), valor: float = 1.0) -> None:
+        with self._lock:
+            self._valores[rotulos] = self._valores.get(rotulos, 0.0) + valor
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return self._cabecalho() + [
+            f"{self.nome}{_formatar_rotulos(self.rotulos, r)} {_numero(v)}" for r, v in valores
+        ]
+
+
+class Medidor(Contador):
+    """Valor que sobe e desce (ex.: requisições em andamento)."""
+
+    tipo = "gauge"
+
+    def dec(self, rotulos: Rotulos = (), valor: float = 1.0) -> None:
+        self.inc(rotulos, -valor)
+
+
+class Histograma(_Familia):
+    """Distribuição com limites fixos (_bucket cumulativo, _sum e _count)."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Tuple[str, ...], buckets: Tuple[float, ...]):
+        super().__init__(nome, ajuda, rotulos)
+        self.buckets = buckets
+        # rótulos -> [contagem por bucket (+Inf no fim)..., soma]
+        self._series: Dict[Rotulos, list] = {}
+
+    def observar(self, rotulos: Rotulos, valor: float) -> None:
+        i = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [0] * (len(self.buckets) + 1) + [0.0]
+            serie[i] += 1
+            serie[-1] += valor
+
+    def exportar(self) -> List[str]:
+        with self._lock:
+            series = sorted((r, list(s)) for r, s in self._series.items())
+        linhas = self._cabecalho()
+        for rotulos, serie in series:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), serie[:-1]):
+                acumulado += contagem
+                le = 'le="+Inf"' if limite == float("inf") else f'le="{limite!r}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, rotulos, le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, rotulos)} {_numero(serie[-1])}")
+            linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, rotulos)} {acumulado}")
+        return linhas
+
+
+class Registro:
+    """Famílias de métricas do processo + coletores chamados na hora da exportação."""
+
+    def __init__(self):
+        self.familias: List[_Familia] = []
+        self._coletores: List[Callable[[], List[_Familia]]] = []
+
+    def registrar(self, familia):
+        self.familias.append(familia)
+        return familia
+
+    def adicionar_coletor(self, coletor: Callable[[], List[_Familia]]) -> None:
+        """'coletor' devolve famílias montadas na hora (ex.: profundidade da fila)."""
+        self._coletores.append(coletor)
+
+    def exportar(self) -> str:
+        linhas = []
+        for familia in self.familias:
+            linhas.extend(familia.exportar())
+        for coletor in self._coletores:
+            for familia in coletor():
+                linhas.extend(familia.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+registro = Registro()
+
+# ================================
+# HTTP (middleware)
+# ================================
+http_duracao = registro.registrar(Histograma(
+    "http_requisicao_segundos", "Duração das requisições HTTP por rota.", ("metodo", "rota"), BUCKETS_HTTP
+))
+http_respostas = registro.registrar(Contador(
+    "http_respostas_total", "Respostas HTTP por rota e status.", ("metodo", "rota", "status")
+))
+http_em_andamento = registro.registrar(Medidor(
+    "http_em_andamento", "Requisições HTTP em andamento.", ("metodo",)
+))
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI (sem BaseHTTPMiddleware, que custa uma task por requisição).
+    A rota é o template do FastAPI (ex.: /leituras/{cd_sensor}), para não criar
+    uma série por id; requisições sem rota correspondente ficam em "(sem rota)".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metodo = scope["method"]
+        status = [500]
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                status[0] = mensagem["status"]
+            await send(mensagem)
+
+        http_em_andamento.inc((metodo,))
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            http_em_andamento.dec((metodo,))
+            rota = scope.get("route")
+            rota = getattr(rota, "path", "(sem rota)")
+            http_duracao.observar((metodo, rota), duracao)
+            http_respostas.inc((metodo, rota, str(status[0])))
+
+# ================================
+# CRUD e SQL
+# ================================
+crud_duracao = registro.registrar(Histograma(
+    "crud_segundos", "Duração de cada função do crud.", ("funcao",), BUCKETS_SQL
+))
+crud_sql = registro.registrar(Contador(
+    "crud_sql_segundos_total", "Tempo das funções do crud gasto no SQLite (execute + fetch).", ("funcao",)
+))
+crud_python = registro.registrar(Contador(
+    "crud_python_segundos_total",
+    "Tempo das funções do crud fora do SQLite (modelos pydantic, dicionários, cache).",
+    ("funcao",)
+))
+sql_execucao = registro.registrar(Histograma(
+    "sql_execucao_segundos", "Duração de cada execute/executemany.", ("funcao", "operacao"), BUCKETS_SQL
+))
+sql_leitura = registro.registrar(Contador(
+    "sql_leitura_segundos_total", "Tempo lendo linhas (fetch*) dos resultados.", ("funcao", "operacao")
+))
+sql_linhas = registro.registrar(Contador(
+    "sql_linhas_total", "Linhas lidas (SELECT) ou alteradas (INSERT/UPDATE/DELETE).", ("funcao", "operacao")
+))
+
+# Função do crud em execução nesta thread (rótulo dos comandos SQL)
+_contexto = threading.local()
+SEM_FUNCAO = "-"
+
+
+def registrar_sql(operacao: str, segundos: float, linhas: int, leitura: bool = False) -> None:
+    """Chamado pelo cursor instrumentado (database.CursorMedido)."""
+    medicao = getattr(_contexto, "medicao", None)
+    funcao = medicao.nome if medicao is not None else SEM_FUNCAO
+    if medicao is not None:
+        medicao.sql += segundos
+    if leitura:
+        sql_leitura.inc((funcao, operacao), segundos)
+    else:
+        sql_execucao.observar((funcao, operacao), segundos)
+    if linhas > 0:
+        sql_linhas.inc((funcao, operacao), linhas)
+
+
+class _Medicao:
+    """Acumula tempo total e tempo de SQL de uma função do crud (aninhável)."""
+
+    __slots__ = ("nome", "total", "sql", "_anterior", "_inicio")
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.total = 0.0
+        self.sql = 0.0
+
+    def __enter__(self):
+        self._anterior = getattr(_contexto, "medicao", None)
+        _contexto.medicao = self
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.total += time.perf_counter() - self._inicio
+        _contexto.medicao = self._anterior
+
+    def registrar(self) -> None:
+        crud_duracao.observar((self.nome,), self.total)
+        crud_sql.inc((self.nome,), self.sql)
+        crud_python.inc((self.nome,), max(0.0, self.total - self.sql))
+        # Chamada aninhada: o SQL também conta para a função de fora
+        if self._anterior is not None:
+            self._anterior.sql += self.sql
+
+
+def medir_crud(func):
+    """
+    Decorador das funções públicas do crud. Em funções geradoras (exportação), mede só
+    o trabalho feito dentro de cada next(), não o tempo do consumidor entre os lotes.
+    """
+    nome = func.__name__
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def gerador(*args, **kwargs):
+            medicao = _Medicao(nome)
+            with medicao:
+                iterador = func(*args, **kwargs)
+            try:
+                while True:
+                    with medicao:
+                        try:
+                            item = next(iterador)
+                        except StopIteration:
+                            return
+                    yield item
+            finally:
+                iterador.close()
+                medicao.registrar()
+        return gerador
+
+    @functools.wraps(func)
+    def medida(*args, **kwargs):
+        medicao = _Medicao(nome)
+        try:
+            with medicao:
+                return func(*args, **kwargs)
+        finally:
+            medicao.registrar()
+    return medida
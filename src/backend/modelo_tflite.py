@@ -0,0 +1,421 @@
+# src/backend/modelo_tflite.py
+#
+# Interpretador mínimo de modelos TFLite em NumPy puro (sem TensorFlow), para rodar no
+# servidor o flood_model embutido em esp32-project/flood_model.h em lotes grandes.
+#
+# Lê o flatbuffer direto (schema.fbs do TFLite), converte os pesos em arrays float32
+# (desquantizando os pesos int8) e executa os operadores em ordem, com o lote inteiro
+# em cada multiplicação de matrizes.
+#
+# O flood_model espera 20 atributos por linha (o sketch declara N_INPUTS 2, mas nunca
+# carrega o modelo); o significado dos atributos não está registrado no projeto, então
+# este módulo expõe a inferência genérica (prever) e uma ajuda para janelas deslizantes
+# de uma série (prever_janelas).
+
+import os
+import re
+import struct
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Modelo padrão: o array C usado pelo firmware. Pode ser trocado via FLOOD_SENTINEL_MODELO
+# (arquivo .tflite ou .h).
+MODELO_PATH = os.path.abspath(
+    os.environ.get("FLOOD_SENTINEL_MODELO")
+    or os.path.join(os.path.dirname(__file__), "..", "..", "esp32-project", "flood_model.h")
+)
+
+# Linhas processadas por vez em prever(): mantém as ativações intermediárias no cache
+# da CPU (lotes maiores ficaram mais lentos em bench_modelo_tflite.py)
+LOTE_PADRAO = 4096
+
+# Enums do schema TFLite usados aqui
+_TIPOS_TENSOR = {
+    0: np.float32, 1: np.float16, 2: np.int32, 3: np.uint8,
+    4: np.int64, 6: np.bool_, 7: np.int16, 9: np.int8,
+}
+OP_ADD, OP_DEQUANTIZE, OP_FULLY_CONNECTED, OP_LOGISTIC = 0, 6, 9, 14
+OP_MUL, OP_RELU, OP_RELU6, OP_RESHAPE, OP_SOFTMAX, OP_TANH = 18, 19, 21, 22, 25, 28
+
+_ATIVACOES = {
+    0: lambda x: x,                               # NONE
+    1: lambda x: np.maximum(x, 0, out=x),         # RELU
+    2: lambda x: np.clip(x, -1, 1, out=x),        # RELU_N1_TO_1
+    3: lambda x: np.clip(x, 0, 6, out=x),         # RELU6
+    4: lambda x: np.tanh(x, out=x),               # TANH
+}
+
+
+def _sigmoide(x: np.ndarray) -> np.ndarray:
+    np.negative(x, out=x)
+    with np.errstate(over="ignore"):  # exp(+grande) = inf -> sigmoide 0, como esperado
+        np.exp(x, out=x)
+    x += 1
+    return np.reciprocal(x, out=x)
+
+
+def _softmax(x: np.ndarray, beta: float) -> np.ndarray:
+    x = x * beta
+    x -= x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+def _arredondar(x: np.ndarray) -> np.ndarray:
+    """std::round (metade para longe do zero), usado pelo TFLite; np.round é half-even. In-place."""
+    x += np.copysign(np.float32(0.5), x)
+    return np.trunc(x, out=x)
+
+
+def _quantizar_entrada(xt: np.ndarray, assimetrica: bool):
+    """
+    Quantização int8 por linha da entrada de um FULLY_CONNECTED híbrido, como
+    tensor_utils::{Asymmetric,Symmetric}QuantizeFloats do TFLite.
+
+    Recebe a entrada transposta (atributos, linhas), para que min/max por linha sejam
+    reduções sobre memória contígua. Retorna os valores quantizados já sem o zero
+    point (float32, mesma forma) e a escala de cada linha.
+    """
+    if assimetrica:
+        rmin = np.minimum(xt.min(axis=0), 0).astype(np.float64)
+        rmax = np.maximum(xt.max(axis=0), 0).astype(np.float64)
+        constante = rmin == rmax
+        escala = np.where(constante, 1.0, (rmax - rmin) / 255.0)
+        zp_min, zp_max = -128.0 - rmin / escala, 127.0 - rmax / escala
+        erro_min = 128.0 + np.abs(rmin / escala)
+        erro_max = 127.0 + np.abs(rmax / escala)
+        zp = np.where(erro_min < erro_max, zp_min, zp_max)
+        zp = np.where(zp <= -128, -128.0, np.where(zp >= 127, 127.0, _arredondar(zp)))
+        zp[constante] = 0.0
+        zp = zp.astype(np.float32)
+        escala = escala.astype(np.float32)
+        q = xt * (np.float32(1.0) / escala)
+        q += zp
+        # Limites inteiros: limitar antes de arredondar dá o mesmo resultado
+        np.clip(q, -128, 127, out=q)
+        _arredondar(q)
+        q -= zp
+        if constante.any():
+            q[:, constante] = 0.0
+        return q, escala
+    amplitude = np.abs(xt).max(axis=0)
+    nula = amplitude == 0
+    amplitude[nula] = 127.0
+    escala = np.where(nula, np.float32(1.0), amplitude / np.float32(127.0)).astype(np.float32)
+    q = xt * (np.float32(127.0) / amplitude)
+    np.clip(q, -127, 127, out=q)
+    return _arredondar(q), escala
+
+
+# ================================
+# Leitura do flatbuffer
+# ================================
+class _Tabela:
+    """Tabela de um flatbuffer: acesso aos campos pelo índice do schema."""
+
+    __slots__ = ("buf", "pos", "vtable", "n_campos")
+
+    def __init__(self, buf: bytes, pos: int):
+        self.buf = buf
+        self.pos = pos
+        self.vtable = pos - struct.unpack_from("<i", buf, pos)[0]
+        self.n_campos = (struct.unpack_from("<H", buf, self.vtable)[0] - 4) // 2
+
+    def _offset(self, campo: int) -> int:
+        if campo >= self.n_campos:
+            return 0
+        return struct.unpack_from("<H", self.buf, self.vtable + 4 + 2 * campo)[0]
+
+    def escalar(self, campo: int, formato: str, padrao=0):
+        o = self._offset(campo)
+        return struct.unpack_from("<" + formato, self.buf, self.pos + o)[0] if o else padrao
+
+    def _alvo(self, campo: int) -> Optional[int]:
+        o = self._offset(campo)
+        if not o:
+            return None
+        p = self.pos + o
+        return p + struct.unpack_from("<I", self.buf, p)[0]
+
+    def tabela(self, campo: int) -> Optional["_Tabela"]:
+        p = self._alvo(campo)
+        return _Tabela(self.buf, p) if p is not None else None
+
+    def vetor(self, campo: int, dtype) -> np.ndarray:
+        p = self._alvo(campo)
+        if p is None:
+            return np.empty(0, dtype=dtype)
+        n = struct.unpack_from("<I", self.buf, p)[0]
+        return np.frombuffer(self.buf, dtype=np.dtype(dtype).newbyteorder("<"), count=n, offset=p + 4)
+
+    def tabelas(self, campo: int) -> List["_Tabela"]:
+        p = self._alvo(campo)
+        if p is None:
+            return []
+        n = struct.unpack_from("<I", self.buf, p)[0]
+        itens = []
+        for i in range(n):
+            q = p + 4 + 4 * i
+            itens.append(_Tabela(self.buf, q + struct.unpack_from("<I", self.buf, q)[0]))
+        return itens
+
+    def texto(self, campo: int) -> str:
+        return self.vetor(campo, np.uint8).tobytes().decode("utf-8")
+
+
+def ler_header_c(caminho: str) -> bytes:
+    """Extrai os bytes do primeiro array 'unsigned char x[] = { 0x.., ... }' de um .h."""
+    with open(caminho, encoding="utf-8") as f:
+        texto = f.read()
+    inicio = texto.index("{")
+    corpo = texto[inicio + 1:texto.index("}", inicio)]
+    return bytes(int(h, 16) for h in re.findall(r"0x([0-9a-fA-F]{1,2})", corpo))
+
+
+# ================================
+# Modelo
+# ================================
+class ModeloTFLite:
+    """
+    Grafo do primeiro subgraph do modelo, pronto para inferência em lote.
+
+    Suporta o necessário para redes densas exportadas do Keras: FULLY_CONNECTED (com
+    ativação fundida), ADD, MUL, RESHAPE, DEQUANTIZE, LOGISTIC, RELU, RELU6, TANH e
+    SOFTMAX. Outros operadores geram NotImplementedError na carga, não no meio de
+    uma predição.
+
+    Pesos int8 de FULLY_CONNECTED com entrada float (quantização "dynamic range", como
+    no flood_model) rodam por padrão no modo híbrido do TFLite: cada linha da entrada
+    é quantizada para int8 e o produto é feito com os inteiros, reproduzindo a saída
+    do interpretador oficial (diferenças > 1e-5 só em poucas linhas a cada 100 mil,
+    quando um empate de arredondamento cai diferente, na mesma proporção em que os
+    kernels de referência e otimizado do próprio TFLite divergem entre si). Com
+    hibrido=False, usa os pesos desquantizados em float32 (a rede "ideal", que difere
+    do TFLite pelo erro de quantização da entrada, ~1e-3 no flood_model).
+    """
+
+    def __init__(self, dados: bytes, hibrido: bool = True):
+        if dados[4:8] != b"TFL3":
+            raise ValueError("Conteúdo não é um flatbuffer TFLite (identificador TFL3 ausente).")
+        self._dados = dados
+        modelo = _Tabela(dados, struct.unpack_from("<I", dados, 0)[0])
+        self.versao = modelo.escalar(0, "I")
+        codigos = [
+            max(op.escalar(0, "b"), op.escalar(3, "i"))  # deprecated_builtin_code / builtin_code
+            for op in modelo.tabelas(1)
+        ]
+        buffers = modelo.tabelas(4)
+        subgraph = modelo.tabelas(2)[0]
+
+        self.tensores = subgraph.tabelas(0)
+        self.nomes = [t.texto(3) for t in self.tensores]
+        self.formas = [tuple(int(d) for d in t.vetor(0, np.int32)) for t in self.tensores]
+        self.entradas = [int(i) for i in subgraph.vetor(1, np.int32)]
+        self.saidas = [int(i) for i in subgraph.vetor(2, np.int32)]
+
+        # Tensores constantes (pesos/bias), já em float32 quando quantizados
+        self.constantes: Dict[int, np.ndarray] = {}
+        self.quantizados: Dict[int, tuple] = {}
+        self.hibrido = hibrido
+        for i, tensor in enumerate(self.tensores):
+            dados_tensor = self._dados_do_buffer(buffers[tensor.escalar(2, "I")])
+            if dados_tensor is not None:
+                self.constantes[i], quantizado = self._carregar_constante(
+                    tensor, self.formas[i], dados_tensor
+                )
+                if quantizado is not None:
+                    self.quantizados[i] = quantizado
+
+        self.operadores = []
+        for op in subgraph.tabelas(3):
+            codigo = codigos[op.escalar(0, "I")]
+            entradas = [int(i) for i in op.vetor(1, np.int32)]
+            saidas = [int(i) for i in op.vetor(2, np.int32)]
+            self.operadores.append(self._preparar(codigo, entradas, saidas, op.tabela(4)))
+
+    @classmethod
+    def de_arquivo(cls, caminho: str, hibrido: bool = True) -> "ModeloTFLite":
+        """Carrega de um .tflite ou de um header C com o array do modelo (.h)."""
+        if caminho.endswith((".h", ".hpp", ".cc", ".c")):
+            return cls(ler_header_c(caminho), hibrido)
+        with open(caminho, "rb") as f:
+            return cls(f.read(), hibrido)
+
+    @property
+    def n_entradas(self) -> int:
+        return self.formas[self.entradas[0]][-1]
+
+    # ---------- carga ----------
+
+    def _dados_do_buffer(self, buffer: _Tabela) -> Optional[bytes]:
+        dados = buffer.vetor(0, np.uint8)
+        if dados.size:
+            return dados.tobytes()
+        # Modelos > 2 GB guardam os dados fora do flatbuffer (offset/size a partir do início)
+        offset, tamanho = buffer.escalar(1, "Q"), buffer.escalar(2, "Q")
+        if offset > 1:
+            return self._dados[offset:offset + tamanho]
+        return None
+
+    @staticmethod
+    def _carregar_constante(tensor: _Tabela, forma, dados: bytes):
+        """
+        Retorna (valores, quantizado): 'valores' em float32 quando o tensor é quantizado;
+        'quantizado' = (inteiros como float32, escala por canal do eixo 0) para pesos
+        int8 simétricos, usados pelo FULLY_CONNECTED híbrido; senão None.
+        """
+        tipo = tensor.escalar(1, "b")
+        if tipo not in _TIPOS_TENSOR:
+            raise NotImplementedError(f"Tipo de tensor TFLite não suportado: {tipo}")
+        valores = np.frombuffer(dados, dtype=np.dtype(_TIPOS_TENSOR[tipo]).newbyteorder("<"))
+        valores = valores.reshape(forma) if forma else valores
+        quant = tensor.tabela(4)
+        escalas = quant.vetor(2, np.float32) if quant is not None else np.empty(0)
+        if not (escalas.size and valores.dtype in (np.int8, np.uint8, np.int16, np.int32)):
+            return (valores.astype(np.float32) if valores.dtype == np.float16 else valores), None
+        zeros = quant.vetor(3, np.int64)
+        eixo = quant.escalar(6, "i")  # quantized_dimension
+        forma_escala = [1] * valores.ndim
+        if escalas.size > 1:
+            forma_escala[eixo] = escalas.size
+        escalas = escalas.reshape(forma_escala)
+        zeros = zeros.reshape(forma_escala) if zeros.size == escalas.size else 0
+        inteiros = valores.astype(np.float32)
+        desquantizados = ((inteiros - zeros) * escalas).astype(np.float32)
+        quantizado = None
+        if valores.dtype == np.int8 and valores.ndim == 2 and eixo == 0 and not np.any(zeros):
+            quantizado = (inteiros, np.broadcast_to(escalas.reshape(-1), (valores.shape[0],)))
+        return desquantizados, quantizado
+
+    def _peso(self, indice: int) -> np.ndarray:
+        if indice not in self.constantes:
+            raise NotImplementedError(f"Tensor {self.nomes[indice]!r} deveria ser constante.")
+        return self.constantes[indice]
+
+    def _preparar(self, codigo, entradas, saidas, opcoes: Optional[_Tabela]):
+        """Converte o operador em (função(valores) -> array, índice de saída)."""
+        saida = saidas[0]
+        ativacao_fundida = _ATIVACOES.get(opcoes.escalar(0, "b") if opcoes else 0)
+        if ativacao_fundida is None:
+            raise NotImplementedError(f"Ativação fundida não suportada no operador {codigo}.")
+
+        if codigo == OP_FULLY_CONNECTED:
+            entrada = entradas[0]
+            bias = self._peso(entradas[2]) if len(entradas) > 2 and entradas[2] >= 0 else None
+            if self.hibrido and entradas[1] in self.quantizados:
+                return self._fully_connected_hibrido(
+                    entrada, entradas[1], bias, ativacao_fundida,
+                    assimetrica=bool(opcoes.escalar(3, "b")) if opcoes else False
+                ), saida
+
+            pesos_t = np.ascontiguousarray(self._peso(entradas[1]).T)  # (entradas, saídas)
+            n_in = pesos_t.shape[0]
+
+            def fully_connected(v):
+                y = v[entrada].reshape(-1, n_in) @ pesos_t
+                if bias is not None:
+                    y += bias
+                return ativacao_fundida(y)
+            return fully_connected, saida
+
+        if codigo in (OP_ADD, OP_MUL):
+            a, b = entradas
+            operacao = np.add if codigo == OP_ADD else np.multiply
+
+            def elemento_a_elemento(v):
+                x = v[a] if a in v else self.constantes[a]
+                y = v[b] if b in v else self.constantes[b]
+                return ativacao_fundida(operacao(x, y).astype(np.float32))
+            return elemento_a_elemento, saida
+
+        if codigo == OP_RESHAPE:
+            entrada, forma = entradas[0], self.formas[saida]
+            return (lambda v: v[entrada].reshape((-1,) + forma[1:])), saida
+
+        if codigo == OP_DEQUANTIZE:
+            entrada = entradas[0]
+            if entrada in self.constantes:
+                self.constantes[saida] = self.constantes[entrada]
+                return None, saida
+            raise NotImplementedError("DEQUANTIZE de tensores não constantes não é suportado.")
+
+        simples = {
+            OP_LOGISTIC: _sigmoide,
+            OP_RELU: _ATIVACOES[1],
+            OP_RELU6: _ATIVACOES[3],
+            OP_TANH: _ATIVACOES[4],
+        }
+        if codigo in simples:
+            entrada, funcao = entradas[0], simples[codigo]
+            return (lambda v: funcao(v[entrada].copy())), saida
+
+        if codigo == OP_SOFTMAX:
+            entrada, beta = entradas[0], (opcoes.escalar(0, "f", 1.0) if opcoes else 1.0)
+            return (lambda v: _softmax(v[entrada], beta)), saida
+
+        raise NotImplementedError(f"Operador TFLite não suportado: builtin {codigo}")
+
+    def _fully_connected_hibrido(self, entrada, indice_pesos, bias, ativacao, assimetrica):
+        inteiros, escala_canal = self.quantizados[indice_pesos]
+        n_saidas, n_in = inteiros.shape
+        # Produtos de inteiros somados em float: exatos enquanto cabem na mantissa
+        tipo = np.float32 if 255 * 127 * n_in < 2 ** 24 else np.float64
+        pesos = np.ascontiguousarray(inteiros, dtype=tipo)
+        escala_canal = escala_canal.astype(np.float32)[:, None]
+        bias_coluna = bias[:, None] if bias is not None else None
+
+        def fully_connected(v):
+            # Trabalha com (atributos, linhas); se a entrada veio de outra camada híbrida,
+            # o .T abaixo desfaz o .T da saída dela sem copiar
+            xt = np.ascontiguousarray(v[entrada].reshape(-1, n_in).T)
+            q, escala_linha = _quantizar_entrada(xt, assimetrica)
+            acumulado = (pesos @ q.astype(tipo, copy=False)).astype(np.float32, copy=False)
+            acumulado *= escala_canal * escala_linha
+            if bias_coluna is not None:
+                acumulado += bias_coluna
+            return ativacao(acumulado).T
+        return fully_connected
+
+    # ---------- inferência ----------
+
+    def _executar(self, x: np.ndarray) -> np.ndarray:
+        valores = {self.entradas[0]: x}
+        for funcao, saida in self.operadores:
+            if funcao is not None:
+                valores[saida] = funcao(valores)
+        return valores[self.saidas[0]]
+
+    def prever(self, x, lote: int = LOTE_PADRAO) -> np.ndarray:
+        """
+        Inferência para todas as linhas de 'x' (n, n_entradas), 'lote' linhas por vez.
+        Retorna (n, n_saídas) em float32.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[-1] != self.n_entradas:
+            raise ValueError(f"Esperado {self.n_entradas} atributos por linha, recebido {x.shape[-1]}.")
+        if len(x) <= lote:
+            return self._executar(x)
+        return np.concatenate([self._executar(x[i:i + lote]) for i in range(0, len(x), lote)])
+
+    def prever_janelas(self, serie, lote: int = LOTE_PADRAO) -> np.ndarray:
+        """
+        Pontua um histórico em janelas deslizantes de n_entradas valores consecutivos
+        (sem copiar a série). O i-ésimo resultado corresponde à janela que termina em
+        serie[i + n_entradas - 1].
+        """
+        serie = np.asarray(serie, dtype=np.float32)
+        if len(serie) < self.n_entradas:
+            return np.empty((0, self.formas[self.saidas[0]][-1]), dtype=np.float32)
+        janelas = np.lib.stride_tricks.sliding_window_view(serie, self.n_entradas)
+        return self.prever(janelas, lote)
+
+
+@lru_cache(maxsize=None)
+def carregar_modelo(caminho: str = MODELO_PATH, hibrido: bool = True) -> ModeloTFLite:
+    """Modelo carregado uma vez por processo (por caminho/modo)."""
+    return ModeloTFLite.de_arquivo(caminho, hibrido)
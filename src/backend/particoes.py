@@ -0,0 +1,436 @@
+# src/backend/particoes.py
+#
+# Leituras particionadas por mês: cada mês é um banco SQLite próprio
+# (<PARTICOES_DIR>/leituras_AAAAMM.db, tabela LEITURA_SENSOR) anexado às conexões com
+# ATTACH sob demanda. O banco principal guarda só o catálogo (PARTICAO_LEITURA) e a
+# sequência de cd_leitura (SEQUENCIA), então índices, backups e VACUUM de cada mês são
+# independentes e o arquivo principal não cresce com o histórico.
+#
+# O crud consulta o catálogo e só anexa as partições que cobrem o intervalo de tempo
+# pedido. Meses frios podem ser movidos para Parquet (ver retencao.py); a partir daí
+# saem das consultas de leituras brutas e continuam disponíveis na exportação e nos
+# agregados (LEITURA_AGREGADO fica no banco principal).
+#
+# Uma gravação de leituras é uma transação sobre a partição e o banco principal. Em
+# WAL o commit não é atômico entre bancos anexados: database._reconciliar_particoes
+# corrige no startup a sequência de ids e os agregados de uma gravação interrompida.
+
+import os
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+from urllib.request import pathname2url
+
+from .database import DB_PATH, de_epoch, para_epoch
+
+PARTICOES_DIR = os.path.abspath(
+    os.environ.get("FLOOD_SENTINEL_PARTICOES_DIR")
+    or os.path.splitext(DB_PATH)[0] + "_particoes"
+)
+
+# Estados de uma partição no catálogo
+SQLITE = "sqlite"            # banco do mês ativo, aceita gravações
+ARQUIVANDO = "arquivando"    # sendo copiado para Parquet: só leitura
+PARQUET = "parquet"          # arquivado; o .db do mês foi removido
+
+_DT_MIN = -(2 ** 62)
+_DT_MAX = 2 ** 62
+
+# Mesma estrutura da antiga LEITURA_SENSOR do banco principal. cd_leitura vem de
+# SEQUENCIA (único entre as partições) e não há FK para SENSOR, que fica em outro
+# banco: a existência do sensor é verificada em preparar_gravacao.
+_DDL_PARTICAO = """
+PRAGMA {alias}.journal_mode = WAL;
+
+CREATE TABLE IF NOT EXISTS {alias}.LEITURA_SENSOR (
+    cd_leitura INTEGER PRIMARY KEY,
+    cd_sensor  INTEGER NOT NULL,
+    dt_leitura INTEGER NOT NULL,    -- epoch em microssegundos (UTC)
+    vl_valor   REAL    NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS {alias}.IX_LEITURA_SENSOR_DT
+    ON LEITURA_SENSOR (cd_sensor, dt_leitura, cd_leitura, vl_valor);
+"""
+
+
+class Particao(NamedTuple):
+    cd_mes: int             # AAAAMM
+    dt_inicio: int          # epoch em microssegundos (inclusive)
+    dt_fim: int             # epoch em microssegundos (exclusive)
+    tp_armazenamento: str
+
+    @property
+    def alias(self) -> str:
+        return f"p_{self.cd_mes}"
+
+    @property
+    def tabela(self) -> str:
+        return f"{self.alias}.LEITURA_SENSOR"
+
+    @property
+    def em_sqlite(self) -> bool:
+        return self.tp_armazenamento != PARQUET
+
+    @property
+    def arquivo_sqlite(self) -> str:
+        return os.path.join(PARTICOES_DIR, f"leituras_{self.cd_mes}.db")
+
+    @property
+    def arquivo_parquet(self) -> str:
+        return os.path.join(PARTICOES_DIR, f"leituras_{self.cd_mes}.parquet")
+
+
+def mes_de(dt: int) -> int:
+    """Mês (AAAAMM) de um dt_leitura em epoch."""
+    data = de_epoch(dt)
+    return data.year * 100 + data.month
+
+
+def limites_mes(cd_mes: int) -> Tuple[int, int]:
+    """[início, fim) do mês em epoch (microssegundos)."""
+    ano, mes = divmod(cd_mes, 100)
+    proximo = datetime(ano + 1, 1, 1) if mes == 12 else datetime(ano, mes + 1, 1)
+    return para_epoch(datetime(ano, mes, 1)), para_epoch(proximo)
+
+# ================================
+# Catálogo
+# ================================
+def catalogo(
+    conn: sqlite3.Connection,
+    dt_min: int = _DT_MIN,
+    dt_max: int = _DT_MAX,
+    decrescente: bool = True
+) -> List[Particao]:
+    """Partições com dados no intervalo [dt_min, dt_max], da mais nova para a mais antiga (ou o contrário)."""
+    linhas = conn.execute(
+        f"""
+        SELECT cd_mes, dt_inicio, dt_fim, tp_armazenamento
+          FROM PARTICAO_LEITURA
+         WHERE dt_fim > ? AND dt_inicio <= ?
+         ORDER BY cd_mes {'DESC' if decrescente else 'ASC'}
+        """,
+        (dt_min, dt_max)
+    ).fetchall()
+    return [Particao(*linha) for linha in linhas]
+
+
+def particao(conn: sqlite3.Connection, cd_mes: int) -> Optional[Particao]:
+    linha = conn.execute(
+        "SELECT cd_mes, dt_inicio, dt_fim, tp_armazenamento FROM PARTICAO_LEITURA WHERE cd_mes = ?",
+        (cd_mes,)
+    ).fetchone()
+    return Particao(*linha) if linha is not None else None
+
+# ================================
+# ATTACH por conexão
+# ================================
+class ParticaoIndisponivel(sqlite3.OperationalError):
+    """O .db da partição não existe mais (foi arquivada depois da leitura do catálogo)."""
+
+
+def _anexadas(conn: sqlite3.Connection) -> "OrderedDict[str, None]":
+    # Partições anexadas a esta conexão, da usada há mais tempo para a mais recente
+    anexadas = getattr(conn, "_particoes_anexadas", None)
+    if anexadas is None:
+        anexadas = conn._particoes_anexadas = OrderedDict()
+    return anexadas
+
+
+def capacidade(conn: sqlite3.Connection) -> int:
+    """Quantos bancos podem ficar anexados de uma vez (SQLITE_LIMIT_ATTACHED, 10 por padrão)."""
+    return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+
+
+def anexar(conn: sqlite3.Connection, part: Particao, criar: bool = False) -> str:
+    """
+    Anexa a partição à conexão (se ainda não estiver) e devolve o nome qualificado da
+    tabela. Acima do limite de bancos anexados, desanexa a usada há mais tempo.
+    ATTACH/DETACH não são permitidos dentro de transação: quem grava anexa antes do
+    primeiro comando de escrita.
+    """
+    anexadas = _anexadas(conn)
+    if part.alias in anexadas:
+        anexadas.move_to_end(part.alias)
+        return part.tabela
+    while len(anexadas) >= capacidade(conn):
+        antiga, _ = anexadas.popitem(last=False)
+        conn.execute(f"DETACH DATABASE {antiga}")
+    # mode=rw: uma partição arquivada (arquivo removido) não é recriada vazia
+    uri = f"file:{pathname2url(part.arquivo_sqlite)}?mode={'rwc' if criar else 'rw'}"
+    try:
+        conn.execute(f"ATTACH DATABASE ? AS {part.alias}", (uri,))
+    except sqlite3.OperationalError as e:
+        if not criar and not os.path.exists(part.arquivo_sqlite):
+            raise ParticaoIndisponivel(f"Partição {part.cd_mes} indisponível: {e}") from None
+        raise
+    # synchronous vale por banco anexado (o do principal não se aplica aqui)
+    conn.execute(f"PRAGMA {part.alias}.synchronous = NORMAL")
+    anexadas[part.alias] = None
+    return part.tabela
+
+
+def _desanexar_obsoletas(conn: sqlite3.Connection, vigentes: Iterable[Particao]) -> None:
+    """Solta partições anexadas que já foram arquivadas (libera os arquivos removidos)."""
+    anexadas = _anexadas(conn)
+    if not anexadas or conn.in_transaction:
+        return
+    em_sqlite = {p.alias for p in vigentes if p.em_sqlite}
+    for alias in [a for a in anexadas if a not in em_sqlite]:
+        del anexadas[alias]
+        conn.execute(f"DETACH DATABASE {alias}")
+
+
+def tabelas(
+    conn: sqlite3.Connection,
+    dt_min: int = _DT_MIN,
+    dt_max: int = _DT_MAX,
+    decrescente: bool = True
+) -> Iterator[str]:
+    """
+    Tabelas das partições em SQLite que cobrem [dt_min, dt_max], na ordem pedida,
+    anexadas uma a uma. Quem consome deve terminar a consulta de uma tabela antes de
+    pedir a próxima (a próxima pode desanexar a anterior).
+    """
+    todas = catalogo(conn, decrescente=decrescente)
+    _desanexar_obsoletas(conn, todas)
+    for part in todas:
+        if not part.em_sqlite or part.dt_fim <= dt_min or part.dt_inicio > dt_max:
+            continue
+        try:
+            yield anexar(conn, part)
+        except ParticaoIndisponivel:
+            # Arquivada enquanto a consulta rodava: os dados agora estão no Parquet
+            continue
+
+# ================================
+# Gravação
+# ================================
+Destino = Union[str, sqlite3.Error]
+
+
+class MesArquivado(sqlite3.IntegrityError):
+    """Leitura de um mês já arquivado em Parquet: o período não aceita mais gravações."""
+
+    def __init__(self, cd_mes):
+        super().__init__(f"Mês {cd_mes} arquivado: leituras desse período não são mais aceitas.")
+
+
+class LoteExcedeMeses(sqlite3.OperationalError):
+    """Lote com leituras de mais meses do que cabem anexados em uma transação."""
+
+# Caches do caminho de gravação, que evitam consultas a cada lote. Um mês só sai do
+# estado 'sqlite' para ser arquivado, o que abrir_gravacao verifica dentro da
+# transação; sensores apagados saem do conjunto em expurgar_removidos, chamada antes
+# de cada gravação.
+_sensores_conhecidos: Set[int] = set()
+_meses_sqlite: Dict[int, Particao] = {}
+
+
+def criar_particao(conn: sqlite3.Connection, cd_mes: int) -> Particao:
+    """Cria (se preciso) o banco do mês, anexa e registra no catálogo. Fora de transação."""
+    dt_inicio, dt_fim = limites_mes(cd_mes)
+    part = Particao(cd_mes, dt_inicio, dt_fim, SQLITE)
+    os.makedirs(PARTICOES_DIR, exist_ok=True)
+    anexar(conn, part, criar=True)
+    conn.executescript(_DDL_PARTICAO.format(alias=part.alias))
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO PARTICAO_LEITURA (cd_mes, dt_inicio, dt_fim, tp_armazenamento)
+        VALUES (?, ?, ?, ?)
+        """,
+        part
+    )
+    conn.commit()
+    return part
+
+
+def preparar_gravacao(
+    conn: sqlite3.Connection,
+    linhas: Sequence[Tuple[int, int, float]],
+    parcial: bool = True
+) -> List[Destino]:
+    """
+    Destino de cada leitura (cd_sensor, dt_epoch, valor): a tabela da partição do mês,
+    já criada e anexada, ou o erro que impede a gravação (sensor inexistente, mês
+    arquivado, lote com meses demais para anexar de uma vez). Chamada antes de abrir a
+    transação; abrir_gravacao revalida o catálogo já dentro dela. Com parcial=False,
+    um lote com meses demais levanta LoteExcedeMeses sem gravar nada.
+    """
+    if not linhas:
+        return []
+    desconhecidos = sorted({cd_sensor for cd_sensor, _, _ in linhas} - _sensores_conhecidos)
+    if desconhecidos:
+        _sensores_conhecidos.update(
+            row[0] for row in conn.execute(
+                f"SELECT cd_sensor FROM SENSOR WHERE cd_sensor IN ({', '.join('?' for _ in desconhecidos)})",
+                desconhecidos
+            ).fetchall()
+        )
+    meses = [mes_de(dt) for _, dt, _ in linhas]
+    limite = capacidade(conn)
+    if not parcial and len(set(meses)) > limite:
+        raise LoteExcedeMeses(
+            f"Lote com leituras de {len(set(meses))} meses; o limite é {limite}: divida o lote."
+        )
+    # Mais recentes primeiro: se o lote passar do limite de ATTACH, ficam de fora os meses antigos
+    tabelas_mes = {}
+    erros_mes = {}
+    for cd_mes in sorted(set(meses), reverse=True):
+        part = _meses_sqlite.get(cd_mes) or particao(conn, cd_mes)
+        if part is not None and part.tp_armazenamento != SQLITE:
+            erros_mes[cd_mes] = MesArquivado(cd_mes)
+        elif len(tabelas_mes) >= limite:
+            erros_mes[cd_mes] = LoteExcedeMeses(
+                f"Lote com leituras de mais de {limite} meses: divida o lote."
+            )
+        else:
+            if part is None:
+                part = criar_particao(conn, cd_mes)
+            try:
+                tabelas_mes[cd_mes] = anexar(conn, part)
+            except ParticaoIndisponivel:
+                # Arquivado (por outro processo ou depois de entrar no cache)
+                _meses_sqlite.pop(cd_mes, None)
+                erros_mes[cd_mes] = MesArquivado(cd_mes)
+                continue
+            _meses_sqlite[cd_mes] = part
+    return [
+        sqlite3.IntegrityError("FOREIGN KEY constraint failed") if cd_sensor not in _sensores_conhecidos
+        else erros_mes.get(cd_mes) or tabelas_mes[cd_mes]
+        for (cd_sensor, _, _), cd_mes in zip(linhas, meses)
+    ]
+
+
+def abrir_gravacao(cursor: sqlite3.Cursor, destinos: List[Destino]) -> Tuple[int, List[Destino]]:
+    """
+    Primeiro comando da transação de gravação. Reserva um cd_leitura para cada destino
+    válido e, no mesmo comando, revalida no catálogo que as partições de destino ainda
+    aceitam gravações: um arquivamento iniciado depois de preparar_gravacao transforma
+    os itens daquele mês em erro. O UPDATE pega o lock de escrita do banco principal,
+    o que serializa gravadores e o arquivamento (ver retencao.py).
+    Devolve o primeiro id reservado e os destinos revalidados.
+    """
+    meses = sorted({int(d[2:8]) for d in destinos if isinstance(d, str)})
+    cursor.execute(
+        f"""
+        UPDATE SEQUENCIA SET nr_ultimo = nr_ultimo + ?
+         WHERE nm_tabela = 'LEITURA_SENSOR'
+        RETURNING nr_ultimo,
+                  (SELECT group_concat(cd_mes)
+                     FROM PARTICAO_LEITURA
+                    WHERE tp_armazenamento = ?
+                      AND cd_mes IN ({', '.join('?' for _ in meses)}))
+        """,
+        (sum(isinstance(d, str) for d in destinos), SQLITE, *meses)
+    )
+    ultimo, abertos = cursor.fetchone()
+    abertos = {int(cd_mes) for cd_mes in abertos.split(",")} if abertos else set()
+    for cd_mes in meses:
+        if cd_mes not in abertos:
+            _meses_sqlite.pop(cd_mes, None)
+    quantidade = sum(isinstance(d, str) for d in destinos)
+    return ultimo - quantidade + 1, [
+        d if not isinstance(d, str) or int(d[2:8]) in abertos
+        else MesArquivado(d[2:8])
+        for d in destinos
+    ]
+
+# ================================
+# Sensores removidos
+# ================================
+def expurgar_removidos(conn: sqlite3.Connection) -> List[int]:
+    """
+    Apaga das partições em SQLite as leituras dos sensores em SENSOR_REMOVIDO
+    (preenchida por trigger a cada DELETE em SENSOR, inclusive em cascata de LOCAL) e
+    devolve esses sensores. Sem pendências, custa uma consulta a uma tabela vazia.
+    Fora de transação; uma transação por partição, e a pendência só sai da tabela no
+    fim, então uma execução interrompida é refeita na próxima chamada. Meses já em
+    Parquet mantêm as linhas no arquivo, mas a exportação só percorre sensores
+    cadastrados.
+    """
+    removidos = [row[0] for row in conn.execute("SELECT cd_sensor FROM SENSOR_REMOVIDO").fetchall()]
+    if not removidos:
+        return []
+    marcadores = ", ".join("?" for _ in removidos)
+    for part in catalogo(conn):
+        if not part.em_sqlite:
+            continue
+        try:
+            tabela = anexar(conn, part)
+        except ParticaoIndisponivel:
+            continue
+        conn.execute(f"DELETE FROM {tabela} WHERE cd_sensor IN ({marcadores})", removidos)
+        conn.commit()
+    conn.execute(f"DELETE FROM SENSOR_REMOVIDO WHERE cd_sensor IN ({marcadores})", removidos)
+    conn.commit()
+    _sensores_conhecidos.difference_update(removidos)
+    return removidos
+
+
+def registrar_orfaos(conn: sqlite3.Connection) -> None:
+    """
+    Migração v5 -> v6: registra em SENSOR_REMOVIDO os sensores que têm leituras nas
+    partições em SQLite mas não estão mais em SENSOR (apagados antes do trigger).
+    """
+    for part in catalogo(conn):
+        if not part.em_sqlite:
+            continue
+        try:
+            tabela = anexar(conn, part)
+        except ParticaoIndisponivel:
+            continue
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO main.SENSOR_REMOVIDO (cd_sensor)
+            SELECT DISTINCT cd_sensor FROM {tabela}
+             WHERE cd_sensor NOT IN (SELECT cd_sensor FROM main.SENSOR)
+            """
+        )
+        conn.commit()
+
+# ================================
+# Migração v2 -> v3 (chamada por database.init_db)
+# ================================
+def migrar_leituras_para_particoes(conn: sqlite3.Connection) -> None:
+    """
+    Move LEITURA_SENSOR do banco principal para as partições mensais, preservando os
+    cd_leitura, e inicia SEQUENCIA a partir do maior id já usado. Um mês por transação;
+    interrompida, pode ser executada de novo (INSERT OR IGNORE) até o DROP final.
+    """
+    ultimo = conn.execute(
+        """
+        SELECT MAX(COALESCE((SELECT MAX(cd_leitura) FROM LEITURA_SENSOR), 0),
+                   COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'LEITURA_SENSOR'), 0))
+        """
+    ).fetchone()[0]
+    meses = [
+        row[0] for row in conn.execute(
+            """
+            SELECT DISTINCT CAST(strftime('%Y%m', dt_leitura / 1000000, 'unixepoch') AS INTEGER)
+              FROM LEITURA_SENSOR
+            """
+        ).fetchall()
+    ]
+    for cd_mes in sorted(meses):
+        part = criar_particao(conn, cd_mes)
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO {part.tabela} (cd_leitura, cd_sensor, dt_leitura, vl_valor)
+            SELECT cd_leitura, cd_sensor, dt_leitura, vl_valor
+              FROM main.LEITURA_SENSOR
+             WHERE dt_leitura >= ? AND dt_leitura < ?
+            """,
+            (part.dt_inicio, part.dt_fim)
+        )
+        conn.commit()
+    conn.execute(
+        """
+        INSERT INTO SEQUENCIA (nm_tabela, nr_ultimo) VALUES ('LEITURA_SENSOR', ?)
+        ON CONFLICT (nm_tabela) DO UPDATE SET nr_ultimo = MAX(nr_ultimo, excluded.nr_ultimo)
+        """,
+        (ultimo,)
+    )
+    conn.execute("DROP TABLE main.LEITURA_SENSOR")
+    conn.commit()
@@ -0,0 +1,243 @@
+# src/backend/regras.py
+
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from .database import de_epoch
+
+# Arquivo de regras (por tp_sensor). Pode ser trocado via FLOOD_SENTINEL_REGRAS.
+REGRAS_PATH = os.path.abspath(
+    os.environ.get("FLOOD_SENTINEL_REGRAS")
+    or os.path.join(os.path.dirname(__file__), "regras_alerta.json")
+)
+
+# cd_usuario gravado nos alertas gerados automaticamente
+USUARIO_SISTEMA = 0
+
+# (dt_alerta, tp_nivel, tp_origem, ds_obs, cd_area, cd_usuario), pronto para o INSERT
+AlertaGerado = Tuple[int, str, str, str, int, int]
+
+
+# ================================
+# Regras
+# ================================
+class Regra(ABC):
+    """
+    Regra avaliada a cada leitura de um sensor. O estado de cada regra por sensor é
+    uma lista curta de tamanho fixo (O(1)), criada por novo_estado().
+    Os alertas são disparados na borda: só quando a condição passa de falsa para
+    verdadeira, e não a cada leitura enquanto ela continua verdadeira.
+    """
+
+    def __init__(self, nome: str, nivel: str):
+        self.nome = nome
+        self.nivel = nivel
+
+    @property
+    def origem(self) -> str:
+        return f"REGRA:{self.nome}"
+
+    def novo_estado(self) -> list:
+        return [False]  # [ativa]
+
+    @abstractmethod
+    def condicao(self, estado: list, dt: int, valor: float, anterior) -> Optional[str]:
+        """Descrição do que a leitura viola, ou None. Pode atualizar o estado da regra."""
+
+    def avaliar(self, estado: list, dt: int, valor: float, anterior) -> Optional[str]:
+        descricao = self.condicao(estado, dt, valor, anterior)
+        disparou = descricao is not None and not estado[0]
+        estado[0] = descricao is not None
+        return descricao if disparou else None
+
+
+class RegraLimite(Regra):
+    """
+    Valor acima de 'acima' e/ou abaixo de 'abaixo' (ou menor ou igual a
+    'abaixo_ou_igual', como o 't <= 5.0' de handledht22 no sketch).
+    """
+
+    def __init__(self, nome, nivel, acima=None, abaixo=None, abaixo_ou_igual=None):
+        super().__init__(nome, nivel)
+        if acima is None and abaixo is None and abaixo_ou_igual is None:
+            raise ValueError(f"Regra {nome}: informe 'acima', 'abaixo' e/ou 'abaixo_ou_igual'.")
+        self.acima = acima
+        self.abaixo = abaixo
+        self.abaixo_ou_igual = abaixo_ou_igual
+
+    def condicao(self, estado, dt, valor, anterior):
+        if self.acima is not None and valor > self.acima:
+            return f"{valor:g} > {self.acima:g}"
+        if self.abaixo is not None and valor < self.abaixo:
+            return f"{valor:g} < {self.abaixo:g}"
+        if self.abaixo_ou_igual is not None and valor <= self.abaixo_ou_igual:
+            return f"{valor:g} <= {self.abaixo_ou_igual:g}"
+        return None
+
+
+class RegraVariacao(Regra):
+    """Taxa de variação em relação à leitura anterior maior que 'max_por_minuto' (em módulo)."""
+
+    def __init__(self, nome, nivel, max_por_minuto):
+        super().__init__(nome, nivel)
+        self.max_por_minuto = float(max_por_minuto)
+
+    def condicao(self, estado, dt, valor, anterior):
+        if anterior is None or dt <= anterior[0]:
+            return None
+        taxa = (valor - anterior[1]) / ((dt - anterior[0]) / 60_000_000)
+        if abs(taxa) > self.max_por_minuto:
+            return f"variação de {taxa:+.3g}/min (limite {self.max_por_minuto:g}/min)"
+        return None
+
+
+class RegraSustentada(Regra):
+    """
+    Valor acima de 'acima' em todas as leituras dos últimos 'janela_s' segundos.
+    Guarda apenas o instante em que a sequência atual acima do limite começou.
+    """
+
+    def __init__(self, nome, nivel, acima, janela_s):
+        super().__init__(nome, nivel)
+        self.acima = float(acima)
+        self.janela_us = int(float(janela_s) * 1_000_000)
+
+    def novo_estado(self):
+        return [False, None]  # [ativa, início da sequência acima do limite]
+
+    def condicao(self, estado, dt, valor, anterior):
+        if valor <= self.acima:
+            estado[1] = None
+            return None
+        if estado[1] is None:
+            estado[1] = dt
+        if dt - estado[1] >= self.janela_us:
+            return f"acima de {self.acima:g} há {(dt - estado[1]) // 1_000_000}s"
+        return None
+
+
+TIPOS_REGRA = {
+    "limite": RegraLimite,
+    "variacao": RegraVariacao,
+    "sustentado": RegraSustentada,
+}
+
+
+def carregar_regras(caminho: str = REGRAS_PATH) -> Dict[str, List[Regra]]:
+    """
+    Lê o JSON {tp_sensor: [ {nome, tipo, nivel, ...parâmetros}, ... ]}.
+    Arquivo ausente = nenhuma regra (o motor fica inativo).
+    """
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        bruto = json.load(f)
+    regras = {}
+    for tp_sensor, lista in bruto.items():
+        regras[tp_sensor] = []
+        for cfg in lista:
+            cfg = dict(cfg)
+            tipo = cfg.pop("tipo")
+            if tipo not in TIPOS_REGRA:
+                raise ValueError(f"Tipo de regra desconhecido: {tipo!r} ({tp_sensor})")
+            regras[tp_sensor].append(TIPOS_REGRA[tipo](**cfg))
+    return regras
+
+
+# ================================
+# Motor
+# ================================
+class MotorRegras:
+    """
+    Avalia, em memória, cada leitura gravada contra as regras do tipo do sensor e
+    devolve os alertas a inserir. Não consulta o histórico: o estado de cada sensor
+    (última leitura + estado de cada regra) é atualizado leitura a leitura.
+    """
+
+    def __init__(self, regras_por_tipo: Dict[str, List[Regra]]):
+        self.regras_por_tipo = regras_por_tipo
+        self._sensores: Dict[int, Tuple[str, Optional[str], int]] = {}
+        self._estados: Dict[int, list] = {}
+        self._lock = threading.Lock()
+
+    def _carregar_sensores(self, cursor: sqlite3.Cursor) -> None:
+        cursor.execute("SELECT cd_sensor, tp_sensor, nm_modelo, cd_area FROM SENSOR")
+        self._sensores = {row[0]: (row[1], row[2], row[3]) for row in cursor.fetchall()}
+
+    def avaliar(self, cursor: sqlite3.Cursor, leituras, anteriores: Optional[dict] = None) -> List[AlertaGerado]:
+        """
+        'leituras': tuplas (cd_sensor, dt_epoch, vl_valor) já gravadas. Leituras mais
+        antigas que a última vista do sensor não alteram o estado das regras.
+        Em 'anteriores' fica uma cópia do estado de cada sensor antes da primeira
+        alteração, para restaurar() se a transação das leituras não for commitada.
+        """
+        if not self.regras_por_tipo:
+            return []
+        alertas = []
+        with self._lock:
+            if any(cd_sensor not in self._sensores for cd_sensor, _, _ in leituras):
+                self._carregar_sensores(cursor)
+            for cd_sensor, dt, valor in sorted(leituras, key=lambda l: l[1]):
+                sensor = self._sensores.get(cd_sensor)
+                if sensor is None:
+                    continue
+                tp_sensor, nm_modelo, cd_area = sensor
+                regras = self.regras_por_tipo.get(tp_sensor)
+                if not regras:
+                    continue
+                estado = self._estados.get(cd_sensor)
+                if anteriores is not None and cd_sensor not in anteriores:
+                    anteriores[cd_sensor] = (
+                        None if estado is None else [estado[0], [list(e) for e in estado[1]]]
+                    )
+                if estado is None:
+                    estado = self._estados[cd_sensor] = [None, [r.novo_estado() for r in regras]]
+                anterior = estado[0]
+                if anterior is not None and dt < anterior[0]:
+                    continue
+                for regra, estado_regra in zip(regras, estado[1]):
+                    descricao = regra.avaliar(estado_regra, dt, valor, anterior)
+                    if descricao is not None:
+                        alertas.append((
+                            dt,
+                            regra.nivel,
+                            regra.origem,
+                            f"{tp_sensor} ({nm_modelo or 'sensor'} #{cd_sensor}): {descricao} "
+                            f"em {de_epoch(dt):%Y-%m-%d %H:%M:%S}",
+                            cd_area,
+                            USUARIO_SISTEMA
+                        ))
+                estado[0] = (dt, valor)
+        return alertas
+
+    def restaurar(self, anteriores: dict) -> None:
+        """
+        Desfaz as alterações de avaliar() de uma transação que falhou (rollback): sem
+        isso, uma regra ficaria "ativa" e não dispararia de novo para a mesma condição.
+        Chamada antes de a transação liberar o lock de escrita, então nenhuma outra
+        avaliação acontece no meio.
+        """
+        with self._lock:
+            for cd_sensor, estado in anteriores.items():
+                if estado is None:
+                    self._estados.pop(cd_sensor, None)
+                else:
+                    self._estados[cd_sensor] = estado
+
+
+_motor: Optional[MotorRegras] = None
+_motor_lock = threading.Lock()
+
+
+def motor() -> MotorRegras:
+    """Motor do processo, com as regras carregadas de REGRAS_PATH no primeiro uso."""
+    global _motor
+    if _motor is None:
+        with _motor_lock:
+            if _motor is None:
+                _motor = MotorRegras(carregar_regras())
+    return _motor
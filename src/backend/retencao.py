@@ -0,0 +1,236 @@
+# src/backend/retencao.py
+#
+# Retenção das partições mensais de leituras (ver particoes.py): meses mais antigos que
+# os MESES_QUENTES mais recentes são copiados para Parquet (colunar, compressão zstd) e
+# o .db do mês é removido. O mês arquivado sai das listagens de leituras brutas, mas
+# continua na exportação (crud.iterar_leituras_export lê o Parquet) e nos agregados
+# (LEITURA_AGREGADO fica no banco principal e não é tocado).
+#
+# pyarrow é dependência opcional: só é importado ao arquivar ou ler um mês arquivado.
+#
+# Para arquivar sem subir a API:
+#   cd src && python -m backend.retencao --meses-quentes 3
+
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from urllib.request import pathname2url
+
+from . import particoes
+from .cache_leituras import cache_leituras
+from .database import conexao, init_db
+from .particoes import ARQUIVANDO, PARQUET, Particao
+
+# Meses mantidos em SQLite, contando o corrente; 0 desliga o arquivamento automático
+MESES_QUENTES = int(os.environ.get("FLOOD_SENTINEL_MESES_QUENTES", "0"))
+# Intervalo entre as verificações da tarefa de retenção
+INTERVALO_S = float(os.environ.get("FLOOD_SENTINEL_RETENCAO_INTERVALO_S", str(6 * 3600)))
+
+# Linhas por row group do Parquet (cada grupo guarda min/max de cd_sensor e dt_leitura,
+# o que permite pular grupos ao filtrar um sensor)
+LINHAS_POR_GRUPO = 128 * 1024
+
+
+def _esquema():
+    import pyarrow as pa
+    return pa.schema([
+        ("cd_leitura", pa.int64()),
+        ("cd_sensor", pa.int64()),
+        ("dt_leitura", pa.timestamp("us", tz="UTC")),   # mesmo epoch em microssegundos do SQLite
+        ("vl_valor", pa.float64()),
+    ])
+
+
+class ArquivamentoInterrompido(Exception):
+    """Pedido de parada durante a cópia: a partição volta a 'sqlite', intacta."""
+
+
+def arquivar_particao(cd_mes: int, parar: Optional[threading.Event] = None) -> int:
+    """
+    Move o mês para Parquet e devolve o número de leituras arquivadas.
+
+    1. Marca a partição como 'arquivando': novas gravações do mês passam a ser
+       recusadas. O UPDATE no banco principal espera os gravadores em curso, que
+       seguram o lock de escrita dele até o commit (particoes.abrir_gravacao);
+    2. copia o .db para <mês>.parquet.tmp, ordenado por sensor e data, e renomeia;
+    3. marca como 'parquet' no catálogo e remove o .db.
+    Interrompido em qualquer ponto, pode ser executado de novo. Com 'parar' sinalizado,
+    a cópia para entre dois row groups, descarta o .tmp, devolve a partição ao estado
+    'sqlite' e levanta ArquivamentoInterrompido (o encerramento da API não espera o mês
+    inteiro).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    with conexao() as conn:
+        part = particoes.particao(conn, cd_mes)
+        if part is None or part.tp_armazenamento == PARQUET:
+            return 0
+        conn.execute(
+            "UPDATE PARTICAO_LEITURA SET tp_armazenamento = ? WHERE cd_mes = ?",
+            (ARQUIVANDO, cd_mes)
+        )
+        conn.commit()
+
+    esquema = _esquema()
+    temporario = part.arquivo_parquet + ".tmp"
+    total = 0
+    origem = sqlite3.connect(f"file:{pathname2url(part.arquivo_sqlite)}?mode=rw", uri=True)
+    interrompido = False
+    try:
+        cursor = origem.execute(
+            """
+            SELECT cd_leitura, cd_sensor, dt_leitura, vl_valor
+              FROM LEITURA_SENSOR
+             ORDER BY cd_sensor, dt_leitura, cd_leitura
+            """
+        )
+        with pq.ParquetWriter(temporario, esquema, compression="zstd") as escritor:
+            while True:
+                if parar is not None and parar.is_set():
+                    interrompido = True
+                    break
+                linhas = cursor.fetchmany(LINHAS_POR_GRUPO)
+                if not linhas:
+                    break
+                escritor.write_table(pa.table(
+                    [pa.array(coluna, type=campo.type) for coluna, campo in zip(zip(*linhas), esquema)],
+                    schema=esquema
+                ))
+                total += len(linhas)
+    finally:
+        origem.close()
+    if interrompido:
+        os.remove(temporario)
+        with conexao() as conn:
+            conn.execute(
+                "UPDATE PARTICAO_LEITURA SET tp_armazenamento = ? WHERE cd_mes = ? AND tp_armazenamento = ?",
+                (particoes.SQLITE, cd_mes, ARQUIVANDO)
+            )
+            conn.commit()
+        raise ArquivamentoInterrompido(f"Arquivamento do mês {cd_mes} interrompido.")
+    if pq.read_metadata(temporario).num_rows != total:
+        raise RuntimeError(f"Parquet do mês {cd_mes} incompleto; partição mantida em SQLite.")
+    os.replace(temporario, part.arquivo_parquet)
+
+    with conexao() as conn:
+        conn.execute(
+            "UPDATE PARTICAO_LEITURA SET tp_armazenamento = ?, qt_leituras = ? WHERE cd_mes = ?",
+            (PARQUET, total, cd_mes)
+        )
+        conn.commit()
+    # O mês também sai das listagens servidas pela memória
+    cache_leituras.descartar_periodo(part.dt_inicio, part.dt_fim)
+    # Conexões que ainda têm o .db anexado o soltam na próxima consulta (particoes.tabelas)
+    for sufixo in ("", "-wal", "-shm"):
+        try:
+            os.remove(part.arquivo_sqlite + sufixo)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Não foi possível remover {part.arquivo_sqlite + sufixo}:", e)
+    return total
+
+
+def meses_frios(meses_quentes: int, agora: Optional[datetime] = None) -> List[int]:
+    """Partições ainda em SQLite anteriores aos 'meses_quentes' meses mais recentes."""
+    agora = agora or datetime.now(timezone.utc)
+    indice = agora.year * 12 + agora.month - 1 - (meses_quentes - 1)
+    primeiro_quente = (indice // 12) * 100 + indice % 12 + 1
+    with conexao() as conn:
+        return [
+            row[0] for row in conn.execute(
+                """
+                SELECT cd_mes FROM PARTICAO_LEITURA
+                 WHERE tp_armazenamento != ? AND cd_mes < ?
+                 ORDER BY cd_mes
+                """,
+                (PARQUET, primeiro_quente)
+            ).fetchall()
+        ]
+
+
+def arquivar_frias(meses_quentes: int = MESES_QUENTES,
+                   parar: Optional[threading.Event] = None) -> List[Tuple[int, int]]:
+    """Arquiva todos os meses frios; devolve (cd_mes, leituras) de cada um."""
+    if meses_quentes <= 0:
+        return []
+    return [(cd_mes, arquivar_particao(cd_mes, parar)) for cd_mes in meses_frios(meses_quentes)]
+
+
+def ler_leituras(part: Particao, cd_sensor: int, dt_min: int, dt_max: int,
+                 lote: int) -> Iterator[Tuple[int, int, float]]:
+    """
+    (cd_leitura, dt_epoch, vl_valor) do sensor em um mês arquivado, em ordem cronológica.
+    O filtro é aplicado na leitura do Parquet: só os row groups que podem conter o
+    sensor e o período são lidos.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    tipo_dt = pa.timestamp("us", tz="UTC")
+    filtro = (
+        (ds.field("cd_sensor") == cd_sensor)
+        & (ds.field("dt_leitura") >= pa.scalar(max(dt_min, part.dt_inicio), tipo_dt))
+        & (ds.field("dt_leitura") <= pa.scalar(min(dt_max, part.dt_fim), tipo_dt))
+    )
+    dataset = ds.dataset(part.arquivo_parquet, format="parquet")
+    for bloco in dataset.to_batches(
+        columns=["cd_leitura", "dt_leitura", "vl_valor"], filter=filtro, batch_size=lote, use_threads=False
+    ):
+        yield from zip(
+            bloco.column(0).to_pylist(),
+            bloco.column(1).cast(pa.int64()).to_pylist(),
+            bloco.column(2).to_pylist()
+        )
+
+
+class TarefaRetencao:
+    """Thread que arquiva os meses frios a cada 'intervalo_s' (não inicia com meses_quentes <= 0)."""
+
+    def __init__(self, meses_quentes: int, intervalo_s: float):
+        self.meses_quentes = meses_quentes
+        self.intervalo_s = intervalo_s
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        if self.meses_quentes <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="retencao-leituras", daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        """Sinaliza a parada e espera a thread (um arquivamento em curso para no próximo row group)."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _executar(self) -> None:
+        while not self._parar.is_set():
+            try:
+                for cd_mes, total in arquivar_frias(self.meses_quentes, self._parar):
+                    print(f"Mês {cd_mes} arquivado em Parquet ({total} leituras).")
+            except ArquivamentoInterrompido:
+                break
+            except Exception as e:
+                print("Falha ao arquivar partições de leituras:", e)
+            self._parar.wait(self.intervalo_s)
+
+
+tarefa_retencao = TarefaRetencao(MESES_QUENTES, INTERVALO_S)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arquiva em Parquet as partições de leituras frias")
+    parser.add_argument("--meses-quentes", type=int, default=MESES_QUENTES or 3,
+                        help="meses mantidos em SQLite, contando o corrente")
+    args = parser.parse_args()
+    init_db()
+    for cd_mes, total in arquivar_frias(args.meses_quentes):
+        print(f"{cd_mes}: {total} leituras -> {Particao(cd_mes, 0, 0, PARQUET).arquivo_parquet}")
@@ -0,0 +1,128 @@
+# src/backend/risco.py
+#
+# Porte vetorizado (NumPy) de run_model_simulado(temp, hum), de esp32-project/sketch.ino,
+# para pontuar no servidor lotes de pares (temperatura, umidade) e séries históricas.
+#
+# NumPy fica fora do grafo de importação de backend.app (ver scripts/benchmarks/bench_startup.py):
+# este módulo só é importado quando um endpoint de risco é chamado.
+
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from .database import conexao, para_epoch, BUCKETS_AGREGADO
+
+# Pesos do sketch: (hum/100 * 0.7 + temp/50 * 0.3) * 1.2, já combinados
+_PESO_UMIDADE = np.float32(0.7 * 1.2 / 100.0)
+_PESO_TEMPERATURA = np.float32(0.3 * 1.2 / 50.0)
+
+# Classificação dos sensores da área pelo tp_sensor / nm_modelo (sem diferenciar maiúsculas)
+_CHAVES_TEMPERATURA = ("temp",)
+_CHAVES_UMIDADE = ("umid", "hum")
+
+
+def calcular_risco(temp, hum) -> np.ndarray:
+    """
+    Risco de alagamento em [0, 1] para cada par (temp °C, hum %), em float32 como no ESP32.
+    Aceita escalares, listas ou arrays (com broadcasting) e devolve um np.ndarray.
+
+    Observação: a assinatura é a da função no sketch (temp, hum); a chamada em loop()
+    passa (h, t) invertidos.
+    """
+    t = np.asarray(temp, dtype=np.float32)
+    h = np.asarray(hum, dtype=np.float32)
+    risco = np.empty(np.broadcast_shapes(t.shape, h.shape), dtype=np.float32)
+    np.multiply(h, _PESO_UMIDADE, out=risco)
+    risco += t * _PESO_TEMPERATURA
+    return np.clip(risco, 0.0, 1.0, out=risco)
+
+
+def calcular_risco_lote(temperatura, umidade) -> list:
+    """
+    POST /risco/batch: risco de cada par como lista de floats. Roda no executor (não
+    no event loop). NaN e Infinity, aceitos pelo parser JSON, levantam ValueError.
+    """
+    t = np.asarray(temperatura, dtype=np.float64)
+    h = np.asarray(umidade, dtype=np.float64)
+    if not (np.isfinite(t).all() and np.isfinite(h).all()):
+        raise ValueError("temperatura e umidade devem ser números finitos (sem NaN ou Infinity).")
+    return calcular_risco(t, h).tolist()
+
+
+def _classificar(tp_sensor: str, nm_modelo: Optional[str]) -> Optional[str]:
+    texto = f"{tp_sensor} {nm_modelo or ''}".lower()
+    if any(c in texto for c in _CHAVES_TEMPERATURA):
+        return "temperatura"
+    if any(c in texto for c in _CHAVES_UMIDADE):
+        return "umidade"
+    return None
+
+
+def _serie_media(cursor, sensores, tp_bucket: str, desde: int, ate: int):
+    """Média por intervalo (todos os sensores do grupo juntos), lida de LEITURA_AGREGADO."""
+    marcadores = ", ".join("?" for _ in sensores)
+    cursor.execute(
+        f"""
+        SELECT dt_bucket, SUM(vl_soma) / SUM(qt_leituras)
+          FROM LEITURA_AGREGADO
+         WHERE tp_bucket = ?
+           AND cd_sensor IN ({marcadores})
+           AND dt_bucket BETWEEN ? AND ?
+         GROUP BY dt_bucket
+         ORDER BY dt_bucket
+        """,
+        (tp_bucket, *sensores, desde, ate)
+    )
+    linhas = cursor.fetchall()
+    dts = np.fromiter((r[0] for r in linhas), dtype=np.int64, count=len(linhas))
+    valores = np.fromiter((r[1] for r in linhas), dtype=np.float64, count=len(linhas))
+    return dts, valores
+
+
+def serie_risco_area(
+    cd_area: int,
+    tp_bucket: str,
+    desde: Optional[datetime] = None,
+    ate: Optional[datetime] = None,
+    limit: int = 10000
+) -> dict:
+    """
+    Série temporal de risco da área por minuto/hora/dia, no formato colunar
+    {dt_bucket, vl_temperatura, vl_umidade, vl_risco} (datas em epoch µs, UTC).
+
+    Usa a média dos sensores de temperatura e de umidade da área em cada intervalo
+    (tabela de agregados). Um intervalo sem leitura de um dos grupos repete o último
+    valor conhecido dele; intervalos anteriores à primeira leitura de ambos são omitidos.
+    Retorna os 'limit' intervalos mais recentes. Lança ValueError se a área não tiver
+    sensores de temperatura e de umidade.
+    """
+    intervalo = BUCKETS_AGREGADO[tp_bucket]
+    inicio = para_epoch(desde) // intervalo * intervalo if desde is not None else -(2 ** 62)
+    fim = para_epoch(ate) if ate is not None else 2 ** 62
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT cd_sensor, tp_sensor, nm_modelo FROM SENSOR WHERE cd_area = ?", (cd_area,))
+        grupos = {"temperatura": [], "umidade": []}
+        for cd_sensor, tp_sensor, nm_modelo in cursor.fetchall():
+            grupo = _classificar(tp_sensor, nm_modelo)
+            if grupo is not None:
+                grupos[grupo].append(cd_sensor)
+        faltando = [g for g, sensores in grupos.items() if not sensores]
+        if faltando:
+            raise ValueError(f"Área sem sensores de {' e '.join(faltando)}.")
+        dt_temp, temp = _serie_media(cursor, grupos["temperatura"], tp_bucket, inicio, fim)
+        dt_hum, hum = _serie_media(cursor, grupos["umidade"], tp_bucket, inicio, fim)
+
+    eixo = np.union1d(dt_temp, dt_hum)
+    i_temp = np.searchsorted(dt_temp, eixo, side="right") - 1
+    i_hum = np.searchsorted(dt_hum, eixo, side="right") - 1
+    validos = (i_temp >= 0) & (i_hum >= 0)
+    eixo, i_temp, i_hum = eixo[validos][-limit:], i_temp[validos][-limit:], i_hum[validos][-limit:]
+    temp, hum = temp[i_temp], hum[i_hum]
+    return {
+        "dt_bucket": eixo.tolist(),
+        "vl_temperatura": temp.tolist(),
+        "vl_umidade": hum.tolist(),
+        "vl_risco": calcular_risco(temp, hum).tolist(),
+    }
@@ -19,6 +19,33 @@ class LeituraSensorResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class LeituraAreaResponse(BaseModel):
+    cd_leitura: int
+    cd_sensor: int
+    nm_modelo: Optional[str] = None
+    dt_leitura: datetime
+    vl_valor: float
+
+class LeituraAgregadaResponse(BaseModel):
+    cd_sensor: int
+    tp_bucket: str
+    dt_bucket: datetime        # início do intervalo
+    vl_min: float
+    vl_max: float
+    vl_media: float
+    qt_leituras: int
+    vl_ultimo: float           # valor da leitura mais recente do intervalo
+
+class LeituraLoteItemResultado(BaseModel):
+    indice: int                       # posição do item no lote enviado
+    cd_leitura: Optional[int] = None  # preenchido quando o item foi gravado
+    erro: Optional[str] = None        # preenchido quando o item foi rejeitado
+
+class LeituraLoteResponse(BaseModel):
+    inseridas: int
+    rejeitadas: int
+    resultados: List[LeituraLoteItemResultado]
+
 # ========== Alerta ==========
 class AlertaCreate(BaseModel):
     dt_alerta: datetime
@@ -65,6 +92,9 @@ class LocalResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class LocalProximoResponse(LocalResponse):
+    dist_km: float   # distância em linha reta (círculo máximo) até o ponto consultado
+
 # ========== Sensor ==========
 class SensorResponse(BaseModel):
     cd_sensor: int
@@ -74,3 +104,11 @@ class SensorResponse(BaseModel):
 
     class Config:
         orm_mode = True
+
+# ========== Risco ==========
+class RiscoLoteRequest(BaseModel):
+    temperatura: List[float]
+    umidade: List[float]
+
+class RiscoLoteResponse(BaseModel):
+    risco: List[float]
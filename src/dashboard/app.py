@@ -1,13 +1,49 @@
 # src/dashboard/app.py
 
 import dash
-from dash import html, dcc, Output, Input
+from dash import html, dcc, Output, Input, State
 import plotly.express as px
+import plotly.graph_objects as go
+import math
+import os
+import threading
+import time
 import pandas as pd
-import requests
+from urllib.parse import urlencode
 
-# URL base do backend FastAPI
-BACKEND_URL = "http://localhost:8000"
+try:
+    from .cache import cache
+    from . import cliente_backend, tempo_real
+except ImportError:  # executado como script: python src/dashboard/app.py
+    from cache import cache
+    import cliente_backend
+    import tempo_real
+
+# URL base do backend FastAPI (FLOOD_DASHBOARD_BACKEND_URL)
+BACKEND_URL = cliente_backend.BACKEND_URL
+
+# Leituras por sensor e alertas mostrados por área
+LEITURAS_POR_SENSOR = 50
+ALERTAS_POR_AREA = 10
+
+# Com o tempo real ligado, a tela verifica a cada intervalo se o espelho da área
+# (tempo_real.EspelhoArea) recebeu eventos novos; isso não gera chamadas ao backend
+INTERVALO_TEMPO_REAL_MS = 1000
+
+# Pontos mantidos por linha no gráfico de leituras quando ele cresce por extendData
+MAX_PONTOS_GRAFICO = 500
+
+# Áreas desenhadas no mapa depois que o usuário move/aproxima (busca por bbox)
+MAX_AREAS_MAPA = 5000
+
+# Atualização em segundo plano das opções de área (dropdown): intervalo normal e,
+# enquanto não há nenhuma área (backend fora do ar ou lento no startup), um mais curto
+INTERVALO_AREAS_S = float(os.environ.get("FLOOD_DASHBOARD_AREAS_INTERVALO_S", "60"))
+INTERVALO_AREAS_SEM_DADOS_S = 2.0
+
+# Por quanto tempo a última resposta do cadastro (locais, sensores) e o seu ETag ficam
+# guardados para revalidação com GET condicional (304 Not Modified)
+VALIDADOR_TTL_S = 24 * 3600
 
 # (Opcional) Outras folhas de estilo externas podem ficar aqui
 external_stylesheets = [
@@ -21,78 +57,163 @@ server = app.server  # para deploy se necessário
 # Funções auxiliares para chamar o backend
 # ================================
 
+def _get_json(caminho: str, params: dict = None, condicional: bool = False):
+    """
+    GET no backend com cache compartilhado (TTL + LRU) entre callbacks, threads e
+    workers. A chave inclui o caminho e os parâmetros (área, limite/janela), então
+    callbacks disparados pela mesma ação reaproveitam uma única chamada HTTP.
+    Erros não são cacheados.
+
+    Com 'condicional' (cadastro de locais e sensores, que responde com ETag), a última
+    resposta fica guardada por mais tempo junto com o ETag/Last-Modified. Quando o TTL
+    curto vence, o GET sai com If-None-Match/If-Modified-Since e um 304 reaproveita o
+    corpo guardado.
+    """
+    params = params or {}
+    chave = f"GET {caminho}?{urlencode(sorted(params.items()))}"
+
+    def buscar():
+        resp = cliente_backend.get(caminho, params)
+        resp.raise_for_status()
+        return resp.json()
+
+    def buscar_condicional():
+        chave_validador = f"VALIDADOR {chave}"
+        anterior = cache.ler(chave_validador)
+        headers = {}
+        if anterior is not None:
+            if anterior["etag"]:
+                headers["If-None-Match"] = anterior["etag"]
+            if anterior["last_modified"]:
+                headers["If-Modified-Since"] = anterior["last_modified"]
+        resp = cliente_backend.get(caminho, params, headers)
+        if resp.status_code == 304 and anterior is not None:
+            valor = anterior["valor"]
+        else:
+            resp.raise_for_status()
+            valor = resp.json()
+        cache.gravar(chave_validador, {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "valor": valor,
+        }, ttl=VALIDADOR_TTL_S)
+        return valor
+
+    return cache.obter_ou_calcular(chave, buscar_condicional if condicional else buscar)
+
+
 def fetch_areas():
     try:
-        resp = requests.get(f"{BACKEND_URL}/locais/")
-        resp.raise_for_status()
-        df = pd.DataFrame(resp.json())
+        df = pd.DataFrame(_get_json("/locais/", condicional=True))
         return df
     except Exception as e:
         print("Erro ao buscar áreas:", e)
         return pd.DataFrame(columns=["cd_area", "nm_local", "tp_vulnerabilidade", "lat", "lon"])
 
 
-def fetch_sensores(area_id: int):
+def fetch_areas_bbox(bbox):
+    """Áreas dentro de (min_lon, min_lat, max_lon, max_lat), pelo índice espacial do backend."""
+    colunas = ["cd_area", "nm_local", "tp_vulnerabilidade", "lat", "lon"]
+    min_lon, min_lat, max_lon, max_lat = bbox
+    # 3 casas (~100 m) deixam a URL estável entre pequenos movimentos do mapa; os
+    # mínimos arredondam para baixo e os máximos para cima, para a caixa só crescer
+    caixa = (
+        math.floor(min_lon * 1000) / 1000, math.floor(min_lat * 1000) / 1000,
+        math.ceil(max_lon * 1000) / 1000, math.ceil(max_lat * 1000) / 1000,
+    )
     try:
-        resp = requests.get(f"{BACKEND_URL}/sensores/{area_id}")
-        resp.raise_for_status()
-        return resp.json()
+        params = {"bbox": ",".join(f"{v:.3f}" for v in caixa), "limit": MAX_AREAS_MAPA}
+        return pd.DataFrame(_get_json("/locais/", params), columns=colunas)
     except Exception as e:
-        print(f"Erro ao buscar sensores para área {area_id}:", e)
-        return []
+        print("Erro ao buscar áreas da região do mapa:", e)
+        return pd.DataFrame(columns=colunas)
+
 
+def _espelho_area(area_id: int):
+    return tempo_real.espelho(BACKEND_URL, area_id, LEITURAS_POR_SENSOR, ALERTAS_POR_AREA)
 
-def fetch_leituras_por_sensor(cd_sensor: int, limit: int = 50):
+
+def fetch_leituras_por_area(area_id: int, limit: int = 50):
+    # Espelho conectado ao stream de eventos: dados locais, sem chamada HTTP
+    espelho = _espelho_area(area_id) if limit <= LEITURAS_POR_SENSOR else None
+    if espelho is not None:
+        colunas = espelho.leituras_colunar()
+        if colunas is not None:
+            return colunas if limit == LEITURAS_POR_SENSOR else _ultimas_por_sensor(colunas, limit)
     try:
-        resp = requests.get(f"{BACKEND_URL}/leituras/{cd_sensor}", params={"limit": limit})
-        resp.raise_for_status()
-        return resp.json()
+        return _get_json(f"/locais/{area_id}/leituras", {"limit": limit, "formato": "colunar"})
     except Exception as e:
-        print(f"Erro ao buscar leituras para sensor {cd_sensor}:", e)
+        print(f"Erro ao buscar leituras para área {area_id}:", e)
         return []
 
 
+def _ultimas_por_sensor(colunas: dict, limit: int) -> dict:
+    """Corta o colunar por área (sensor, mais recentes primeiro) em 'limit' leituras por sensor."""
+    manter, contagem = [], {}
+    for i, cd_sensor in enumerate(colunas["cd_sensor"]):
+        contagem[cd_sensor] = contagem.get(cd_sensor, 0) + 1
+        if contagem[cd_sensor] <= limit:
+            manter.append(i)
+    return {nome: [valores[i] for i in manter] for nome, valores in colunas.items()}
+
+
 def fetch_sensor_data(area_id: int):
-    sensores = fetch_sensores(area_id)
-    registros = []
-    for sensor in sensores:
-        cd_sensor = sensor.get("cd_sensor")
-        nm_modelo = sensor.get("nm_modelo", f"Sensor {cd_sensor}")
-        leituras = fetch_leituras_por_sensor(cd_sensor, limit=50)
-        for L in leituras:
-            try:
-                registros.append({
-                    "cd_leitura": L["cd_leitura"],
-                    "cd_sensor": L["cd_sensor"],
-                    "dt_leitura": pd.to_datetime(L["dt_leitura"]),
-                    "vl_valor": L["vl_valor"],
-                    "nm_modelo": nm_modelo
-                })
-            except Exception:
-                continue
+    """
+    Busca as últimas leituras de todos os sensores da área em uma única chamada
+    (GET /locais/{area_id}/leituras), já com o nm_modelo de cada sensor.
+    A resposta vem em formato colunar ({coluna: [valores]}, datas em epoch µs),
+    carregada no DataFrame de uma vez.
+    """
+    colunas = ["cd_leitura", "cd_sensor", "dt_leitura", "vl_valor", "nm_modelo"]
+    leituras = fetch_leituras_por_area(area_id, limit=LEITURAS_POR_SENSOR)
+    if not leituras or not leituras["cd_leitura"]:
+        return pd.DataFrame(columns=colunas)
+
+    df = pd.DataFrame(leituras, columns=colunas)
+    df["dt_leitura"] = pd.to_datetime(df["dt_leitura"], unit="us")
+    df["nm_modelo"] = df["nm_modelo"].fillna("Sensor " + df["cd_sensor"].astype(str))
+    return df
 
-    if not registros:
-        return pd.DataFrame(columns=["cd_leitura", "cd_sensor", "dt_leitura", "vl_valor", "nm_modelo"])
-    return pd.DataFrame(registros)
+
+def fetch_risco_area(area_id: int, bucket: str = "hour"):
+    """
+    Série de risco da área (GET /locais/{area_id}/risco), calculada no backend com o
+    mesmo modelo do ESP32. Retorna DataFrame com dt_bucket e vl_risco (vazio se a área
+    não tiver sensores de temperatura e umidade).
+    """
+    colunas = ["dt_bucket", "vl_temperatura", "vl_umidade", "vl_risco"]
+    try:
+        df = pd.DataFrame(_get_json(f"/locais/{area_id}/risco", {"bucket": bucket}), columns=colunas)
+    except Exception as e:
+        print(f"Erro ao buscar risco para área {area_id}:", e)
+        return pd.DataFrame(columns=colunas)
+    df["dt_bucket"] = pd.to_datetime(df["dt_bucket"], unit="us")
+    return df
 
 
-def fetch_alertas(limit: int = 100):
+def fetch_alertas(limit: int = 100, cd_area: int = None):
     """
-    Chama GET /alertas/?limit={limit} para obter últimos alertas.
+    Chama GET /alertas/?limit={limit} (opcionalmente só da área cd_area) para obter
+    últimos alertas. Com cd_area, usa o espelho em tempo real da área quando conectado.
     Retorna DataFrame com colunas: ['cd_alerta', 'dt_alerta', 'tp_nivel', 'ds_obs', 'cd_area', 'nm_local'].
     """
     try:
-        resp = requests.get(f"{BACKEND_URL}/alertas/", params={"limit": limit})
-        resp.raise_for_status()
-        df = pd.DataFrame(resp.json())
-        
+        colunas = None
+        espelho = _espelho_area(cd_area) if cd_area is not None and limit <= ALERTAS_POR_AREA else None
+        if espelho is not None:
+            colunas = espelho.alertas_colunar()
+            if colunas is not None:
+                colunas = {nome: valores[:limit] for nome, valores in colunas.items()}
+        if colunas is None:
+            params = {"limit": limit, "formato": "colunar"}
+            if cd_area is not None:
+                params["cd_area"] = cd_area
+            colunas = _get_json("/alertas/", params)
+        df = pd.DataFrame(colunas)
+
         if "dt_alerta" in df.columns:
-            # infer_datetime_format=True lida com formatos mistos (com ou sem microssegundos)
-            df["dt_alerta"] = pd.to_datetime(
-                df["dt_alerta"],
-                infer_datetime_format=True,
-                errors="coerce"
-            )
+            # formato colunar: datas em epoch inteiro (microssegundos, UTC)
+            df["dt_alerta"] = pd.to_datetime(df["dt_alerta"], unit="us")
         return df
 
     except Exception as e:
@@ -102,135 +223,345 @@ def fetch_alertas(limit: int = 100):
         )
 
 
+def pre_carregar_area(cd_area: int) -> None:
+    """
+    Busca em paralelo tudo o que os callbacks da área pedem ao backend, deixando as
+    respostas no cache compartilhado. Ao trocar de área ou clicar em Atualizar Dados,
+    o primeiro callback a rodar dispara as chamadas e os demais só leem o cache; num
+    worker com uma thread, eles não esperam mais as chamadas um do outro em série.
+    Leituras e alertas já servidos pelo espelho em tempo real não geram chamadas.
+    """
+    cliente_backend.em_paralelo(
+        lambda: fetch_leituras_por_area(cd_area, LEITURAS_POR_SENSOR),
+        lambda: fetch_risco_area(cd_area),
+        lambda: fetch_alertas(limit=ALERTAS_POR_AREA, cd_area=cd_area),
+        fetch_areas,
+    )
+
+
+def _pre_carregar_na_atualizacao(cd_area) -> None:
+    if cd_area is not None and dash.ctx.triggered_id in ("btn-atualizar", "dropdown-area"):
+        pre_carregar_area(cd_area)
+
+
 # ================================
-# Layout Inicial
+# Opções de área (atualizadas em segundo plano)
 # ================================
+class OpcoesAreas:
+    """
+    Opções do dropdown de áreas em memória, atualizadas por uma thread a cada
+    INTERVALO_AREAS_S (INTERVALO_AREAS_SEM_DADOS_S enquanto estiver vazio). Nem o
+    import do módulo nem o layout esperam o backend: sem resposta ainda, as opções
+    ficam vazias e o callback atualizar_opcoes_areas as preenche quando chegarem.
+    A thread só é criada no primeiro uso (depois do fork dos workers do gunicorn).
+    Falha ou resposta vazia do backend mantém as opções anteriores.
+    """
 
-df_areas = fetch_areas()
-area_options = [
-    {"label": row["nm_local"], "value": row["cd_area"]}
-    for _, row in df_areas.iterrows()
-]
-
-app.layout = html.Div(className="dash-container", children=[
-    html.H1("Flood Sentinel Dashboard"),
-
-    # Filtro de Área + botão Atualizar
-    html.Div(
-        style={"display": "flex", "justifyContent": "space-between", "marginBottom": "20px"},
-        children=[
-            html.Div(
-                style={"flex": "1", "marginRight": "20px"},
-                children=[
-                    html.Label("Selecione a Área:", style={"fontWeight": "bold"}),
-                    dcc.Dropdown(
-                        id="dropdown-area",
-                        options=area_options,
-                        value=area_options[0]["value"] if area_options else None,
-                        clearable=False,
-                    ),
+    def __init__(self):
+        self._opcoes: list = []
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def opcoes(self) -> list:
+        self._iniciar()
+        return self._opcoes
+
+    @property
+    def intervalo_s(self) -> float:
+        return INTERVALO_AREAS_S if self._opcoes else INTERVALO_AREAS_SEM_DADOS_S
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name="opcoes-areas", daemon=True)
+                self._thread.start()
+
+    def _executar(self) -> None:
+        while True:
+            df = fetch_areas()
+            if not df.empty:
+                self._opcoes = [
+                    {"label": nm_local, "value": int(cd_area)}
+                    for cd_area, nm_local in zip(df["cd_area"], df["nm_local"])
                 ]
-            ),
-            html.Button("Atualizar Dados", id="btn-atualizar", n_clicks=0, className="my-button"),
-        ],
-    ),
-
-    # Painel principal: Leituras vs Alertas + Mapa
-    html.Div(className="main-row", children=[
-        # Coluna esquerda: gráfico + tabela de leituras
-        html.Div(className="card", children=[
-            html.H3("Leituras de Sensores"),
-            dcc.Graph(id="graph-leituras-tempo"),
-            html.H4("Últimas Leituras (tabela)", style={"marginTop": "20px"}),
-            dcc.Loading(
-                id="loading-table",
-                type="default",
-                children=html.Div(id="tabela-leituras"),
-            ),
-        ]),
+            time.sleep(self.intervalo_s)
+
 
-        # Coluna direita: lista de alertas + mapa
-        html.Div(className="card", children=[
-            html.H3("Alertas Recentes"),
-            html.Ul(id="lista-alertas", style={"paddingLeft": "20px"}),
-            html.Button("Forçar Alerta (Manual)", id="btn-forcar-alerta", n_clicks=0,
-                        style={"marginTop": "10px", "marginBottom": "20px"}, className="my-button"),
+opcoes_areas = OpcoesAreas()
+
+# ================================
+# Layout (montado a cada carregamento da página)
+# ================================
 
-            html.H3("Mapa de Áreas"),
-            dcc.Graph(id="mapa-areas"),
+def montar_layout():
+    area_options = opcoes_areas.opcoes()
+    return html.Div(className="dash-container", children=[
+        html.H1("Flood Sentinel Dashboard"),
+
+        # Filtro de Área + botão Atualizar
+        html.Div(
+            style={"display": "flex", "justifyContent": "space-between", "marginBottom": "20px"},
+            children=[
+                html.Div(
+                    style={"flex": "1", "marginRight": "20px"},
+                    children=[
+                        html.Label("Selecione a Área:", style={"fontWeight": "bold"}),
+                        dcc.Dropdown(
+                            id="dropdown-area",
+                            options=area_options,
+                            value=area_options[0]["value"] if area_options else None,
+                            clearable=False,
+                        ),
+                    ]
+                ),
+                html.Button("Atualizar Dados", id="btn-atualizar", n_clicks=0, className="my-button"),
+            ],
+        ),
+
+        # Tempo real: [cd_area, versão do espelho da área]; muda só quando chegam eventos
+        dcc.Interval(id="intervalo-tempo-real", interval=INTERVALO_TEMPO_REAL_MS,
+                     disabled=not tempo_real.ATIVO),
+        # Opções de área: busca em memória (OpcoesAreas), sem chamada ao backend
+        dcc.Interval(id="intervalo-areas", interval=opcoes_areas.intervalo_s * 1000),
+        dcc.Store(id="store-versao-area"),
+        # Gráfico de leituras: {cd_area, tracos: {cd_sensor: índice}, marcas: {cd_sensor: último dt plotado}}
+        dcc.Store(id="store-marcas-leituras"),
+
+        # Painel principal: Leituras vs Alertas + Mapa
+        html.Div(className="main-row", children=[
+            # Coluna esquerda: gráfico + tabela de leituras
+            html.Div(className="card", children=[
+                html.H3("Leituras de Sensores"),
+                dcc.Graph(id="graph-leituras-tempo"),
+                html.H4("Risco de Alagamento (por hora)", style={"marginTop": "20px"}),
+                dcc.Graph(id="graph-risco"),
+                html.H4("Últimas Leituras (tabela)", style={"marginTop": "20px"}),
+                dcc.Loading(
+                    id="loading-table",
+                    type="default",
+                    children=html.Div(id="tabela-leituras"),
+                ),
+            ]),
+
+            # Coluna direita: lista de alertas + mapa
+            html.Div(className="card", children=[
+                html.H3("Alertas Recentes"),
+                html.Ul(id="lista-alertas", style={"paddingLeft": "20px"}),
+                html.Button("Forçar Alerta (Manual)", id="btn-forcar-alerta", n_clicks=0,
+                            style={"marginTop": "10px", "marginBottom": "20px"}, className="my-button"),
+
+                html.H3("Mapa de Áreas"),
+                dcc.Graph(id="mapa-areas"),
+            ]),
         ]),
-    ]),
-
-    # Seção de observações manuais
-    html.Div(
-        style={"marginTop": "30px", "borderTop": "1px solid #eee", "paddingTop": "20px"},
-        children=[
-            html.H3("Registrar Observação Manual"),
-            dcc.Textarea(
-                id="textarea-observacao",
-                placeholder="Escreva aqui sua observação...",
-                style={"width": "100%", "height": "100px"},
-            ),
-            html.Button("Enviar Observação", id="btn-enviar-observacao", n_clicks=0,
-                        style={"marginTop": "10px"}, className="my-button"),
-            html.Div(id="status-envio", style={"marginTop": "10px", "color": "green"}),
-        ]
-    ),
-])
+
+        # Seção de observações manuais
+        html.Div(
+            style={"marginTop": "30px", "borderTop": "1px solid #eee", "paddingTop": "20px"},
+            children=[
+                html.H3("Registrar Observação Manual"),
+                dcc.Textarea(
+                    id="textarea-observacao",
+                    placeholder="Escreva aqui sua observação...",
+                    style={"width": "100%", "height": "100px"},
+                ),
+                html.Button("Enviar Observação", id="btn-enviar-observacao", n_clicks=0,
+                            style={"marginTop": "10px"}, className="my-button"),
+                html.Div(id="status-envio", style={"marginTop": "10px", "color": "green"}),
+            ]
+        ),
+    ])
+
+
+app.layout = montar_layout
 
 
 # ================================
 # Callbacks
 # ================================
+@app.callback(
+    Output("dropdown-area", "options"),
+    Output("dropdown-area", "value"),
+    Output("intervalo-areas", "interval"),
+    Input("intervalo-areas", "n_intervals"),
+    State("dropdown-area", "options"),
+    State("dropdown-area", "value"),
+)
+def atualizar_opcoes_areas(_, opcoes_atuais, cd_area):
+    """Leva para a página as opções de área atualizadas em segundo plano."""
+    opcoes = opcoes_areas.opcoes()
+    intervalo = opcoes_areas.intervalo_s * 1000
+    if opcoes == opcoes_atuais:
+        return dash.no_update, dash.no_update, intervalo
+    valor = opcoes[0]["value"] if cd_area is None and opcoes else dash.no_update
+    return opcoes, valor, intervalo
+
+
 
 @app.callback(
-    Output("graph-leituras-tempo", "figure"),
+    Output("store-versao-area", "data"),
     Input("dropdown-area", "value"),
+    Input("intervalo-tempo-real", "n_intervals"),
+    State("store-versao-area", "data"),
+)
+def verificar_eventos_area(cd_area, _, atual):
+    """
+    Publica a área selecionada e a versão do seu espelho em tempo real. Os callbacks de
+    leituras e alertas dependem deste Store, então só refazem a tela quando chega um
+    evento novo (ou a área muda), nunca a cada intervalo.
+    """
+    espelho = _espelho_area(cd_area) if cd_area is not None else None
+    novo = [cd_area, espelho.versao if espelho is not None else None]
+    return dash.no_update if novo == atual else novo
+
+
+def _pontos_por_sensor(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Um ponto por sensor e segundo (a leitura mais nova do segundo), em ordem
+    cronológica, que é a ordem em que os pontos são acrescentados ao gráfico.
+    """
+    df = df.assign(dt_leitura=df["dt_leitura"].dt.round("s"))
+    df = df.drop_duplicates(subset=["cd_sensor", "dt_leitura"])
+    return df.sort_values(["cd_sensor", "dt_leitura"], kind="stable")
+
+
+def _figura_leituras(cd_area, df: pd.DataFrame):
+    """Figura completa (uma linha por sensor) e as marcas usadas pelos próximos deltas."""
+    fig = go.Figure()
+    tracos, marcas = {}, {}
+    for cd_sensor, pontos in df.groupby("cd_sensor", sort=True):
+        tracos[str(cd_sensor)] = len(fig.data)
+        marcas[str(cd_sensor)] = pontos["dt_leitura"].iloc[-1].isoformat()
+        fig.add_trace(go.Scatter(
+            x=pontos["dt_leitura"],
+            y=pontos["vl_valor"],
+            mode="lines",
+            name=pontos["nm_modelo"].iloc[0],
+        ))
+    fig.update_xaxes(title_text="Data/Hora", tickformat="%H:%M:%S", ticklabelmode="period")
+    fig.update_yaxes(title_text="Valor")
+    fig.update_layout(
+        title=f"Leituras Recentes - Área {cd_area}",
+        legend_title_text="Sensor/Modelo",
+        # Zoom/pan do usuário sobrevivem aos redesenhos da mesma área
+        uirevision=cd_area,
+        xaxis=dict(showgrid=False),
+        yaxis=dict(showgrid=False)
+    )
+    return fig, {"cd_area": cd_area, "tracos": tracos, "marcas": marcas}
+
+
+@app.callback(
+    Output("graph-leituras-tempo", "figure"),
+    Output("graph-leituras-tempo", "extendData"),
+    Output("store-marcas-leituras", "data"),
+    Input("store-versao-area", "data"),
     Input("btn-atualizar", "n_clicks"),
+    State("dropdown-area", "value"),
+    State("store-marcas-leituras", "data"),
 )
-def atualizar_grafico_leituras(cd_area, _):
+def atualizar_grafico_leituras(_versao, _, cd_area, estado):
+    """
+    A figura só é montada por inteiro ao trocar de área, no botão Atualizar Dados ou
+    quando aparece um sensor novo. Nos demais eventos, envia ao navegador apenas os
+    pontos posteriores à marca (último segundo plotado) de cada sensor, via
+    extendData, mantendo no máximo MAX_PONTOS_GRAFICO pontos por linha.
+    Leituras que chegam com data anterior à marca só aparecem no próximo redesenho.
+    """
     if cd_area is None:
-        return px.line(title="Selecione uma área para ver as leituras")
+        return px.line(title="Selecione uma área para ver as leituras"), dash.no_update, None
 
+    _pre_carregar_na_atualizacao(cd_area)
     df = fetch_sensor_data(cd_area)
     if df.empty:
-        return px.line(
+        fig = px.line(
             pd.DataFrame({"dt_leitura": [], "vl_valor": [], "nm_modelo": []}),
             x="dt_leitura",
             y="vl_valor",
             color="nm_modelo",
             title="Sem dados disponíveis para esta área"
         )
+        return fig, dash.no_update, {"cd_area": cd_area, "tracos": {}, "marcas": {}}
+
+    leituras_por_sensor = df["cd_sensor"].value_counts()
+    df = _pontos_por_sensor(df)
+    redesenhar = (
+        dash.ctx.triggered_id == "btn-atualizar"
+        or not estado
+        or estado["cd_area"] != cd_area
+    )
+    if not redesenhar:
+        xs, ys, indices = [], [], []
+        marcas = dict(estado["marcas"])
+        for cd_sensor, pontos in df.groupby("cd_sensor", sort=True):
+            chave = str(cd_sensor)
+            if chave not in estado["tracos"]:
+                redesenhar = True
+                break
+            marca = pd.Timestamp(marcas[chave])
+            novos = pontos[pontos["dt_leitura"] > marca]
+            if novos.empty:
+                continue
+            if len(novos) == len(pontos) and leituras_por_sensor[cd_sensor] >= LEITURAS_POR_SENSOR:
+                # Chegou mais do que a janela buscada: pode haver um buraco entre a marca e estes pontos
+                redesenhar = True
+                break
+            xs.append(novos["dt_leitura"].tolist())
+            ys.append(novos["vl_valor"].tolist())
+            indices.append(estado["tracos"][chave])
+            marcas[chave] = novos["dt_leitura"].iloc[-1].isoformat()
+        if not redesenhar:
+            if not indices:
+                return dash.no_update, dash.no_update, dash.no_update
+            delta = [{"x": xs, "y": ys}, indices, MAX_PONTOS_GRAFICO]
+            return dash.no_update, delta, {**estado, "marcas": marcas}
+
+    fig, estado = _figura_leituras(cd_area, df)
+    return fig, dash.no_update, estado
+
+
+@app.callback(
+    Output("graph-risco", "figure"),
+    Input("dropdown-area", "value"),
+    Input("btn-atualizar", "n_clicks"),
+)
+def atualizar_grafico_risco(cd_area, _):
+    if cd_area is None:
+        return px.line(title="Selecione uma área para ver o risco")
 
-    df["dt_leitura"] = df["dt_leitura"].dt.round("S")
-    df = df.drop_duplicates(subset=["dt_leitura", "nm_modelo"])
+    _pre_carregar_na_atualizacao(cd_area)
+    df = fetch_risco_area(cd_area)
+    if df.empty:
+        return px.line(
+            pd.DataFrame({"dt_bucket": [], "vl_risco": []}),
+            x="dt_bucket",
+            y="vl_risco",
+            title="Sem leituras de temperatura e umidade para esta área"
+        )
 
     fig = px.line(
         df,
-        x="dt_leitura",
-        y="vl_valor",
-        color="nm_modelo",
-        title=f"Leituras Recentes - Área {cd_area}",
-        labels={"vl_valor": "Valor", "dt_leitura": "Data/Hora", "nm_modelo": "Sensor/Modelo"}
-    )
-    fig.update_xaxes(tickformat="%H:%M:%S", ticklabelmode="period")
-    fig.update_layout(
-        transition_duration=300,
-        xaxis=dict(showgrid=False),
-        yaxis=dict(showgrid=False)
+        x="dt_bucket",
+        y="vl_risco",
+        title=f"Risco Estimado - Área {cd_area}",
+        labels={"vl_risco": "Risco (0-1)", "dt_bucket": "Data/Hora"}
     )
+    fig.update_yaxes(range=[0, 1])
+    fig.update_layout(xaxis=dict(showgrid=False), yaxis=dict(showgrid=False))
     return fig
 
 
 @app.callback(
     Output("tabela-leituras", "children"),
-    Input("dropdown-area", "value"),
+    Input("store-versao-area", "data"),
     Input("btn-atualizar", "n_clicks"),
+    State("dropdown-area", "value"),
 )
-def atualizar_tabela_leituras(cd_area, _):
+def atualizar_tabela_leituras(_versao, _, cd_area):
     if cd_area is None:
         return html.Div("Selecione uma área para ver as leituras.")
 
+    _pre_carregar_na_atualizacao(cd_area)
     df = fetch_sensor_data(cd_area)
     if df.empty:
         return html.Div("Sem dados para exibir.")
@@ -253,16 +584,17 @@ def atualizar_tabela_leituras(cd_area, _):
 @app.callback(
     Output("lista-alertas", "children"),
     [
-        Input("dropdown-area", "value"),
+        Input("store-versao-area", "data"),
         Input("btn-atualizar", "n_clicks"),
         Input("btn-forcar-alerta", "n_clicks"),
         Input("btn-enviar-observacao", "n_clicks")
-    ]
+    ],
+    State("dropdown-area", "value"),
 )
-def atualizar_lista_alertas(cd_area, n_atualizar, n_forcar, n_enviar_obs):
+def atualizar_lista_alertas(_versao, n_atualizar, n_forcar, n_enviar_obs, cd_area):
     """
     Roda sempre que:
-     - mudar a área no dropdown (cd_area muda),
+     - mudar a área no dropdown ou chegar um evento novo da área (store-versao-area),
      - ou clicar em Atualizar Dados (n_atualizar incrementa),
      - ou clicar em Forçar Alerta (n_forcar incrementa),
      - ou clicar em Enviar Observação (n_enviar_obs incrementa).
@@ -271,22 +603,14 @@ def atualizar_lista_alertas(cd_area, n_atualizar, n_forcar, n_enviar_obs):
     if cd_area is None:
         return [html.Li("Selecione uma área para ver alertas.")]
 
+    _pre_carregar_na_atualizacao(cd_area)
     # 2) Busca alertas do backend
     try:
-        df = fetch_alertas(limit=10)
+        df = fetch_alertas(limit=ALERTAS_POR_AREA, cd_area=cd_area)
     except Exception as e:
         print("Erro ao buscar alertas no callback:", e)
         return [html.Li("Não foi possível obter alertas.")]
 
-    # DEBUG opcional: veja no terminal quais alertas chegaram
-    print("\n[DEBUG] Alertas brutos vindos do backend (antes de filtrar):")
-    try:
-        # Exibe colunas relevantes para conferir no terminal
-        print(df[["cd_alerta", "dt_alerta", "tp_nivel", "cd_area", "nm_local"]]
-              .sort_values("dt_alerta", ascending=False).to_string(index=False))
-    except Exception:
-        print(df)
-
     # 3) Filtra apenas alertas da área selecionada
     df_area = df[df["cd_area"] == cd_area]
 
@@ -316,19 +640,44 @@ def atualizar_lista_alertas(cd_area, n_atualizar, n_forcar, n_enviar_obs):
     return itens
 
 
+def _bbox_do_mapa(relayout):
+    """(min_lon, min_lat, max_lon, max_lat) da região visível, a partir do relayoutData."""
+    if not relayout:
+        return None
+    derivado = relayout.get("map._derived") or relayout.get("mapbox._derived")
+    if not derivado or not derivado.get("coordinates"):
+        return None
+    lons = [lon for lon, _ in derivado["coordinates"]]
+    lats = [lat for _, lat in derivado["coordinates"]]
+    return (
+        max(-180.0, min(lons)), max(-90.0, min(lats)),
+        min(180.0, max(lons)), min(90.0, max(lats)),
+    )
+
+
 @app.callback(
     Output("mapa-areas", "figure"),
     Input("dropdown-area", "value"),
     Input("btn-atualizar", "n_clicks"),
+    Input("mapa-areas", "relayoutData"),
 )
-def atualizar_mapa(cd_area, _):
-    df = fetch_areas().copy()
+def atualizar_mapa(cd_area, _, relayout):
+    """
+    Na primeira exibição, todas as áreas. Depois que o usuário move ou aproxima o
+    mapa, só as áreas da região visível (GET /locais/?bbox=), no máximo MAX_AREAS_MAPA;
+    uirevision mantém a região escolhida quando a figura é refeita.
+    """
+    _pre_carregar_na_atualizacao(cd_area)
+    bbox = _bbox_do_mapa(relayout)
+    df = fetch_areas().copy() if bbox is None else fetch_areas_bbox(bbox)
     if df.empty:
-        return px.scatter_map(
+        fig = px.scatter_map(
             pd.DataFrame({"lat": [], "lon": []}),
             lat="lat", lon="lon",
-            title="Nenhuma área cadastrada"
+            title="Nenhuma área cadastrada" if bbox is None else "Nenhuma área nesta região do mapa"
         )
+        fig.update_layout(uirevision="mapa-areas")
+        return fig
 
     if "lat" not in df.columns or "lon" not in df.columns:
         return px.scatter_map(
@@ -337,6 +686,9 @@ def atualizar_mapa(cd_area, _):
             title="Mapeamento indisponível (sem 'lat'/'lon')"
         )
 
+    titulo = "Localização das Áreas"
+    if bbox is not None and len(df) >= MAX_AREAS_MAPA:
+        titulo += f" (primeiras {MAX_AREAS_MAPA}; aproxime o mapa para ver todas)"
     fig = px.scatter_map(
         df,
         lat="lat",
@@ -346,9 +698,13 @@ def atualizar_mapa(cd_area, _):
         size_max=15,
         zoom=6,
         height=400,
-        title="Localização das Áreas"
+        title=titulo
+    )
+    fig.update_layout(
+        map_style="open-street-map",
+        margin={"l": 0, "r": 0, "t": 30, "b": 0},
+        uirevision="mapa-areas",
     )
-    fig.update_layout(mapbox_style="open-street-map", margin={"l": 0, "r": 0, "t": 30, "b": 0})
     return fig
 
 
@@ -376,8 +732,9 @@ def enviar_observacao(n_clicks, texto, cd_area):
         "cd_usuario": 1
     }
     try:
-        resp = requests.post(f"{BACKEND_URL}/alertas/", json=payload)
+        resp = cliente_backend.post("/alertas/", payload)
         resp.raise_for_status()
+        cache.invalidar("GET /alertas/")
         return "Observação enviada como alerta com sucesso."
     except Exception as e:
         print("Erro ao enviar observação como alerta:", e)
@@ -404,8 +761,9 @@ def forcar_alerta(n_clicks, cd_area):
         "cd_usuario": 1
     }
     try:
-        resp = requests.post(f"{BACKEND_URL}/alertas/", json=payload)
+        resp = cliente_backend.post("/alertas/", payload)
         resp.raise_for_status()
+        cache.invalidar("GET /alertas/")
         return "Alerta forçado com sucesso!"
     except Exception as e:
         print("Erro ao forçar alerta:", e)
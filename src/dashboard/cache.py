@@ -0,0 +1,186 @@
+# src/dashboard/cache.py
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Arquivo SQLite compartilhado entre threads e entre workers (gunicorn) da mesma máquina
+CACHE_PATH = os.environ.get(
+    "FLOOD_DASHBOARD_CACHE",
+    os.path.join(tempfile.gettempdir(), "flood_sentinel_dashboard_cache.db")
+)
+CACHE_TTL_S = float(os.environ.get("FLOOD_DASHBOARD_CACHE_TTL", "5"))
+CACHE_MAX_ITENS = int(os.environ.get("FLOOD_DASHBOARD_CACHE_MAX", "256"))
+
+# Tempo máximo que um worker segura a "reserva" de uma chave enquanto busca o valor
+_RESERVA_S = 10.0
+_ESPERA_PASSO_S = 0.02
+
+# Resolução do LRU: uma leitura só atualiza 'acesso' (o que pega o lock de escrita do
+# arquivo) se o último registro for mais antigo que isso
+_TOQUE_S = 1.0
+
+
+class CacheCompartilhado:
+    """
+    Cache TTL + LRU guardado em um arquivo SQLite, para que todos os callbacks, threads
+    e workers do dashboard reaproveitem a mesma resposta do backend.
+
+    Os valores são JSON (o que o backend devolve), nunca objetos pickled.
+    Quando uma chave expira, apenas um chamador (em qualquer processo) busca o valor
+    novo; os demais esperam a gravação, evitando rajadas no backend.
+    """
+
+    def __init__(self, caminho: str, ttl: float, max_itens: int):
+        self.caminho = caminho
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self._local = threading.local()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        # Conexão descartável: nenhuma conexão aberta na importação é herdada pelos
+        # workers de um fork (gunicorn --preload)
+        conn = sqlite3.connect(self.caminho, timeout=5.0, isolation_level=None)
+        try:
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                chave  TEXT PRIMARY KEY,
+                valor  TEXT NOT NULL,
+                expira REAL NOT NULL,
+                acesso REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_cache_acesso ON cache (acesso);
+
+            CREATE TABLE IF NOT EXISTS reserva (
+                chave  TEXT PRIMARY KEY,
+                expira REAL NOT NULL
+            );
+            """)
+        finally:
+            conn.close()
+
+    def _conexao(self) -> sqlite3.Connection:
+        # Uma conexão por thread e processo; o SQLite cuida do bloqueio entre processos.
+        # Conexões não podem atravessar um fork: o filho abre a sua (a herdada é só
+        # abandonada, fechá-la mexeria nos arquivos do processo pai).
+        pid = os.getpid()
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != pid:
+            conn = sqlite3.connect(self.caminho, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = OFF")
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+    def _lock_da_chave(self, chave: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(chave)
+            if lock is None:
+                lock = self._locks[chave] = threading.Lock()
+            return lock
+
+    # ---------- operações básicas ----------
+
+    def ler(self, chave: str) -> Optional[Any]:
+        agora = time.time()
+        conn = self._conexao()
+        row = conn.execute(
+            "SELECT valor, acesso FROM cache WHERE chave = ? AND expira > ?",
+            (chave, agora)
+        ).fetchone()
+        if row is None:
+            return None
+        # Leituras em sequência não disputam o lock de escrita: o LRU tem resolução _TOQUE_S
+        if row[1] < agora - _TOQUE_S:
+            conn.execute("UPDATE cache SET acesso = ? WHERE chave = ?", (agora, chave))
+        return json.loads(row[0])
+
+    def gravar(self, chave: str, valor: Any, ttl: Optional[float] = None) -> None:
+        agora = time.time()
+        expira = agora + (self.ttl if ttl is None else ttl)
+        conn = self._conexao()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (chave, valor, expira, acesso) VALUES (?, ?, ?, ?)",
+                (chave, json.dumps(valor), expira, agora)
+            )
+            # Remove expirados e, acima do limite, os menos usados recentemente
+            conn.execute("DELETE FROM cache WHERE expira <= ?", (agora,))
+            conn.execute(
+                """
+                DELETE FROM cache
+                 WHERE chave IN (
+                       SELECT chave FROM cache
+                        ORDER BY acesso DESC
+                        LIMIT -1 OFFSET ?
+                 )
+                """,
+                (self.max_itens,)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def invalidar(self, prefixo: str = "") -> None:
+        """Descarta todas as chaves que começam com 'prefixo' (todas, se vazio)."""
+        conn = self._conexao()
+        conn.execute(
+            "DELETE FROM cache WHERE substr(chave, 1, ?) = ?",
+            (len(prefixo), prefixo)
+        )
+
+    # ---------- reserva entre processos ----------
+
+    def _reservar(self, chave: str) -> bool:
+        agora = time.time()
+        conn = self._conexao()
+        conn.execute("DELETE FROM reserva WHERE chave = ? AND expira <= ?", (chave, agora))
+        cur = conn.execute(
+            "INSERT OR IGNORE INTO reserva (chave, expira) VALUES (?, ?)",
+            (chave, agora + _RESERVA_S)
+        )
+        return cur.rowcount == 1
+
+    def _liberar(self, chave: str) -> None:
+        conn = self._conexao()
+        conn.execute("DELETE FROM reserva WHERE chave = ?", (chave,))
+
+    def obter_ou_calcular(self, chave: str, calcular: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Devolve o valor em cache para 'chave' ou executa 'calcular()' uma única vez
+        (por máquina) e guarda o resultado. Exceções de 'calcular' não são cacheadas.
+        """
+        valor = self.ler(chave)
+        if valor is not None:
+            return valor
+
+        with self._lock_da_chave(chave):
+            valor = self.ler(chave)
+            if valor is not None:
+                return valor
+
+            limite = time.time() + _RESERVA_S
+            while not self._reservar(chave):
+                # Outro worker está buscando: espera a gravação
+                time.sleep(_ESPERA_PASSO_S)
+                valor = self.ler(chave)
+                if valor is not None:
+                    return valor
+                if time.time() > limite:
+                    break
+            try:
+                valor = calcular()
+                self.gravar(chave, valor, ttl)
+                return valor
+            finally:
+                self._liberar(chave)
+
+
+cache = CacheCompartilhado(CACHE_PATH, CACHE_TTL_S, CACHE_MAX_ITENS)
@@ -0,0 +1,97 @@
+# src/dashboard/cliente_backend.py
+#
+# Cliente HTTP do dashboard para o backend: uma única requests.Session com pool de
+# conexões keep-alive (compartilhada por callbacks e threads do processo), timeouts
+# em todas as chamadas e novas tentativas com backoff. em_paralelo() dispara buscas
+# independentes ao mesmo tempo, para que uma chamada lenta não enfileire as outras.
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# URL base do backend FastAPI
+BACKEND_URL = os.environ.get("FLOOD_DASHBOARD_BACKEND_URL", "http://localhost:8000").rstrip("/")
+
+# (conexão, leitura) em segundos: um backend fora do ar falha rápido e um lento não
+# prende o worker do Dash por tempo indeterminado
+TIMEOUT_CONEXAO_S = float(os.environ.get("FLOOD_DASHBOARD_TIMEOUT_CONEXAO_S", "2"))
+TIMEOUT_LEITURA_S = float(os.environ.get("FLOOD_DASHBOARD_TIMEOUT_LEITURA_S", "10"))
+TIMEOUT = (TIMEOUT_CONEXAO_S, TIMEOUT_LEITURA_S)
+
+# Novas tentativas (backoff 0,2 s, 0,4 s, 0,8 s...; Retry-After do backend é respeitado)
+TENTATIVAS = int(os.environ.get("FLOOD_DASHBOARD_TENTATIVAS", "3"))
+BACKOFF_S = 0.2
+
+# Conexões mantidas abertas com o backend e buscas simultâneas de em_paralelo()
+CONEXOES = int(os.environ.get("FLOOD_DASHBOARD_CONEXOES", "16"))
+PARALELO = int(os.environ.get("FLOOD_DASHBOARD_PARALELO", "8"))
+
+
+def _politica_tentativas() -> Retry:
+    """
+    Repete falhas de conexão (a requisição não chegou ao backend) e as respostas 429 e
+    503, que a API devolve antes de aceitar qualquer coisa (fila de ingestão cheia ou
+    parada), então também são seguras para POST. Timeout de leitura não é repetido: o
+    backend pode ter executado a requisição, e repetir só multiplicaria a espera.
+    """
+    return Retry(
+        total=TENTATIVAS,
+        connect=TENTATIVAS,
+        read=0,
+        status=TENTATIVAS,
+        backoff_factor=BACKOFF_S,
+        status_forcelist=(429, 503),
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def _criar_sessao() -> requests.Session:
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=CONEXOES, max_retries=_politica_tentativas())
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+    return sessao
+
+
+sessao = _criar_sessao()
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get(caminho: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+        **kwargs) -> requests.Response:
+    """GET em BACKEND_URL + caminho, pela sessão compartilhada e com TIMEOUT padrão."""
+    kwargs.setdefault("timeout", TIMEOUT)
+    return sessao.get(f"{BACKEND_URL}{caminho}", params=params, headers=headers, **kwargs)
+
+
+def post(caminho: str, json: Any = None, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", TIMEOUT)
+    return sessao.post(f"{BACKEND_URL}{caminho}", json=json, **kwargs)
+
+
+def em_paralelo(*funcoes: Callable[[], Any]) -> List[Any]:
+    """
+    Executa as funções ao mesmo tempo (pool de PARALELO threads) e devolve os
+    resultados na mesma ordem. A exceção de uma função é relançada aqui, depois que
+    todas terminaram. As funções não devem chamar em_paralelo() de novo.
+    """
+    global _executor
+    if len(funcoes) <= 1:
+        return [funcao() for funcao in funcoes]
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PARALELO, thread_name_prefix="cliente-backend")
+    futuros = [_executor.submit(funcao) for funcao in funcoes]
+    erros = [futuro.exception() for futuro in futuros]
+    for erro in erros:
+        if erro is not None:
+            raise erro
+    return [futuro.result() for futuro in futuros]
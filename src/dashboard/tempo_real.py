@@ -0,0 +1,235 @@
+# src/dashboard/tempo_real.py
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+try:
+    from . import cliente_backend
+except ImportError:  # executado como script: python src/dashboard/app.py
+    import cliente_backend
+
+# 0 desliga o tempo real: o dashboard volta a depender do botão "Atualizar Dados"
+ATIVO = os.environ.get("FLOOD_DASHBOARD_TEMPO_REAL", "1") != "0"
+
+# Espelho sem leitura há mais que isso encerra o stream (área não está mais na tela)
+OCIOSO_S = 300.0
+# O backend manda keep-alive a cada 15 s; sem nada por mais tempo, a conexão caiu
+_TIMEOUT_LEITURA_S = 45.0
+_ESPERAS_RECONEXAO_S = (1, 2, 5, 10, 30)
+
+# Mesmas colunas dos formatos colunares da API
+COLUNAS_LEITURA_AREA = ("cd_leitura", "cd_sensor", "nm_modelo", "dt_leitura", "vl_valor")
+COLUNAS_ALERTA = (
+    "cd_alerta", "dt_alerta", "tp_nivel", "tp_origem", "ds_obs",
+    "cd_area", "cd_usuario", "nm_local", "nm_usuario"
+)
+
+
+def _vazio(colunas) -> dict:
+    return {nome: [] for nome in colunas}
+
+
+class EspelhoArea:
+    """
+    Cópia local das últimas leituras (por sensor) e dos últimos alertas de uma área,
+    mantida por uma thread que assina GET /eventos?cd_area= no backend.
+
+    Ao conectar (evento 'conectado') e quando o backend pede 'reiniciar', o estado é
+    recarregado pela API REST; depois disso só os deltas (eventos 'leituras' e
+    'alertas') são aplicados. Enquanto o stream não está conectado, leituras_colunar()
+    e alertas_colunar() devolvem None e quem chama usa a API REST.
+    """
+
+    def __init__(self, backend_url: str, cd_area: int, leituras_por_sensor: int, max_alertas: int):
+        self.backend_url = backend_url
+        self.cd_area = cd_area
+        self.leituras_por_sensor = leituras_por_sensor
+        self.max_alertas = max_alertas
+        self._leituras: Dict[int, list] = {}     # cd_sensor -> [(dt, cd_leitura, valor)] ordenado
+        self._modelos: Dict[int, Optional[str]] = {}
+        self._alertas: Dict[int, tuple] = {}     # cd_alerta -> linha em COLUNAS_ALERTA
+        self._max_leitura = 0
+        self._max_alerta = 0
+        self._pronto = False
+        self._lock = threading.Lock()
+        self._ultimo_acesso = time.monotonic()
+        self._thread = threading.Thread(target=self._executar, name=f"espelho-area-{cd_area}", daemon=True)
+
+    def iniciar(self) -> "EspelhoArea":
+        self._thread.start()
+        return self
+
+    @property
+    def encerrado(self) -> bool:
+        return not self._thread.is_alive()
+
+    # ---------- consulta (callbacks) ----------
+
+    @property
+    def versao(self) -> Optional[List[int]]:
+        """
+        [maior cd_leitura, maior cd_alerta] já aplicados, ou None se não conectado.
+        Depende só dos dados, então é igual em todos os workers do dashboard.
+        """
+        self._ultimo_acesso = time.monotonic()
+        with self._lock:
+            return [self._max_leitura, self._max_alerta] if self._pronto else None
+
+    def leituras_colunar(self) -> Optional[dict]:
+        """Mesmo formato (e ordem) de GET /locais/{cd_area}/leituras?formato=colunar."""
+        self._ultimo_acesso = time.monotonic()
+        with self._lock:
+            if not self._pronto:
+                return None
+            colunas = _vazio(COLUNAS_LEITURA_AREA)
+            for cd_sensor in sorted(self._leituras):
+                nm_modelo = self._modelos.get(cd_sensor)
+                for dt, cd_leitura, valor in reversed(self._leituras[cd_sensor]):
+                    colunas["cd_leitura"].append(cd_leitura)
+                    colunas["cd_sensor"].append(cd_sensor)
+                    colunas["nm_modelo"].append(nm_modelo)
+                    colunas["dt_leitura"].append(dt)
+                    colunas["vl_valor"].append(valor)
+            return colunas
+
+    def alertas_colunar(self) -> Optional[dict]:
+        """Mesmo formato de GET /alertas/?cd_area=&formato=colunar (mais recentes primeiro)."""
+        self._ultimo_acesso = time.monotonic()
+        with self._lock:
+            if not self._pronto:
+                return None
+            linhas = sorted(self._alertas.values(), key=lambda l: (l[1], l[0]), reverse=True)
+            if not linhas:
+                return _vazio(COLUNAS_ALERTA)
+            return {nome: list(valores) for nome, valores in zip(COLUNAS_ALERTA, zip(*linhas))}
+
+    # ---------- aplicação dos deltas (thread do stream) ----------
+
+    def _aplicar_leituras(self, colunas: dict) -> None:
+        for cd_leitura, cd_sensor, nm_modelo, dt, valor in zip(*(colunas[c] for c in COLUNAS_LEITURA_AREA)):
+            self._modelos[cd_sensor] = nm_modelo
+            serie = self._leituras.setdefault(cd_sensor, [])
+            item = (dt, cd_leitura, valor)
+            if serie and item[:2] <= serie[0][:2] and len(serie) >= self.leituras_por_sensor:
+                continue
+            if any(existente[1] == cd_leitura for existente in serie):
+                continue
+            # Quase sempre é a mais nova: percorre a partir do fim
+            i = len(serie)
+            while i and serie[i - 1][:2] > item[:2]:
+                i -= 1
+            serie.insert(i, item)
+            if len(serie) > self.leituras_por_sensor:
+                del serie[0]
+            self._max_leitura = max(self._max_leitura, cd_leitura)
+
+    def _aplicar_alertas(self, colunas: dict) -> None:
+        for linha in zip(*(colunas[c] for c in COLUNAS_ALERTA)):
+            self._alertas[linha[0]] = linha
+            self._max_alerta = max(self._max_alerta, linha[0])
+        if len(self._alertas) > self.max_alertas:
+            manter = sorted(self._alertas.values(), key=lambda l: (l[1], l[0]))[-self.max_alertas:]
+            self._alertas = {linha[0]: linha for linha in manter}
+
+    def _get_colunar(self, caminho: str, params: dict, colunas) -> dict:
+        resp = cliente_backend.sessao.get(
+            f"{self.backend_url}{caminho}", params={**params, "formato": "colunar"},
+            timeout=cliente_backend.TIMEOUT
+        )
+        if resp.status_code == 404:
+            return _vazio(colunas)
+        resp.raise_for_status()
+        return resp.json()
+
+    def _recarregar(self) -> None:
+        """Estado completo pela API REST (sem o cache do dashboard), as duas buscas em paralelo."""
+        leituras, alertas = cliente_backend.em_paralelo(
+            lambda: self._get_colunar(
+                f"/locais/{self.cd_area}/leituras", {"limit": self.leituras_por_sensor}, COLUNAS_LEITURA_AREA
+            ),
+            lambda: self._get_colunar(
+                "/alertas/", {"cd_area": self.cd_area, "limit": self.max_alertas}, COLUNAS_ALERTA
+            ),
+        )
+        with self._lock:
+            self._leituras, self._modelos, self._alertas = {}, {}, {}
+            self._max_leitura = self._max_alerta = 0
+            self._aplicar_leituras(leituras)
+            self._aplicar_alertas(alertas)
+            self._pronto = True
+
+    def _tratar(self, tipo: str, dados: str) -> None:
+        if tipo in ("conectado", "reiniciar"):
+            self._recarregar()
+        elif tipo == "leituras":
+            with self._lock:
+                self._aplicar_leituras(json.loads(dados))
+        elif tipo == "alertas":
+            with self._lock:
+                self._aplicar_alertas(json.loads(dados))
+
+    def _ocioso(self) -> bool:
+        return time.monotonic() - self._ultimo_acesso > OCIOSO_S
+
+    def _consumir(self) -> None:
+        """Lê o stream SSE até ele cair ou o espelho ficar ocioso."""
+        with cliente_backend.sessao.get(
+            f"{self.backend_url}/eventos",
+            params={"cd_area": self.cd_area},
+            stream=True,
+            timeout=(cliente_backend.TIMEOUT_CONEXAO_S, _TIMEOUT_LEITURA_S)
+        ) as resp:
+            resp.raise_for_status()
+            tipo, dados = "message", []
+            for linha in resp.iter_lines(decode_unicode=True):
+                if self._ocioso():
+                    return
+                if not linha:
+                    if dados:
+                        self._tratar(tipo, "\n".join(dados))
+                    tipo, dados = "message", []
+                elif linha.startswith(":"):
+                    continue
+                else:
+                    campo, _, valor = linha.partition(":")
+                    valor = valor[1:] if valor.startswith(" ") else valor
+                    if campo == "event":
+                        tipo = valor
+                    elif campo == "data":
+                        dados.append(valor)
+
+    def _executar(self) -> None:
+        tentativa = 0
+        while not self._ocioso():
+            try:
+                self._consumir()
+                tentativa = 0
+            except Exception as e:
+                print(f"Stream de eventos da área {self.cd_area} indisponível:", e)
+            with self._lock:
+                self._pronto = False
+            if self._ocioso():
+                break
+            time.sleep(_ESPERAS_RECONEXAO_S[min(tentativa, len(_ESPERAS_RECONEXAO_S) - 1)])
+            tentativa += 1
+
+
+_espelhos: Dict[int, EspelhoArea] = {}
+_espelhos_lock = threading.Lock()
+
+
+def espelho(backend_url: str, cd_area: int, leituras_por_sensor: int = 50,
+            max_alertas: int = 10) -> Optional[EspelhoArea]:
+    """Espelho da área neste processo (criado e conectado no primeiro uso); None se desligado."""
+    if not ATIVO:
+        return None
+    with _espelhos_lock:
+        atual = _espelhos.get(cd_area)
+        if atual is None or atual.encerrado:
+            atual = _espelhos[cd_area] = EspelhoArea(
+                backend_url, cd_area, leituras_por_sensor, max_alertas
+            ).iniciar()
+        return atual